@@ -20,6 +20,7 @@ from src.models.friendship import friendship  # noqa F401
 from src.models.notification import notification  # noqa F401
 from src.models.book_list import BookList  # noqa F401
 from src.models.book_list_book import book_list_book  # noqa F401
+from src.models.daily_rollup import DailyRollup  # noqa F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
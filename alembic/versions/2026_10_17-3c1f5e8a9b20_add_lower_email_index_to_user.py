@@ -0,0 +1,44 @@
+"""Add lower(email) index to user
+
+Revision ID: 3c1f5e8a9b20
+Revises: f66b79bfd056
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f5e8a9b20'
+down_revision: Union[str, None] = 'f66b79bfd056'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Emails differing only by case, allowed by the previous case sensitive index, which would break the new one
+CASE_COLLISIONS = """
+SELECT lower(email), string_agg(id || ' <' || email || '>', ', ' ORDER BY id)
+FROM "user"
+GROUP BY lower(email)
+HAVING count(*) > 1
+"""
+
+
+def upgrade() -> None:
+    # The colliding accounts are not merged automatically, since each one may own reviews, lists and friendships:
+    # keep one account per email and change the email of the others (or merge them by hand), then upgrade again
+    # The check needs the data, so it is skipped when only the SQL script is generated (--sql)
+    collisions = [] if op.get_context().as_sql else op.get_bind().execute(sa.text(CASE_COLLISIONS)).all()
+    if collisions:
+        details = '\n'.join(f'  {email}: {users}' for email, users in collisions)
+        raise RuntimeError(f'Some users share an email with a different case, fix them before upgrading:\n{details}')
+
+    op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_email_lower', table_name='user')
@@ -0,0 +1,43 @@
+"""Store access tokens by digest
+
+Revision ID: 8e4d2a7c1f63
+Revises: 3c1f5e8a9b20
+Create Date: 2026-10-17 11:40:05.815230
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4d2a7c1f63'
+down_revision: Union[str, None] = '3c1f5e8a9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Same clock as AccessToken.delete_expired: the current UTC time bound as a parameter
+    access_token = sa.table('access_token', sa.column('expiration', sa.DateTime()))
+    op.execute(access_token.delete().where(access_token.c.expiration < datetime.now(timezone.utc)))
+    op.add_column('access_token', sa.Column('token_hash', sa.String(length=64), nullable=True))
+    op.execute("UPDATE access_token SET token_hash = encode(sha256(convert_to(access_token, 'UTF8')), 'hex')")
+    op.drop_constraint('access_token_pkey', 'access_token', type_='primary')
+    op.drop_column('access_token', 'access_token')
+    op.alter_column('access_token', 'token_hash', nullable=False)
+    op.create_primary_key('access_token_pkey', 'access_token', ['token_hash'])
+    op.create_index('ix_access_token_expiration', 'access_token', ['expiration'], unique=False)
+
+
+def downgrade() -> None:
+    # The raw tokens cannot be recovered from their digests, every session has to log in again
+    op.execute('DELETE FROM access_token')
+    op.drop_index('ix_access_token_expiration', table_name='access_token')
+    op.drop_constraint('access_token_pkey', 'access_token', type_='primary')
+    op.drop_column('access_token', 'token_hash')
+    op.add_column('access_token', sa.Column('access_token', sa.String(), nullable=False))
+    op.create_primary_key('access_token_pkey', 'access_token', ['access_token'])
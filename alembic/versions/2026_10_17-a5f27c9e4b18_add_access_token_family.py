@@ -0,0 +1,30 @@
+"""Add access token family
+
+Revision ID: a5f27c9e4b18
+Revises: e81b3f0c5a27
+Create Date: 2026-10-17 19:12:36.402917
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5f27c9e4b18'
+down_revision: Union[str, None] = 'e81b3f0c5a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The refresh tokens issued before have no family, a replay of one of them only fails
+    op.add_column('access_token', sa.Column('family', sa.String(length=32), nullable=True))
+    op.create_index('ix_access_token_family', 'access_token', ['family'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_access_token_family', table_name='access_token')
+    op.drop_column('access_token', 'family')
@@ -0,0 +1,137 @@
+"""Add book search vector
+
+Revision ID: c47a9e2d6f15
+Revises: 5b9d3e71a4c8
+Create Date: 2026-10-17 17:21:09.604417
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a9e2d6f15'
+down_revision: Union[str, None] = '5b9d3e71a4c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The configuration has to match SEARCH_CONFIG in src/models/book/book.py
+BOOK_SEARCH_VECTOR = """
+CREATE FUNCTION book_search_vector(p_book_id integer, p_title text, p_overview text) RETURNS tsvector
+LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('simple', coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce((
+            SELECT string_agg(author.name || ' ' || author.first_last_name || ' '
+                              || coalesce(author.second_last_name, ''), ' ')
+            FROM author_book JOIN author ON author.id = author_book.author_id
+            WHERE author_book.book_id = p_book_id
+        ), '')), 'B')
+        || setweight(to_tsvector('simple', coalesce((
+            SELECT string_agg(genre.name, ' ')
+            FROM book_genre JOIN genre ON genre.id = book_genre.genre_id
+            WHERE book_genre.book_id = p_book_id
+        ), '')), 'C')
+        || setweight(to_tsvector('simple', coalesce(p_overview, '')), 'D')
+$$
+"""
+
+# The vector of a book is computed when its title or overview is written
+BOOK_TRIGGER = """
+CREATE FUNCTION book_search_vector_on_book() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := book_search_vector(NEW.id, NEW.title, NEW.overview);
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER book_search_vector_on_book BEFORE INSERT OR UPDATE OF title, overview ON book
+FOR EACH ROW EXECUTE FUNCTION book_search_vector_on_book()
+"""
+
+# And recomputed when an author or a genre is added to or removed from the book
+LINK_TRIGGERS = """
+CREATE FUNCTION book_search_vector_on_link() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_book_id integer;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_book_id := OLD.book_id;
+    ELSE
+        v_book_id := NEW.book_id;
+    END IF;
+    UPDATE book SET search_vector = book_search_vector(id, title, overview) WHERE id = v_book_id;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER book_search_vector_on_author_book AFTER INSERT OR DELETE ON author_book
+FOR EACH ROW EXECUTE FUNCTION book_search_vector_on_link();
+
+CREATE TRIGGER book_search_vector_on_book_genre AFTER INSERT OR DELETE ON book_genre
+FOR EACH ROW EXECUTE FUNCTION book_search_vector_on_link()
+"""
+
+# Or when the name of one of its authors or genres changes
+NAME_TRIGGERS = """
+CREATE FUNCTION book_search_vector_on_author() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE book SET search_vector = book_search_vector(book.id, book.title, book.overview)
+    FROM author_book
+    WHERE author_book.book_id = book.id AND author_book.author_id = NEW.id;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER book_search_vector_on_author AFTER UPDATE OF name, first_last_name, second_last_name ON author
+FOR EACH ROW WHEN (
+    OLD.name IS DISTINCT FROM NEW.name
+    OR OLD.first_last_name IS DISTINCT FROM NEW.first_last_name
+    OR OLD.second_last_name IS DISTINCT FROM NEW.second_last_name
+) EXECUTE FUNCTION book_search_vector_on_author();
+
+CREATE FUNCTION book_search_vector_on_genre() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE book SET search_vector = book_search_vector(book.id, book.title, book.overview)
+    FROM book_genre
+    WHERE book_genre.book_id = book.id AND book_genre.genre_id = NEW.id;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER book_search_vector_on_genre AFTER UPDATE OF name ON genre
+FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE FUNCTION book_search_vector_on_genre()
+"""
+
+
+def upgrade() -> None:
+    op.add_column('book', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(BOOK_SEARCH_VECTOR)
+    op.execute(BOOK_TRIGGER)
+    op.execute(LINK_TRIGGERS)
+    op.execute(NAME_TRIGGERS)
+    # The existing books are indexed before the index is built, which is faster than maintaining it row by row
+    op.execute('UPDATE book SET search_vector = book_search_vector(id, title, overview)')
+    op.create_index('ix_book_search_vector', 'book', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_book_search_vector', table_name='book', postgresql_using='gin')
+    op.execute('DROP TRIGGER book_search_vector_on_genre ON genre')
+    op.execute('DROP TRIGGER book_search_vector_on_author ON author')
+    op.execute('DROP TRIGGER book_search_vector_on_book_genre ON book_genre')
+    op.execute('DROP TRIGGER book_search_vector_on_author_book ON author_book')
+    op.execute('DROP TRIGGER book_search_vector_on_book ON book')
+    op.execute('DROP FUNCTION book_search_vector_on_genre()')
+    op.execute('DROP FUNCTION book_search_vector_on_author()')
+    op.execute('DROP FUNCTION book_search_vector_on_link()')
+    op.execute('DROP FUNCTION book_search_vector_on_book()')
+    op.execute('DROP FUNCTION book_search_vector(integer, text, text)')
+    op.drop_column('book', 'search_vector')
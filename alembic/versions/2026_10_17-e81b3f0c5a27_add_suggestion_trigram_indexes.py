@@ -0,0 +1,41 @@
+"""Add suggestion trigram indexes
+
+Revision ID: e81b3f0c5a27
+Revises: c47a9e2d6f15
+Create Date: 2026-10-17 18:05:52.170386
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81b3f0c5a27'
+down_revision: Union[str, None] = 'c47a9e2d6f15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_book_title_trgm',
+        'book',
+        ['title'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+    # The expression has to match Author.full_name for the planner to use the index
+    op.execute(
+        'CREATE INDEX ix_author_full_name_trgm ON author USING gin '
+        "((name || ' ' || first_last_name || ' ' || coalesce(second_last_name, '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_author_full_name_trgm', table_name='author')
+    op.drop_index('ix_book_title_trgm', table_name='book', postgresql_using='gin')
+    # The extension is left installed, other objects of the database may rely on it
@@ -1,9 +1,18 @@
-from typing import TypeVar, TYPE_CHECKING
+import random
+import threading
+from asyncio import current_task
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, TypeVar, TYPE_CHECKING
 
 import toml
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase, scoped_session
+from sqlalchemy import create_engine, make_url, Engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, async_scoped_session
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, scoped_session, Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from src.utils.cache.ttl_cache import TTLCache
 
 if TYPE_CHECKING:
     from src.models.rosetta_item import RosettaItem, RosettaBase
@@ -15,7 +24,106 @@ SQLALCHEMY_DATABASE_URL = config['database']['DB_URL']
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+REPLICA_URLS = config['database'].get('REPLICA_URLS', [])
+REPLICA_STICKY_SECONDS = config['database'].get('REPLICA_STICKY_SECONDS', 5)
+REPLICA_STICKY_USERS = config['database'].get('REPLICA_STICKY_USERS', 10000)
+
+replica_engines = [create_engine(url) for url in REPLICA_URLS]
+
+# Set by the SessionScopeMiddleware to a unique marker for each request being served
+request_scope: ContextVar[object | None] = ContextVar('request_scope', default=None)
+
+# Set by the SessionScopeMiddleware for the requests whose reads may be served by a replica (GET, HEAD)
+read_only_request: ContextVar[bool] = ContextVar('read_only_request', default=False)
+
+# Set by get_current_user to the id of the authenticated user
+current_user_id: ContextVar[int | None] = ContextVar('current_user_id', default=None)
+
+# Set inside primary_reads() blocks
+force_primary: ContextVar[bool] = ContextVar('force_primary', default=False)
+
+# Users who wrote recently, whose reads go to the primary until the replicas have caught up
+sticky_users = TTLCache(REPLICA_STICKY_USERS, REPLICA_STICKY_SECONDS)
+
+
+def session_scope() -> object:
+    """
+    Get the scope of the current session: the request being served or, outside of a request, the thread
+    :return: The key of the session in the registry
+    """
+    scope = request_scope.get()
+    return scope if scope is not None else threading.get_ident()
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """
+    Send every read of the block to the primary, for reads which must not lag behind, e.g. authentication
+    """
+    token = force_primary.set(True)
+    try:
+        yield
+    finally:
+        force_primary.reset(token)
+
+
+class RoutingSession(Session):
+    """
+    Session sending the reads of read-only requests to a replica
+
+    Flushes and DML statements always run on the primary. The user running them
+    becomes sticky for a few seconds, during which its reads go to the primary
+    as well, so users always read their own writes.
+    """
+
+    def get_bind(self, mapper: any = None, clause: any = None, **kwargs: any) -> Engine:
+        """
+        Choose the engine running a statement
+        :param mapper: The mapper of the statement, if any
+        :param clause: The statement
+        :param kwargs: The other arguments of Session.get_bind
+        :return: The primary engine or one of the replicas
+        """
+        if self._flushing or isinstance(clause, UpdateBase):
+            user_id = current_user_id.get()
+            if replica_engines and user_id is not None:
+                sticky_users.set(user_id, True)
+            return super().get_bind(mapper, clause=clause, **kwargs)
+
+        if replica_engines and read_only_request.get() and not force_primary.get():
+            user_id = current_user_id.get()
+            if user_id is None or sticky_users.get(user_id) is None:
+                return random.choice(replica_engines)  # noqa: S311
+
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+SessionLocal = scoped_session(
+    sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine), scopefunc=session_scope
+)
+
+
+def async_database_url(url: str) -> str:
+    """
+    Get the async driver variant of a database URL
+    :param url: The database URL
+    :return: The same URL using asyncpg when the database is Postgres
+    """
+    parsed_url = make_url(url)
+    if parsed_url.get_backend_name() == 'postgresql':
+        parsed_url = parsed_url.set(drivername='postgresql+asyncpg')
+
+    return parsed_url.render_as_string(hide_password=False)
+
+
+ASYNC_SQLALCHEMY_DATABASE_URL = config['database'].get('ASYNC_DB_URL', async_database_url(SQLALCHEMY_DATABASE_URL))
+
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+
+# One session per asyncio task; objects are not expired on commit since attribute refreshes would need IO
+AsyncSessionLocal = async_scoped_session(
+    async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine), scopefunc=current_task
+)
 
 
 class BaseSQL(DeclarativeBase):
@@ -0,0 +1,9 @@
+#!/bin/bash
+# Creates the role used by the read replica to stream the WAL of the primary
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname postgres <<-SQL
+    CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD '$PGSQL_REPLICATION_PASSWORD';
+SQL
+
+echo "host replication replicator all scram-sha-256" >> "$PGDATA/pg_hba.conf"
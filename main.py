@@ -1,3 +1,7 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
 from src.routers.auth import auth
@@ -11,9 +15,31 @@ from src.routers.publisher import publisher
 from src.routers.friendship import friendship
 from src.routers.notification import notification
 from src.routers.book_list import book_list
+from src.routers.metrics import metrics
+from src.routers.dashboard import dashboard
+from src.routers.search import search
+from src.utils.middleware.lazy_load_middleware import LazyLoadMiddleware, LAZY_LOAD_DETECTION
+from src.utils.middleware.session_middleware import SessionScopeMiddleware
+from src.utils.middleware.sql_timing_middleware import SqlTimingMiddleware
+from src.utils.tasks.access_token_sweeper import run_access_token_sweeper, load_revocation_filter
+from src.utils.tasks.rollup_refresher import run_rollup_refresher
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(root_path='/api')
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """
+    Start the background tasks with the application and stop them on shutdown
+    """
+    await asyncio.to_thread(load_revocation_filter)
+    access_token_sweeper = asyncio.create_task(run_access_token_sweeper())
+    rollup_refresher = asyncio.create_task(run_rollup_refresher())
+    yield
+    access_token_sweeper.cancel()
+    rollup_refresher.cancel()
+
+
+app = FastAPI(root_path='/api', lifespan=lifespan)
 
 origins = [
     'http://localhost:4200',
@@ -25,7 +51,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=['Link', 'X-Next-Cursor', 'X-Prev-Cursor', 'Server-Timing'],
 )
+app.add_middleware(SessionScopeMiddleware)
+app.add_middleware(SqlTimingMiddleware)
+if LAZY_LOAD_DETECTION != 'off':
+    app.add_middleware(LazyLoadMiddleware)
 
 app.include_router(health.router)
 app.include_router(user.router)
@@ -37,4 +68,7 @@ app.include_router(review.router)
 app.include_router(publisher.router)
 app.include_router(friendship.router)
 app.include_router(notification.router)
-app.include_router(book_list.router)
\ No newline at end of file
+app.include_router(book_list.router)
+app.include_router(metrics.router)
+app.include_router(dashboard.router)
+app.include_router(search.router)
\ No newline at end of file
@@ -1,31 +1,42 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
 
-from sqlalchemy import update
+from sqlalchemy import update, delete, select, String, false, true
 from sqlalchemy.orm import Mapped, mapped_column
 
 from db import BaseSQL
+from src.utils.auth.principal_cache import principal_cache, token_digest
+from src.utils.auth.revocation_filter import revocation_filter
 
 
 class AccessToken(BaseSQL):
     """
     Access token model
+
+    Tokens are stored under the sha256 digest of the JWT so the primary key stays small
+    no matter how long the token is. The refresh tokens rotated from the same login
+    share a family, revoked as a whole when one of its used tokens is replayed.
     """
 
     __tablename__ = 'access_token'
 
-    access_token: Mapped[str] = mapped_column(primary_key=True)
+    token_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
     valid: Mapped[bool]
-    expiration: Mapped[datetime]
+    expiration: Mapped[datetime] = mapped_column(index=True)
+    family: Mapped[Optional[str]] = mapped_column(String(32), index=True)
 
     @classmethod
-    def insert(cls, access_token: str, valid: bool, expiration: datetime) -> None:
+    def insert(cls, access_token: str, valid: bool, expiration: datetime, family: Optional[str] = None) -> None:
         """
         Insert a new access token
         :param access_token:
         :param valid:
         :param expiration:
+        :param family: The family of a refresh token
         """
-        new_access_token = cls(access_token=access_token, valid=valid, expiration=expiration)
+        new_access_token = cls(
+            token_hash=token_digest(access_token), valid=valid, expiration=expiration, family=family
+        )
         cls.session.add(new_access_token)
         cls.session.commit()
 
@@ -36,7 +47,7 @@ class AccessToken(BaseSQL):
         :param access_token:
         :return:
         """
-        return cls.query.get(access_token)
+        return cls.session.get(cls, token_digest(access_token))
 
     @classmethod
     def invalid(cls, token: str) -> None:
@@ -44,6 +55,82 @@ class AccessToken(BaseSQL):
         Invalidate an access token
         :param token:
         """
-        stmt = update(cls).where(cls.access_token == token).values(valid=False)
+        cls.invalid_hash(token_digest(token))
+
+    @classmethod
+    def invalid_hash(cls, token_hash: str) -> None:
+        """
+        Invalidate an access token by its digest
+        :param token_hash:
+        """
+        stmt = update(cls).where(cls.token_hash == token_hash).values(valid=False)
         cls.session.execute(stmt)
         cls.session.commit()
+        revocation_filter.add(token_hash)
+        principal_cache.invalidate(token_hash)
+
+    @classmethod
+    def consume(cls, token: str) -> bool:
+        """
+        Invalidate a valid token in a single statement, so concurrent requests cannot both use it
+        :param token:
+        :return: Whether the token was valid and this call invalidated it
+        """
+        token_hash = token_digest(token)
+        stmt = (
+            update(cls)
+            .where(cls.token_hash == token_hash, cls.valid == true())
+            .values(valid=False)
+            .returning(cls.token_hash)
+        )
+        consumed = cls.session.execute(stmt).scalar_one_or_none() is not None
+        cls.session.commit()
+        if consumed:
+            revocation_filter.add(token_hash)
+            principal_cache.invalidate(token_hash)
+
+        return consumed
+
+    @classmethod
+    def revoke_family(cls, family: str) -> list[str]:
+        """
+        Invalidate every valid token of a family
+        :param family:
+        :return: The digests of the invalidated tokens
+        """
+        stmt = (
+            update(cls)
+            .where(cls.family == family, cls.valid == true())
+            .values(valid=False)
+            .returning(cls.token_hash)
+            .execution_options(synchronize_session=False)
+        )
+        token_hashes = list(cls.session.scalars(stmt))
+        cls.session.commit()
+        for token_hash in token_hashes:
+            revocation_filter.add(token_hash)
+            principal_cache.invalidate(token_hash)
+
+        return token_hashes
+
+    @classmethod
+    def load_revocation_filter(cls) -> None:
+        """
+        Fill the revocation filter with the invalid tokens that have not expired yet
+        """
+        stmt = select(cls.token_hash).where(cls.valid == false(), cls.expiration >= datetime.now(timezone.utc))
+        revocation_filter.reset(lambda: cls.session.scalars(stmt))
+
+    @classmethod
+    def delete_expired(cls, batch_size: int) -> int:
+        """
+        Delete a batch of expired access tokens
+        :param batch_size: The maximum number of tokens to delete
+        :return: The number of deleted tokens
+        """
+        expired = select(cls.token_hash).where(cls.expiration < datetime.now(timezone.utc)).limit(batch_size)
+        stmt = delete(cls).where(cls.token_hash.in_(expired)).execution_options(synchronize_session=False)
+        result = cls.session.execute(stmt)
+        cls.session.commit()
+
+        return result.rowcount
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 
-from sqlalchemy import String, func
+from sqlalchemy import String, func, Index
 from sqlalchemy.ext.hybrid import hybrid_property
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -47,6 +47,18 @@ class Author(RosettaItem):
     def full_name(cls) -> str:  # noqa: N805
         """
         Get the full name of the user in a query
+
+        Built with || rather than concat(), which is not immutable and therefore
+        can not back the trigram index of the suggestions.
         :return: The full name of the user
         """
-        return func.concat(cls.name, ' ', cls.first_last_name, ' ', func.coalesce(cls.second_last_name, ''))
+        return cls.name + ' ' + cls.first_last_name + ' ' + func.coalesce(cls.second_last_name, '')
+
+
+# Trigram index of the full names, matched by the search suggestions
+Index(
+    'ix_author_full_name_trgm',
+    Author.full_name.label('full_name'),
+    postgresql_using='gin',
+    postgresql_ops={'full_name': 'gin_trgm_ops'},
+)
@@ -1,9 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Type
 
-from sqlalchemy import String, text
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, text, Index, func, select
+from sqlalchemy.orm import Mapped, mapped_column, declared_attr
 
+from db import RosettaBaseSubClass
 from src.models.rosetta_item import RosettaItem
 
 
@@ -19,3 +20,31 @@ class BaseUser(RosettaItem):
     password: Mapped[str] = mapped_column(String(120))
     login_count: Mapped[Optional[int]] = mapped_column(server_default=text('0'))
     logged_at: Mapped[Optional[datetime]]
+
+    @declared_attr.directive
+    def __table_args__(cls) -> tuple:  # noqa: N805
+        """
+        Functional unique index so that email lookups are case-insensitive and indexed
+        :return: The table arguments
+        """
+        return (Index(f'ix_{cls.__tablename__}_email_lower', func.lower(cls.email), unique=True),)
+
+    @staticmethod
+    def normalize_email(email: str) -> str:
+        """
+        Normalize an email so it can be compared against the lower(email) index
+        :param email: The email to normalize
+        :return: The normalized email
+        """
+        return email.strip().lower()
+
+    @classmethod
+    def find_by_email(cls: Type[RosettaBaseSubClass], email: str) -> RosettaBaseSubClass | None:
+        """
+        Find a user by its email, ignoring case, using the lower(email) index
+        :param email: The email of the user
+        :return: The user or None
+        """
+        qry = select(cls).where(func.lower(cls.email) == cls.normalize_email(email))
+
+        return cls.session.scalars(qry).first()
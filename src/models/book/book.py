@@ -1,6 +1,7 @@
 from typing import Optional, List, TYPE_CHECKING
 
-from sqlalchemy import String, ForeignKey, case, func, false
+from sqlalchemy import String, ForeignKey, case, func, false, ColumnElement, Index, Float
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -17,6 +18,9 @@ if TYPE_CHECKING:
     from src.models.review import Review
     from src.models.book_list import BookList
 
+# Text search configuration of the search vector, without stemming since the catalog mixes languages
+SEARCH_CONFIG = 'simple'
+
 
 class Book(RosettaItem):
     """
@@ -24,6 +28,13 @@ class Book(RosettaItem):
     """
 
     __tablename__ = 'book'
+    # Ranges of creation days are read by the KPIs, modification times by the rollup refresher
+    __table_args__ = (
+        Index('ix_book_created_at', 'created_at'),
+        Index('ix_book_modified_at', 'modified_at'),
+        Index('ix_book_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_book_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(140))
@@ -34,6 +45,8 @@ class Book(RosettaItem):
     cover: Mapped[Optional[str]] = mapped_column(String(1000))
     language: Mapped[Optional[str]] = mapped_column(String(20))
     status: Mapped[Optional[BookStatus]] = mapped_column(default=BookStatus.PENDING)
+    # Title, authors, genres and overview, weighted in that order, kept up to date by the triggers of the database
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, deferred=True)
 
     publisher_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey('publisher.id', name='fk_book_publisher_id', ondelete='CASCADE')
@@ -47,13 +60,51 @@ class Book(RosettaItem):
     book_lists: Mapped[List['BookList']] = relationship(secondary=book_list_book, back_populates='books')
     publisher: Mapped['Publisher'] = relationship('Publisher', back_populates='books', foreign_keys=publisher_id)
 
+    @classmethod
+    def pending_first_order(cls) -> ColumnElement:
+        """
+        Ordering expression that puts the pending books first
+        :return: The ordering expression
+        """
+        return case({cls.status == BookStatus.PENDING: 0}, else_=1)
+
+    @classmethod
+    def search_query(cls, text: str) -> ColumnElement:
+        """
+        Parse a search made by a user, with quoted phrases, OR and - supported as in web search engines
+        :param text: The search
+        :return: The text search query
+        """
+        return func.websearch_to_tsquery(SEARCH_CONFIG, text)
+
+    @classmethod
+    def search_filter(cls, query: ColumnElement) -> ColumnElement:
+        """
+        Condition matching the books found by a text search query, using the GIN index of the search vector
+        :param query: The text search query
+        :return: The condition
+        """
+        return cls.search_vector.bool_op('@@')(query)
+
+    @classmethod
+    def search_rank(cls, query: ColumnElement) -> ColumnElement:
+        """
+        Relevance of the books found by a text search query, higher when the terms are close to each other
+
+        The rank is a real, cast to double precision so that it survives the
+        round trip through the pagination cursors exactly.
+        :param query: The text search query
+        :return: The ranking expression
+        """
+        return func.ts_rank_cd(cls.search_vector, query).cast(Float)
+
     @classmethod
     def list_first_pending(cls) -> list['Book']:
         """
         Get all the books but first the pending ones
         :return: All the books but first the pending ones
         """
-        qry = cls.session.query(cls).order_by(case({cls.status == BookStatus.PENDING: 0}, else_=1))
+        qry = cls.session.query(cls).order_by(cls.pending_first_order())
 
         return cls.session.scalars(qry).all()
 
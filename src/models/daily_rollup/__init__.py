@@ -0,0 +1,6 @@
+from .daily_rollup import DailyRollup
+from .daily_rollup_schema import RollupMetric, TrendPointSchema
+from .rollup_stale_day import RollupStaleDay
+from .rollup_state import RollupState
+
+__all__ = ['DailyRollup', 'RollupMetric', 'RollupStaleDay', 'RollupState', 'TrendPointSchema']
@@ -0,0 +1,147 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Sequence
+
+from sqlalchemy import ColumnElement, Select, String, and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db import BaseSQL, AsyncSessionLocal
+from .daily_rollup_schema import RollupMetric
+
+
+class DailyRollup(BaseSQL):
+    """
+    Daily rollup model
+
+    One row per metric, day and dimension (the user role, the book status, or
+    '' for the metrics without one) holding the number of items created that
+    day which are not disabled, and the sum of their value for the metrics
+    which have one (the ratings of the reviews). The primary key starts with the metric and the day, so a
+    trend over any number of days is a single range scan.
+    """
+
+    __tablename__ = 'daily_rollup'
+
+    metric: Mapped[str] = mapped_column(String(20), primary_key=True)
+    day: Mapped[date] = mapped_column(primary_key=True)
+    dimension: Mapped[str] = mapped_column(String(20), primary_key=True)
+    item_count: Mapped[int]
+    value_sum: Mapped[Optional[float]]
+    refreshed_at: Mapped[Optional[datetime]] = mapped_column(server_default=func.now())
+
+    @classmethod
+    def replace(cls, metric: RollupMetric, start: date, end: date, rows: List[dict]) -> None:
+        """
+        Replace the rollups of a metric for a range of days, without committing
+        :param metric: The metric
+        :param start: The first day replaced
+        :param end: The day after the last one replaced
+        :param rows: The new rollups, with their day, dimension, item_count and value_sum
+        """
+        cls.session.execute(delete(cls).where(cls.metric == metric.value, cls.day >= start, cls.day < end))
+        if rows:
+            cls.session.execute(insert(cls), [{'metric': metric.value, **row} for row in rows])
+
+    @classmethod
+    def _condition(cls, metric: RollupMetric, dimensions: List[str] = None) -> ColumnElement:
+        """
+        Get the condition matching the rollups of a metric and, optionally, of some of its dimensions
+        """
+        if dimensions is None:
+            return cls.metric == metric.value
+
+        return and_(cls.metric == metric.value, cls.dimension.in_(dimensions))
+
+    @classmethod
+    def window_totals_statement(cls, series: List[tuple[RollupMetric, List[str]]], bounds: List[date]) -> Select:
+        """
+        Build the statement summing the items of consecutive windows of days, for several series at once
+        :param series: The metrics and the dimensions summed for each of them, or None for all of them
+        :param bounds: The bounds of the windows, newest first, each window ending the day before its bound
+        :return: The select statement, with one total per series and window, the newest window of each series first
+        """
+        totals = [
+            func.coalesce(
+                func.sum(cls.item_count).filter(
+                    cls._condition(metric, dimensions), cls.day >= bounds[i + 1], cls.day < bounds[i]
+                ),
+                0,
+            )
+            for metric, dimensions in series
+            for i in range(len(bounds) - 1)
+        ]
+
+        return select(*totals).where(
+            or_(*(cls._condition(metric, dimensions) for metric, dimensions in series)),
+            cls.day >= bounds[-1],
+            cls.day < bounds[0],
+        )
+
+    @classmethod
+    def _split_totals(cls, totals: Sequence, bounds: List[date]) -> list[list[int]]:
+        """
+        Split the row of a window totals statement into the totals of each series
+        """
+        periods = len(bounds) - 1
+        return [[int(total) for total in totals[i : i + periods]] for i in range(0, len(totals), periods)]
+
+    @classmethod
+    def window_totals(cls, series: List[tuple[RollupMetric, List[str]]], bounds: List[date]) -> list[list[int]]:
+        """
+        Sum the items of consecutive windows of days, for several series at once
+        :param series: The metrics and the dimensions summed for each of them, or None for all of them
+        :param bounds: The bounds of the windows, newest first, each window ending the day before its bound
+        :return: The totals of each window of each series, the newest window first
+        """
+        return cls._split_totals(cls.session.execute(cls.window_totals_statement(series, bounds)).one(), bounds)
+
+    @classmethod
+    async def window_totals_async(
+        cls, series: List[tuple[RollupMetric, List[str]]], bounds: List[date]
+    ) -> list[list[int]]:
+        """
+        Sum the items of consecutive windows of days, for several series at once, without blocking the event loop
+        :param series: The metrics and the dimensions summed for each of them, or None for all of them
+        :param bounds: The bounds of the windows, newest first, each window ending the day before its bound
+        :return: The totals of each window of each series, the newest window first
+        """
+        result = await AsyncSessionLocal.execute(cls.window_totals_statement(series, bounds))
+        return cls._split_totals(result.one(), bounds)
+
+    @classmethod
+    def trend_statement(cls, metric: RollupMetric, dimensions: List[str], start: date, end: date) -> Select:
+        """
+        Build the statement reading the daily totals of a range of days
+        :param metric: The metric
+        :param dimensions: The dimensions summed, or None for all of them
+        :param start: The first day
+        :param end: The day after the last one
+        :return: The select statement, with the day, the item count and the value sum of the days with items
+        """
+        return (
+            select(cls.day, func.sum(cls.item_count), func.sum(cls.value_sum))
+            .where(cls._condition(metric, dimensions), cls.day >= start, cls.day < end)
+            .group_by(cls.day)
+            .order_by(cls.day)
+        )
+
+    @classmethod
+    def trend(cls, metric: RollupMetric, dimensions: List[str], start: date, end: date) -> list[dict[str, any]]:
+        """
+        Get the daily totals of a range of days, the days without items included
+        :param metric: The metric
+        :param dimensions: The dimensions summed, or None for all of them
+        :param start: The first day
+        :param end: The day after the last one
+        :return: The day, count and average value, if the metric has one, of every day of the range
+        """
+        rows = cls.session.execute(cls.trend_statement(metric, dimensions, start, end))
+        totals = {day: (count, value) for day, count, value in rows}
+
+        trend = []
+        for offset in range((end - start).days):
+            day = start + timedelta(days=offset)
+            count, value = totals.get(day, (0, None))
+            average = value / count if count and value is not None else None
+            trend.append({'day': day, 'count': int(count), 'average': average})
+
+        return trend
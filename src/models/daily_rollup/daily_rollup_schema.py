@@ -0,0 +1,21 @@
+from datetime import date
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class RollupMetric(Enum):
+    USERS = 'users'
+    BOOKS = 'books'
+    REVIEWS = 'reviews'
+
+
+class TrendPointSchema(BaseModel):
+    """
+    Daily point of a trend
+    """
+
+    day: date
+    count: int
+    average: Optional[float]
@@ -0,0 +1,57 @@
+from datetime import date
+
+from sqlalchemy import Connection, Date, String, delete, func, insert, inspect, literal, select
+from sqlalchemy.orm import Mapped, Mapper, mapped_column
+
+from db import BaseSQL
+from .daily_rollup_schema import RollupMetric
+
+
+class RollupStaleDay(BaseSQL):
+    """
+    Rollup stale day model
+
+    A day whose rollups must be recomputed because items created on it were
+    deleted. The row is written by the transaction deleting the items, so the
+    deletion is not lost if the process stops before the next refresh.
+    """
+
+    __tablename__ = 'rollup_stale_day'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    metric: Mapped[str] = mapped_column(String(20))
+    day: Mapped[date]
+
+    @classmethod
+    def record(cls, connection: Connection, mapper: Mapper, metric: RollupMetric, item: any) -> None:
+        """
+        Record the creation day of an item about to be deleted, in the transaction deleting it
+        :param connection: The connection of the flush deleting the item
+        :param mapper: The mapper of the item
+        :param metric: The metric counting the item
+        :param item: The item
+        """
+        model = mapper.class_
+        day = select(literal(metric.value), func.date(model.created_at, type_=Date)).where(
+            mapper.primary_key[0] == inspect(item).identity[0], model.created_at.is_not(None)
+        )
+        connection.execute(insert(cls).from_select(['metric', 'day'], day))
+
+    @classmethod
+    def pending(cls) -> tuple[list[int], set[tuple[RollupMetric, date]]]:
+        """
+        Get the days recorded as stale
+        :return: The ids of the rows read, and their metrics and days
+        """
+        rows = cls.session.execute(select(cls.id, cls.metric, cls.day)).all()
+
+        return [row.id for row in rows], {(RollupMetric(row.metric), row.day) for row in rows}
+
+    @classmethod
+    def clear(cls, ids: list[int]) -> None:
+        """
+        Delete the stale days recomputed, without committing, keeping the ones recorded since they were read
+        :param ids: The ids of the rows recomputed
+        """
+        if ids:
+            cls.session.execute(delete(cls).where(cls.id.in_(ids)))
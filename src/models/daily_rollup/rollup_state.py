@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db import BaseSQL
+
+# Primary key of the single row of the table
+ROLLUP_STATE_ID = 1
+
+
+class RollupState(BaseSQL):
+    """
+    Rollup state model
+
+    A single row holding the time the last refresh of the rollups started. It
+    is written by every refresh, even the ones recomputing no day, so the
+    watermark keeps moving when nothing is written.
+    """
+
+    __tablename__ = 'rollup_state'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    refreshed_at: Mapped[Optional[datetime]]
+
+    @classmethod
+    def watermark(cls) -> datetime | None:
+        """
+        Get the time of the last refresh
+        :return: The time the last refresh started, or None if the rollups were never computed
+        """
+        return cls.session.scalar(select(cls.refreshed_at).where(cls.id == ROLLUP_STATE_ID))
+
+    @classmethod
+    def advance(cls) -> None:
+        """
+        Set the time of the last refresh to the start of the current transaction, without committing
+        """
+        stmt = update(cls).where(cls.id == ROLLUP_STATE_ID).values(refreshed_at=func.now())
+        if cls.session.execute(stmt).rowcount == 0:
+            cls.session.execute(insert(cls).values(id=ROLLUP_STATE_ID, refreshed_at=func.now()))
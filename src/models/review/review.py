@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Index
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -17,6 +17,8 @@ class Review(RosettaItem):
     """
 
     __tablename__ = 'review'
+    # Ranges of creation days are read by the KPIs, modification times by the rollup refresher
+    __table_args__ = (Index('ix_review_created_at', 'created_at'), Index('ix_review_modified_at', 'modified_at'))
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(140))
@@ -1,3 +1,4 @@
 from .rosetta_item import RosettaItem, RosettaBase
+from .pagination import Page, InvalidCursorError
 
-__all__ = ['RosettaItem', 'RosettaBase']
+__all__ = ['RosettaItem', 'RosettaBase', 'Page', 'InvalidCursorError']
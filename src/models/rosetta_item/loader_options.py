@@ -0,0 +1,126 @@
+from functools import lru_cache
+from typing import Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+from sqlalchemy import inspect, Column
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import selectinload, joinedload, load_only, InstrumentedAttribute
+from sqlalchemy.orm.strategy_options import _AbstractLoad
+from sqlalchemy.sql import visitors
+
+"""
+### loader_options.py ###
+
+Derive the loading options of a query from the pydantic schema its result is serialized with:
+the relationships to load eagerly and, optionally, the only columns to load.
+"""
+
+
+def nested_schema(annotation: any) -> Type[BaseModel] | None:
+    """
+    Get the pydantic model inside a field annotation such as Optional[list[Schema]]
+    :param annotation: The annotation of the field
+    :return: The nested pydantic model or None
+    """
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+
+    if get_origin(annotation) in (Union, list, tuple, set) or get_args(annotation):
+        for argument in get_args(annotation):
+            schema = nested_schema(argument)
+            if schema is not None:
+                return schema
+
+    return None
+
+
+def projected_columns(model: type, schema: Type[BaseModel]) -> list[InstrumentedAttribute] | None:
+    """
+    Get the column attributes of a model needed to serialize it with a schema
+
+    Besides the columns the schema declares, the primary key, the foreign keys
+    of the serialized relationships and the columns hybrid properties are built
+    from are kept.
+    :param model: The model being loaded
+    :param schema: The schema the model is serialized with
+    :return: The column attributes, or None if the schema needs attributes which can not be resolved to columns
+    """
+    mapper = inspect(model)
+    columns = list(mapper.primary_key)
+
+    for name in schema.model_fields:
+        if name in mapper.column_attrs:
+            columns.extend(mapper.column_attrs[name].columns)
+        elif name in mapper.relationships:
+            columns.extend(mapper.relationships[name].local_columns)
+        elif isinstance(mapper.all_orm_descriptors.get(name), hybrid_property):
+            columns.extend(column for column in visitors.iterate(getattr(model, name)) if isinstance(column, Column))
+        else:
+            return None
+
+    attributes = {}
+    for column in columns:
+        prop = mapper.get_property_by_column(column) if column.table is mapper.local_table else None
+        if prop is None:
+            return None
+        attributes[prop.key] = getattr(model, prop.key)
+
+    return list(attributes.values())
+
+
+def _relationship_loaders(
+    model: type, schema: Type[BaseModel], parent: _AbstractLoad | None, project: bool
+) -> list[_AbstractLoad]:
+    """
+    Build the loaders of the relationships of a model that a schema serializes
+    :param model: The model being loaded
+    :param schema: The schema the model is serialized with
+    :param parent: The loader of the relationship that leads to the model, if any
+    :param project: Whether the related models only load the columns their schema needs
+    :return: The loaders
+    """
+    loaders = []
+    relationships = inspect(model).relationships
+
+    for name, field in schema.model_fields.items():
+        relationship = relationships.get(name)
+        if relationship is None:
+            continue
+
+        attribute = getattr(model, name)
+        # Collections are loaded with one extra SELECT ... IN per relationship, single objects with a JOIN
+        if relationship.uselist:
+            loader = parent.selectinload(attribute) if parent else selectinload(attribute)
+        else:
+            loader = parent.joinedload(attribute) if parent else joinedload(attribute)
+
+        child_schema = nested_schema(field.annotation)
+        if child_schema is not None and project:
+            columns = projected_columns(relationship.mapper.class_, child_schema)
+            if columns is not None:
+                loader = loader.load_only(*columns)
+        loaders.append(loader)
+
+        if child_schema is not None:
+            loaders.extend(_relationship_loaders(relationship.mapper.class_, child_schema, loader, project))
+
+    return loaders
+
+
+@lru_cache(maxsize=None)
+def schema_loader_options(model: type, schema: Type[BaseModel], project: bool = False) -> tuple[_AbstractLoad, ...]:
+    """
+    Get the options that eagerly load every relationship a schema serializes
+    :param model: The model being queried
+    :param schema: The response schema
+    :param project: Whether to only load the columns the schema needs, on the model and on the related models
+    :return: The loader options
+    """
+    options = _relationship_loaders(model, schema, None, project)
+
+    if project:
+        columns = projected_columns(model, schema)
+        if columns is not None:
+            options.append(load_only(*columns))
+
+    return tuple(options)
@@ -0,0 +1,110 @@
+import base64
+import binascii
+import json
+from datetime import datetime, date
+from enum import Enum
+from typing import NamedTuple, Sequence
+
+from sqlalchemy import and_, or_, ColumnElement
+
+"""
+### pagination.py ###
+
+Helpers for the keyset pagination of RosettaBase: page container, opaque cursors and seek conditions.
+"""
+
+
+class InvalidCursorError(ValueError):
+    """
+    Raised when a cursor cannot be decoded
+    """
+
+
+class Page(NamedTuple):
+    """
+    A page of items with the cursors of the pages around it
+    """
+
+    items: list
+    next_cursor: str | None
+    prev_cursor: str | None
+
+
+def _encode_value(value: any) -> any:
+    """
+    Convert an ordering value to something JSON can represent
+    :param value: The value of an ordering column
+    :return: The JSON friendly value
+    """
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+def _decode_value(value: any) -> any:
+    """
+    Convert a value encoded by _encode_value back to its python type
+    :param value: The JSON value
+    :return: The ordering value
+    """
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        raise InvalidCursorError('Unknown cursor value')
+    return value
+
+
+def encode_cursor(direction: str, values: Sequence) -> str:
+    """
+    Build an opaque cursor
+    :param direction: 'next' or 'prev'
+    :param values: The ordering values of the boundary row
+    :return: The cursor
+    """
+    payload = json.dumps({'d': direction, 'v': [_encode_value(value) for value in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[str, list]:
+    """
+    Read an opaque cursor
+    :param cursor: The cursor
+    :param size: The number of ordering values expected
+    :return: The direction and the ordering values of the cursor
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        direction, values = payload['d'], [_decode_value(value) for value in payload['v']]
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+
+    if direction not in ('next', 'prev') or len(values) != size:
+        raise InvalidCursorError('Invalid cursor')
+
+    return direction, values
+
+
+def seek_condition(keys: Sequence[tuple[ColumnElement, bool]], values: Sequence, backwards: bool) -> ColumnElement:
+    """
+    Build the condition selecting the rows after (or before) a boundary row
+
+    Each key may have its own direction, so the condition is expanded as
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+    :param keys: The ordering expressions and whether they are ascending
+    :param values: The ordering values of the boundary row
+    :param backwards: Whether the rows before the boundary are wanted
+    :return: The condition
+    """
+    conditions = []
+    for index, (expression, ascending) in enumerate(keys):
+        after = expression > values[index] if ascending != backwards else expression < values[index]
+        equal = [keys[previous][0] == values[previous] for previous in range(index)]
+        conditions.append(and_(*equal, after))
+
+    return or_(*conditions)
@@ -1,15 +1,26 @@
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, TYPE_CHECKING, Type, List
+from typing import Awaitable, Callable, Iterator, Optional, TYPE_CHECKING, Type, List
 
-from sqlalchemy import func, false, select, ForeignKey, column
+from pydantic import BaseModel
+from sqlalchemy import func, false, select, insert, update, ForeignKey, ColumnElement, inspect
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Mapped, mapped_column
-from db import BaseSQL, SessionLocal, RosettaBaseSubClass
+from db import BaseSQL, SessionLocal, AsyncSessionLocal, RosettaBaseSubClass, primary_reads
+from src.utils.cache.query_cache import query_cache, record_write, statement_key
+from .loader_options import schema_loader_options
+from .pagination import Page, encode_cursor, decode_cursor, seek_condition
+from .row_loader import row_columns, load_related_rows
+from .snapshot import restore_snapshots, take_snapshots
 
 
 if TYPE_CHECKING:
+    from sqlalchemy import Select
     from sqlalchemy.orm import Query
 
+# Key of the session info holding how many transaction() blocks are open
+TRANSACTION_DEPTH = 'transaction_depth'
+
 
 class RosettaBase:
     """
@@ -17,50 +28,400 @@ class RosettaBase:
 
     Every (or almost every) model in the project should inherit from this class
     since it makes it easier to interact with the database.
+
+    Every CRUD method has an `_async` variant running on the async engine, so
+    routers can be moved to the non-blocking path one at a time.
+
+    The read methods accept the pydantic `schema` the result will be serialized
+    with: every relationship it declares is then eagerly loaded, so the number
+    of queries does not depend on the number of rows.
     """
 
     query: 'Query'
     session = SessionLocal
+    async_session = AsyncSessionLocal
 
     @classmethod
-    def find(cls: Type[RosettaBaseSubClass], item_id: any) -> RosettaBaseSubClass | None:
+    def find(
+        cls: Type[RosettaBaseSubClass],
+        item_id: any,
+        schema: Type[BaseModel] = None,
+        project: bool = False,
+        cache: bool = False,
+    ) -> RosettaBaseSubClass | None:
         """
         Find an item by its primary key
         :param item_id:
+        :param schema: The response schema whose relationships are eagerly loaded
+        :param project: Whether to only load the columns the schema needs
+        :param cache: Whether to serve the item from the query cache
         :return: an instance of the model or None
         """
-        return cls.session.get(cls, item_id)
+        if cache:
+            qry = select(cls).where(cls._primary_key() == item_id).options(*cls._loader_options(schema, project))
+            items, _ = cls._cached(qry, lambda: (cls.session.scalars(qry).all(), None))
+            return items[0] if items else None
+
+        return cls.session.get(cls, item_id, options=cls._loader_options(schema, project))
 
     @classmethod
-    def find_by(cls: Type[RosettaBaseSubClass], filters: List = None) -> RosettaBaseSubClass | None:
+    def find_by(
+        cls: Type[RosettaBaseSubClass], filters: List = None, schema: Type[BaseModel] = None, project: bool = False
+    ) -> RosettaBaseSubClass | None:
         """
         Find an item by its attributes
         :param filters:
+        :param schema: The response schema whose relationships are eagerly loaded
+        :param project: Whether to only load the columns the schema needs
         :return: an instance of the model or None
         """
-        return cls.session.scalars(select(cls).where(*filters)).first()
+        return cls.session.scalars(select(cls).where(*filters).options(*cls._loader_options(schema, project))).first()
+
+    @classmethod
+    def find_many(
+        cls: Type[RosettaBaseSubClass], item_ids: List[any]
+    ) -> tuple[List[RosettaBaseSubClass], List[any]]:
+        """
+        Find several items by their primary keys
+
+        The items already loaded in the session are taken from its identity map
+        and the rest are fetched with a single IN query.
+        :param item_ids: The primary keys of the items
+        :return: the items found, in the order of item_ids, and the ids not found
+        """
+        found, pending = cls._identity_map_lookup(cls.session, item_ids)
+
+        if pending:
+            qry = select(cls).where(cls._primary_key().in_(pending))
+            found.update(cls._by_primary_key(cls.session.scalars(qry).all()))
+
+        return cls._in_order(found, item_ids)
 
     @classmethod
     def list(
-        cls: Type[RosettaBaseSubClass], filters: List = None, order_by: (str, bool) = None, limit: int = None
-    ) -> list[RosettaBaseSubClass]:
+        cls: Type[RosettaBaseSubClass],
+        filters: List = None,
+        order_by: (str, bool) = None,
+        limit: int = None,
+        schema: Type[BaseModel] = None,
+        project: bool = False,
+        cache: bool = False,
+        as_rows: bool = False,
+    ) -> list[RosettaBaseSubClass] | list[dict[str, any]]:
         """
         List all items in the model
+        :param schema: The response schema whose relationships are eagerly loaded
+        :param project: Whether to only load the columns the schema needs
+        :param cache: Whether to serve the items from the query cache
+        :param as_rows: Whether to return plain mappings with the fields of the schema instead of instances
         :return: a list of instances of the model
         """
-        qry = select(cls)
+        if as_rows:
+            qry = cls._list_statement(filters, order_by, limit).with_only_columns(*row_columns(cls, schema))
+            items = [dict(row) for row in cls.session.execute(qry).mappings()]
+            load_related_rows(cls.session, cls, schema, items)
+            return items
+
+        qry = cls._list_statement(filters, order_by, limit, schema, project)
+
+        if cache:
+            items, _ = cls._cached(qry, lambda: (cls.session.scalars(qry).unique().all(), None))
+            return items
+
+        return cls.session.scalars(qry).unique().all()
+
+    @classmethod
+    def paginate(
+        cls: Type[RosettaBaseSubClass],
+        limit: int,
+        cursor: str = None,
+        filters: List = None,
+        order_by: List[tuple[str | ColumnElement, bool]] = None,
+        schema: Type[BaseModel] = None,
+        project: bool = False,
+        cache: bool = False,
+        as_rows: bool = False,
+    ) -> Page:
+        """
+        List a page of items using keyset pagination
+
+        The primary key is always appended to the ordering so every row has a
+        stable position, and the page is found with a seek condition on the
+        ordering values instead of an offset, so its cost does not depend on how
+        deep the page is.
+        :param limit: The maximum number of items of the page
+        :param cursor: The cursor of the page, as returned in a previous page
+        :param filters:
+        :param order_by: A list of (column name or expression, ascending)
+        :param schema: The response schema whose relationships are eagerly loaded
+        :param project: Whether to only load the columns the schema needs
+        :param cache: Whether to serve the page from the query cache, unless as_rows is set
+        :param as_rows: Whether to return plain mappings with the fields of the schema instead of instances
+        :return: the page of items and the cursors of the next and previous pages
+        """
+        keys = [(getattr(cls, key) if isinstance(key, str) else key, ascending) for key, ascending in order_by or []]
+        keys += [(pk, True) for pk in cls.__mapper__.primary_key]
+
+        direction, values = decode_cursor(cursor, len(keys)) if cursor else ('next', None)
+        backwards = direction == 'prev'
+
+        entities = row_columns(cls, schema) if as_rows else (cls,)
+        qry = select(*entities, *[expression.label(f'_key_{index}') for index, (expression, _) in enumerate(keys)])
+        if not as_rows:
+            qry = qry.options(*cls._loader_options(schema, project))
+
+        if filters:
+            qry = qry.where(*filters)
+
+        if values is not None:
+            qry = qry.where(seek_condition(keys, values, backwards))
+
+        qry = qry.order_by(
+            *[expression.asc() if ascending != backwards else expression.desc() for expression, ascending in keys]
+        ).limit(limit + 1)
+
+        def fetch() -> tuple[list, tuple[str | None, str | None]]:
+            rows = cls.session.execute(qry).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            if backwards:
+                rows.reverse()
+
+            if not rows:
+                return [], (None, None)
+
+            has_next = has_more if not backwards else True
+            has_prev = has_more if backwards else values is not None
+
+            size = len(entities)
+            if as_rows:
+                items = [dict(zip(row._fields[:size], row[:size], strict=True)) for row in rows]
+                load_related_rows(cls.session, cls, schema, items)
+            else:
+                items = [row[0] for row in rows]
+
+            return items, (
+                encode_cursor('next', rows[-1][size:]) if has_next else None,
+                encode_cursor('prev', rows[0][size:]) if has_prev else None,
+            )
+
+        items, cursors = cls._cached(qry, fetch) if cache and not as_rows else fetch()
+
+        return Page(items, *cursors)
+
+    @classmethod
+    def stream_rows(
+        cls: Type[RosettaBaseSubClass],
+        schema: Type[BaseModel],
+        filters: List = None,
+        order_by: List[tuple[str | ColumnElement, bool]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[List[dict[str, any]]]:
+        """
+        Read every item matching the filters as plain rows, batch by batch
+
+        The rows are fetched through a server-side cursor and the relationships
+        of the schema are resolved per batch, so memory use is bounded by the
+        batch size instead of the number of rows.
+        :param schema: The schema the rows are serialized with
+        :param filters:
+        :param order_by: A list of (column name or expression, ascending)
+        :param batch_size: The number of rows fetched at once
+        :return: an iterator over the batches of rows
+        """
+        keys = [(getattr(cls, key) if isinstance(key, str) else key, ascending) for key, ascending in order_by or []]
+        keys += [(pk, True) for pk in cls.__mapper__.primary_key]
+
+        qry = select(*row_columns(cls, schema)).order_by(
+            *[expression.asc() if ascending else expression.desc() for expression, ascending in keys]
+        )
+        if filters:
+            qry = qry.where(*filters)
+
+        result = cls.session.execute(qry.execution_options(yield_per=batch_size))
+        try:
+            for partition in result.mappings().partitions():
+                rows = [dict(row) for row in partition]
+                load_related_rows(cls.session, cls, schema, rows)
+                yield rows
+        finally:
+            result.close()
+
+    @classmethod
+    def _cached(
+        cls: Type[RosettaBaseSubClass], qry: 'Select', load: Callable[[], tuple[list, any]]
+    ) -> tuple[list, any]:
+        """
+        Serve the result of a query from the query cache, loading and storing it on a miss
+
+        The loaded state of the items is cached, their eagerly loaded relationships
+        included; on a hit it is merged back into the session without querying the
+        database, so serializing the items does not lazy load anything either. The
+        entry is dropped when any model it holds is written. Misses are read from
+        the primary, so rows still missing from a lagging replica are never cached.
+        :param qry: The statement the result is cached for
+        :param load: Function running the query, returning the items and any extra value to cache with them
+        :return: the items and the extra value
+        """
+        key = statement_key(qry)
+        if key is None:
+            return load()
+
+        cached, generation = query_cache.get(cls.__name__, key)
+        if cached is not None:
+            snapshots, extra = cached
+            return [cls.session.merge(item, load=False) for item in restore_snapshots(snapshots)], extra
+
+        generations = query_cache.generations()
+        with primary_reads():
+            items, extra = load()
+        cls._store(key, items, extra, generation, generations)
+
+        return items, extra
+
+    @classmethod
+    async def _cached_async(
+        cls: Type[RosettaBaseSubClass], qry: 'Select', load: Callable[[], Awaitable[tuple[list, any]]]
+    ) -> tuple[list, any]:
+        """
+        Serve the result of a query from the query cache without blocking the event loop
+        :param qry: The statement the result is cached for
+        :param load: Coroutine function running the query, returning the items and any extra value
+        :return: the items and the extra value
+        """
+        key = statement_key(qry)
+        if key is None:
+            return await load()
+
+        cached, generation = query_cache.get(cls.__name__, key)
+        if cached is not None:
+            snapshots, extra = cached
+            return [await cls.async_session.merge(item, load=False) for item in restore_snapshots(snapshots)], extra
+
+        generations = query_cache.generations()
+        items, extra = await load()
+        cls._store(key, items, extra, generation, generations)
+
+        return items, extra
+
+    @classmethod
+    def _store(
+        cls: Type[RosettaBaseSubClass], key: str, items: list, extra: any, generation: int, generations: dict[str, int]
+    ) -> None:
+        """
+        Store the snapshots of the items read on a cache miss
+        :param key: The key of the statement
+        :param items: The items read
+        :param extra: The extra value cached with them
+        :param generation: The generation of the model, as returned by the cache lookup
+        :param generations: The generations of every model, read before the items
+        """
+        snapshots, models = take_snapshots(items)
+        related = {name: generations.get(name, 0) for name in models if name != cls.__name__}
+        query_cache.set(cls.__name__, key, (snapshots, extra), generation, related)
+
+    @classmethod
+    def _primary_key(cls: Type[RosettaBaseSubClass]) -> ColumnElement:
+        """
+        Get the primary key column of the model, which must have a single one
+        :return: the primary key column
+        """
+        return cls.__mapper__.primary_key[0]
+
+    @classmethod
+    def _by_primary_key(cls: Type[RosettaBaseSubClass], items: List[RosettaBaseSubClass]) -> dict:
+        """
+        Index items by their primary key
+        :param items:
+        :return: a dictionary from primary key to item
+        """
+        key = cls.__mapper__.get_property_by_column(cls._primary_key()).key
+        return {getattr(item, key): item for item in items}
+
+    @classmethod
+    def _identity_map_lookup(cls: Type[RosettaBaseSubClass], session: any, item_ids: List[any]) -> tuple[dict, list]:
+        """
+        Split primary keys into the items already loaded in a session and the ids
+        that have to be queried. Expired items are queried again, since reading
+        them one by one would cost a round trip each.
+        :param session: The session whose identity map is looked up
+        :param item_ids: The primary keys of the items
+        :return: the items found by primary key and the ids still pending
+        """
+        found, pending = {}, []
+        for item_id in dict.fromkeys(item_ids):
+            item = session.identity_map.get(cls.__mapper__.identity_key_from_primary_key([item_id]))
+            if item is not None and not inspect(item).expired:
+                found[item_id] = item
+            else:
+                pending.append(item_id)
+
+        return found, pending
+
+    @staticmethod
+    def _in_order(found: dict, item_ids: List[any]) -> tuple[list, list]:
+        """
+        Arrange the items found in the order of the requested ids
+        :param found: The items found by primary key
+        :param item_ids: The requested primary keys
+        :return: the items found and the ids not found
+        """
+        return (
+            [found[item_id] for item_id in item_ids if item_id in found],
+            [item_id for item_id in item_ids if item_id not in found],
+        )
+
+    @classmethod
+    def _update_where(cls: Type[RosettaBaseSubClass], filters: List, data: dict[str, any]) -> int:
+        """
+        Run a single UPDATE statement on the items matching the filters and commit it
+        :param filters:
+        :param data: The new values
+        :return: the number of updated items
+        """
+        result = cls.session.execute(update(cls).where(*filters).values(**data))
+        record_write(cls.session(), cls.__name__)
+        cls.commit()
+
+        return result.rowcount
+
+    @classmethod
+    def _loader_options(cls: Type[RosettaBaseSubClass], schema: Type[BaseModel] | None, project: bool = False) -> tuple:
+        """
+        Get the loading options for a response schema
+        :param schema: The response schema, if any
+        :param project: Whether to only load the columns the schema needs
+        :return: the loader options
+        """
+        return schema_loader_options(cls, schema, project) if schema else ()
+
+    @classmethod
+    def _list_statement(
+        cls: Type[RosettaBaseSubClass],
+        filters: List = None,
+        order_by: (str, bool) = None,
+        limit: int = None,
+        schema: Type[BaseModel] = None,
+        project: bool = False,
+    ) -> 'Select':
+        """
+        Build the select statement used to list the items of the model
+        :return: the select statement
+        """
+        qry = select(cls).options(*cls._loader_options(schema, project))
 
         if filters:
             qry = qry.where(*filters)
 
         if order_by:
-            order = column(order_by[0])
+            # The mapped attribute, since a bare column name is ambiguous once a relationship is joined eagerly
+            order = getattr(cls, order_by[0])
             qry = qry.order_by(order.asc()) if order_by[1] else qry.order_by(order.desc())
 
         if limit:
             qry = qry.limit(limit)
 
-        return cls.session.scalars(qry).unique().all()
+        return qry
 
     def update(self: RosettaBaseSubClass, data: dict[str, any] = None) -> None:
         """
@@ -88,17 +449,209 @@ class RosettaBase:
         self.session.delete(self)
         self.commit()
 
-    def commit(self: RosettaBaseSubClass) -> None:
+    @classmethod
+    def insert_many(cls: Type[RosettaBaseSubClass], rows: List[dict[str, any]]) -> List[RosettaBaseSubClass]:
+        """
+        Insert several items in the database in a single batched statement and transaction.
+        :param rows: The values of each item
+        :return: the inserted items
+        """
+        if not rows:
+            return []
+
+        items = cls.session.scalars(insert(cls).returning(cls), rows).all()
+        record_write(cls.session(), cls.__name__)
+        cls.commit()
+
+        return items
+
+    @classmethod
+    def update_many(cls: Type[RosettaBaseSubClass], rows: List[dict[str, any]]) -> None:
         """
-        Commit the changes to the database.
+        Update several items in the database in a single batched statement and transaction.
+        :param rows: The new values of each item, including its primary key
         """
+        if not rows:
+            return
+
+        cls.session.execute(update(cls), rows)
+        record_write(cls.session(), cls.__name__)
+        cls.commit()
+
+    @classmethod
+    def update_where(cls: Type[RosettaBaseSubClass], filters: List, data: dict[str, any]) -> int:
+        """
+        Update every item matching the filters with a single statement.
+        :param filters:
+        :param data: The new values
+        :return: the number of updated items
+        """
+        return cls._update_where(filters, data)
+
+    @classmethod
+    @contextmanager
+    def transaction(cls: Type[RosettaBaseSubClass]) -> Iterator[None]:
+        """
+        Run a block of work as a single transaction
+
+        Inside the block commit() does nothing, so the pending changes of every
+        insert, update and delete are flushed together and committed when the
+        outermost block exits, or rolled back if it raises. Nested blocks run in
+        a savepoint, so a failing inner block only discards its own changes.
+        """
+        session = cls.session()
+        depth = session.info.get(TRANSACTION_DEPTH, 0)
+        session.info[TRANSACTION_DEPTH] = depth + 1
+
         try:
-            self.session.commit()
+            if depth:
+                with session.begin_nested():
+                    yield
+            else:
+                yield
+                session.commit()
+        except BaseException:
+            if not depth:
+                session.rollback()
+            raise
+        finally:
+            session.info[TRANSACTION_DEPTH] = depth
+
+    @classmethod
+    def commit(cls: Type[RosettaBaseSubClass]) -> None:
+        """
+        Commit the changes to the database, unless running inside a transaction() block.
+        """
+        if cls.session.info.get(TRANSACTION_DEPTH):
+            return
+
+        try:
+            cls.session.commit()
         except IntegrityError as e:
-            self.session.rollback()
+            cls.session.rollback()
             raise e
         except SQLAlchemyError as e:
-            self.session.rollback()
+            cls.session.rollback()
+            raise e
+
+    @classmethod
+    async def find_async(
+        cls: Type[RosettaBaseSubClass],
+        item_id: any,
+        schema: Type[BaseModel] = None,
+        project: bool = False,
+        cache: bool = False,
+    ) -> RosettaBaseSubClass | None:
+        """
+        Find an item by its primary key without blocking the event loop
+        :param item_id:
+        :param schema: The response schema whose relationships are eagerly loaded
+        :param project: Whether to only load the columns the schema needs
+        :param cache: Whether to serve the item from the query cache
+        :return: an instance of the model or None
+        """
+        if cache:
+            qry = select(cls).where(cls._primary_key() == item_id).options(*cls._loader_options(schema, project))
+
+            async def load() -> tuple[list, None]:
+                return (await cls.async_session.scalars(qry)).all(), None
+
+            items, _ = await cls._cached_async(qry, load)
+            return items[0] if items else None
+
+        return await cls.async_session.get(cls, item_id, options=cls._loader_options(schema, project))
+
+    @classmethod
+    async def find_by_async(
+        cls: Type[RosettaBaseSubClass], filters: List = None, schema: Type[BaseModel] = None, project: bool = False
+    ) -> RosettaBaseSubClass | None:
+        """
+        Find an item by its attributes without blocking the event loop
+        :param filters:
+        :param schema: The response schema whose relationships are eagerly loaded
+        :param project: Whether to only load the columns the schema needs
+        :return: an instance of the model or None
+        """
+        qry = select(cls).where(*filters).options(*cls._loader_options(schema, project))
+        return (await cls.async_session.scalars(qry)).first()
+
+    @classmethod
+    async def find_many_async(
+        cls: Type[RosettaBaseSubClass], item_ids: List[any]
+    ) -> tuple[List[RosettaBaseSubClass], List[any]]:
+        """
+        Find several items by their primary keys without blocking the event loop
+        :param item_ids: The primary keys of the items
+        :return: the items found, in the order of item_ids, and the ids not found
+        """
+        found, pending = cls._identity_map_lookup(cls.async_session, item_ids)
+
+        if pending:
+            qry = select(cls).where(cls._primary_key().in_(pending))
+            found.update(cls._by_primary_key((await cls.async_session.scalars(qry)).all()))
+
+        return cls._in_order(found, item_ids)
+
+    @classmethod
+    async def list_async(
+        cls: Type[RosettaBaseSubClass],
+        filters: List = None,
+        order_by: (str, bool) = None,
+        limit: int = None,
+        schema: Type[BaseModel] = None,
+        project: bool = False,
+        cache: bool = False,
+    ) -> List[RosettaBaseSubClass]:
+        """
+        List all items in the model without blocking the event loop
+        :param schema: The response schema whose relationships are eagerly loaded
+        :param project: Whether to only load the columns the schema needs
+        :param cache: Whether to serve the items from the query cache
+        :return: a list of instances of the model
+        """
+        qry = cls._list_statement(filters, order_by, limit, schema, project)
+
+        async def load() -> tuple[list, None]:
+            return (await cls.async_session.scalars(qry)).unique().all(), None
+
+        items, _ = await cls._cached_async(qry, load) if cache else await load()
+
+        return items
+
+    async def update_async(self: RosettaBaseSubClass, data: dict[str, any] = None) -> None:
+        """
+        Update the item in the database without blocking the event loop.
+        """
+        if data:
+            for key, value in data.items():
+                if hasattr(self, key):
+                    setattr(self, key, value)
+        await self.commit_async()
+
+    async def insert_async(self: RosettaBaseSubClass) -> RosettaBaseSubClass:
+        """
+        Insert the item in the database without blocking the event loop.
+        """
+        self.async_session.add(self)
+        await self.commit_async()
+
+        return self
+
+    async def delete_async(self: RosettaBaseSubClass) -> None:
+        """
+        Delete the item from the database without blocking the event loop.
+        """
+        await self.async_session.delete(self)
+        await self.commit_async()
+
+    async def commit_async(self: RosettaBaseSubClass) -> None:
+        """
+        Commit the changes of the async session to the database.
+        """
+        try:
+            await self.async_session.commit()
+        except SQLAlchemyError as e:
+            await self.async_session.rollback()
             raise e
 
     def to_dict(self: RosettaBaseSubClass) -> dict[str, any]:
@@ -142,6 +695,79 @@ class RosettaItem(BaseSQL, RosettaBase):
 
         return super().insert()
 
+    async def update_async(self, data: dict[str, any] = None, *args) -> None:
+        """
+        Update the item in the database without blocking the event loop.
+        """
+        self.modified_by = args[0]
+
+        await super().update_async(data)
+
+    async def insert_async(self, *args) -> RosettaBaseSubClass:
+        """
+        Insert the item in the database without blocking the event loop.
+        """
+        self.created_by = args[0]
+
+        return await super().insert_async()
+
+    @classmethod
+    def insert_many(cls, rows: List[dict[str, any]], *args) -> List[RosettaBaseSubClass]:
+        """
+        Insert several items in the database in a single batched statement and transaction.
+        """
+        return super().insert_many([{**row, 'created_by': args[0]} for row in rows])
+
+    @classmethod
+    def update_many(cls, rows: List[dict[str, any]], *args) -> None:
+        """
+        Update several items in the database in a single batched statement and transaction.
+        """
+        super().update_many([{**row, 'modified_by': args[0]} for row in rows])
+
+    @classmethod
+    def update_where(cls, filters: List, data: dict[str, any], *args) -> int:
+        """
+        Update every item matching the filters with a single statement.
+        """
+        return cls._update_where(filters, {**data, 'modified_by': args[0]})
+
+    @classmethod
+    def enable_many(cls, item_ids: List[any], *args) -> int:
+        """
+        Enable several items in the database with a single statement.
+        :param item_ids: The primary keys of the items
+        :param args:
+        :return: the number of enabled items
+        """
+        return cls._update_where(
+            [cls._primary_key().in_(item_ids)],
+            {
+                'disabled': False,
+                'disabled_by': None,
+                'disabled_at': None,
+                'modified_by': args[0],
+            },
+        )
+
+    @classmethod
+    def disable_many(cls, item_ids: List[any], *args) -> int:
+        """
+        Disable several items in the database with a single statement.
+        :param item_ids: The primary keys of the items
+        :param args:
+        :return: the number of disabled items
+        """
+        return cls._update_where(
+            [cls._primary_key().in_(item_ids)],
+            {
+                'disabled': True,
+                'disabled_by': args[0],
+                'disabled_at': datetime.now(),
+                'modified_by': args[0],
+            },
+        )
+
     def enable(self) -> None:
         """
         Enable the item in the database.
@@ -0,0 +1,98 @@
+from collections import defaultdict
+from functools import lru_cache
+from typing import Type
+
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session
+
+from .loader_options import nested_schema
+
+"""
+### row_loader.py ###
+
+Read the rows a pydantic schema serializes as plain mappings, without building ORM instances.
+"""
+
+# Label of the column linking a related row to its parent row
+PARENT_KEY = '_parent_key'
+
+
+@lru_cache(maxsize=None)
+def row_columns(model: type, schema: Type[BaseModel]) -> tuple:
+    """
+    Get the columns to select for a schema, labelled with the name of their attribute
+
+    Besides the fields of the schema which are columns or hybrid properties,
+    the primary key and the local columns of the serialized relationships are
+    selected, since the related rows are matched through them.
+    :param model: The model being read
+    :param schema: The schema the rows are serialized with
+    :return: The labelled columns
+    """
+    mapper = inspect(model)
+    columns = {prop.key: getattr(model, prop.key) for prop in map(mapper.get_property_by_column, mapper.primary_key)}
+
+    for name in schema.model_fields:
+        if name in mapper.column_attrs:
+            columns[name] = getattr(model, name)
+        elif name in mapper.relationships:
+            for column in mapper.relationships[name].local_columns:
+                prop = mapper.get_property_by_column(column)
+                columns[prop.key] = getattr(model, prop.key)
+        elif isinstance(mapper.all_orm_descriptors.get(name), hybrid_property):
+            columns[name] = getattr(model, name)
+        else:
+            raise ValueError(f'{schema.__name__}.{name} is not a column of {model.__name__}')
+
+    return tuple(column.label(name) for name, column in columns.items())
+
+
+def load_related_rows(session: Session, model: type, schema: Type[BaseModel], rows: list[dict]) -> None:
+    """
+    Add the related rows of every relationship the schema serializes to the rows
+
+    Each relationship costs one query for all the rows, whatever their number.
+    :param session: The session running the queries
+    :param model: The model of the rows
+    :param schema: The schema the rows are serialized with
+    :param rows: The rows, modified in place
+    """
+    if not rows:
+        return
+
+    mapper = inspect(model)
+
+    for name, field in schema.model_fields.items():
+        relationship = mapper.relationships.get(name)
+        if relationship is None:
+            continue
+
+        child = relationship.mapper.class_
+        child_schema = nested_schema(field.annotation)
+        if child_schema is None:
+            raise ValueError(f'{schema.__name__}.{name} is not serialized with a pydantic model')
+
+        if relationship.secondary is not None:
+            local, remote = relationship.synchronize_pairs[0]
+            qry = select(*row_columns(child, child_schema), remote.label(PARENT_KEY)).join(
+                relationship.secondary, relationship.secondaryjoin
+            )
+        else:
+            local, remote = relationship.local_remote_pairs[0]
+            qry = select(*row_columns(child, child_schema), remote.label(PARENT_KEY))
+
+        local_key = mapper.get_property_by_column(local).key
+        keys = {row[local_key] for row in rows if row[local_key] is not None}
+
+        related = defaultdict(list)
+        if keys:
+            children = [dict(child_row) for child_row in session.execute(qry.where(remote.in_(keys))).mappings()]
+            load_related_rows(session, child, child_schema, children)
+            for child_row in children:
+                related[child_row.pop(PARENT_KEY)].append(child_row)
+
+        for row in rows:
+            matches = related.get(row[local_key], [])
+            row[name] = matches if relationship.uselist else next(iter(matches), None)
@@ -0,0 +1,103 @@
+from typing import NamedTuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Mapper, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+"""
+### snapshot.py ###
+
+Copy the loaded state of items, their eagerly loaded relationships included, so the query cache can rebuild them
+without any query, lazy loads included.
+"""
+
+
+class ItemSnapshot(NamedTuple):
+    """
+    The loaded column values and relationships of an item
+    """
+
+    mapper: Mapper
+    columns: dict[str, any]
+    relationships: dict[str, 'ItemSnapshot | list[ItemSnapshot] | None']
+
+
+def _snapshot(item: any, memo: dict[int, ItemSnapshot]) -> ItemSnapshot:
+    """
+    Copy an item and the items of its loaded relationships
+    :param item:
+    :param memo: The snapshots already taken by id of their item, so shared and cyclic references are kept
+    :return: the snapshot of the item
+    """
+    if id(item) in memo:
+        return memo[id(item)]
+
+    state = inspect(item)
+    loaded = state.dict
+    snapshot = ItemSnapshot(
+        state.mapper,
+        {attr.key: loaded[attr.key] for attr in state.mapper.column_attrs if attr.key in loaded},
+        {},
+    )
+    memo[id(item)] = snapshot
+
+    for relationship in state.mapper.relationships:
+        if relationship.key not in loaded:
+            continue
+        value = loaded[relationship.key]
+        if value is None:
+            snapshot.relationships[relationship.key] = None
+        elif relationship.uselist:
+            snapshot.relationships[relationship.key] = [_snapshot(related, memo) for related in value]
+        else:
+            snapshot.relationships[relationship.key] = _snapshot(value, memo)
+
+    return snapshot
+
+
+def take_snapshots(items: list) -> tuple[list[ItemSnapshot], set[str]]:
+    """
+    Copy the loaded state of several items
+    :param items:
+    :return: the snapshots of the items and the names of every model they hold
+    """
+    memo = {}
+    snapshots = [_snapshot(item, memo) for item in items]
+
+    return snapshots, {snapshot.mapper.class_.__name__ for snapshot in memo.values()}
+
+
+def _restore(snapshot: ItemSnapshot, memo: dict[int, any]) -> any:
+    """
+    Build a detached item and its loaded relationships from a snapshot
+    :param snapshot:
+    :param memo: The items already built by id of their snapshot
+    :return: the detached item
+    """
+    if id(snapshot) in memo:
+        return memo[id(snapshot)]
+
+    item = snapshot.mapper.class_manager.new_instance()
+    memo[id(snapshot)] = item
+    for key, value in snapshot.columns.items():
+        set_committed_value(item, key, value)
+
+    for key, value in snapshot.relationships.items():
+        if isinstance(value, list):
+            set_committed_value(item, key, [_restore(related, memo) for related in value])
+        else:
+            set_committed_value(item, key, None if value is None else _restore(value, memo))
+    make_transient_to_detached(item)
+
+    return item
+
+
+def restore_snapshots(snapshots: list[ItemSnapshot]) -> list:
+    """
+    Build detached items from their snapshots, ready to be merged into a session without loading anything
+    :param snapshots: The snapshots, as returned by take_snapshots
+    :return: the detached items
+    """
+    memo = {}
+
+    return [_restore(snapshot, memo) for snapshot in snapshots]
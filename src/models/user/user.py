@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING, List
 
-from sqlalchemy import String, func, ForeignKey, select, case, true
+from sqlalchemy import String, func, ForeignKey, select, case, true, ColumnElement, Index
 from sqlalchemy.ext.hybrid import hybrid_property
 
 from src.models.base_user import BaseUser
@@ -17,6 +17,7 @@ if TYPE_CHECKING:
     from src.models.notification import Notification
     from src.models.review import Review
     from src.models.book_list import BookList
+    from sqlalchemy import Select
 
 
 class User(BaseUser):
@@ -67,16 +68,33 @@ class User(BaseUser):
         """
         return func.concat(cls.name, ' ', cls.first_last_name, ' ', func.coalesce(cls.second_last_name, ''))
 
+    @classmethod
+    def pending_first_order(cls) -> ColumnElement:
+        """
+        Ordering expression that puts the pending users first
+        :return: The ordering expression
+        """
+        return case({cls.disabled == true() and cls.created_at == cls.modified_at: 0}, else_=1)
+
     @classmethod
     def list_first_pending(cls) -> list['User']:
         """
         Get all the users but first the pending ones
         :return: All the users but first the pending ones
         """
-        qry = select(cls).order_by(case({cls.disabled == true() and cls.created_at == cls.modified_at: 0}, else_=1))
+        qry = select(cls).order_by(cls.pending_first_order())
 
         return cls.session.scalars(qry).all()
 
+    @classmethod
+    def friend_ids(cls, user_id: int) -> 'Select':
+        """
+        Get the statement selecting the ids of the friends of a user
+        :param user_id: The id of the user
+        :return: The select statement of the ids of the friends
+        """
+        return select(friendship.c.friend_id).where(friendship.c.user_id == user_id)
+
     @classmethod
     def get_friends(cls, user_id: int) -> list['User']:
         """
@@ -87,3 +105,8 @@ class User(BaseUser):
         stmt = select(User).join(friendship, User.id == friendship.c.friend_id).where(friendship.c.user_id == user_id)
         friends = cls.session.execute(stmt).scalars().all()
         return friends
+
+
+# Read by the KPIs and the rollup refresher, declared here since BaseUser owns __table_args__
+Index('ix_user_created_at', User.created_at)
+Index('ix_user_modified_at', User.modified_at)
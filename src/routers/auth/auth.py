@@ -1,16 +1,23 @@
+import uuid
 from datetime import datetime, timezone, timedelta
-from typing import Annotated
+from typing import Annotated, Optional
 
 import toml
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.exceptions import abort
 
+from db import current_user_id, primary_reads
 from src.models.access_token import AccessToken
 from src.routers.rosetta_router import create_router
 from src.models.user import UserSchema, UserBasePasswordSchema, UserStoredData, UserSignUpSchema, UserRole
 from src.models.user.user import User
+from src.utils.auth.principal_cache import invalidate_user, principal_cache, token_digest
+from src.utils.auth.revocation_filter import revocation_filter
+from src.utils.cache.ttl_cache import TTLCache
+from src.utils.hashing.hashing_pool import HashingPool, HashingPoolFullError
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 
@@ -28,6 +35,18 @@ pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 SECRET_KEY = config['auth']['SECRET_KEY']
 ALGORITHM = config['auth']['ALGORITHM']
 ACCESS_TOKEN_EXPIRE_DAYS = config['auth']['ACCESS_TOKEN_EXPIRE_DAYS']
+STATELESS_AUTH = config['auth'].get('AUTH_MODE', 'stateful') == 'stateless'
+ACCESS_TOKEN_EXPIRE_MINUTES = config['auth'].get('ACCESS_TOKEN_EXPIRE_MINUTES', 15)
+REFRESH_TOKEN_EXPIRE_DAYS = config['auth'].get('REFRESH_TOKEN_EXPIRE_DAYS', 30)
+REVOKED_ACCESS_TOKENS_SIZE = config['auth'].get('REVOKED_ACCESS_TOKENS_SIZE', 10000)
+HASHING_POOL_WORKERS = config['auth'].get('HASHING_POOL_WORKERS', 4)
+HASHING_POOL_MAX_PENDING = config['auth'].get('HASHING_POOL_MAX_PENDING', 64)
+
+hashing_pool = HashingPool(pwd_context, HASHING_POOL_WORKERS, HASHING_POOL_MAX_PENDING)
+
+# Short-lived access tokens revoked on logout in stateless mode, and refresh tokens whose access tokens are revoked
+# with their family, kept until those access tokens would have expired anyway
+revoked_access_tokens = TTLCache(REVOKED_ACCESS_TOKENS_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 
 class Token(BaseModel):
@@ -45,6 +64,23 @@ class LoginResponse(Token):
     """
 
     user: UserStoredData
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenSchema(BaseModel):
+    """
+    Refresh token request model
+    """
+
+    refresh_token: str
+
+
+class RefreshResponse(Token):
+    """
+    Refresh response model
+    """
+
+    refresh_token: str
 
 
 class TokenData(BaseModel):
@@ -55,51 +91,66 @@ class TokenData(BaseModel):
     user_id: int | None = None
 
 
-def verify_password(plain_password, hashed_password):
+def hashing_pool_busy() -> HTTPException:
+    """
+    Exception returned when the hashing pool rejects a job
+    :return:
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail='Server busy, try again later',
+        headers={'Retry-After': '1'},
+    )
+
+
+async def verify_password(plain_password, hashed_password):
     """
-    Verify a hashed password
+    Verify a hashed password in the hashing pool
     :param plain_password:
     :param hashed_password:
     :return:
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return await hashing_pool.verify(plain_password, hashed_password)
+    except HashingPoolFullError:
+        raise hashing_pool_busy() from None
 
 
-def get_password_hash(password):
+async def get_password_hash(password):
     """
-    Generates a hash for a password
+    Generates a hash for a password in the hashing pool
     :param password:
     :return:
     """
-    return pwd_context.hash(password)
+    try:
+        return await hashing_pool.hash(password)
+    except HashingPoolFullError:
+        raise hashing_pool_busy() from None
 
 
-def get_user(users, email: str) -> UserBasePasswordSchema | None:
+def get_user(email: str) -> UserBasePasswordSchema | None:
     """
-    Get user by id
-    :param users:
+    Get user by email
     :param email:
     """
-    for user in users:
-        if email in user.email:
-            user_dict = user
-            return UserBasePasswordSchema(**(user_dict.to_dict()))
+    user = User.find_by_email(email)
+    if user:
+        return UserBasePasswordSchema(**(user.to_dict()))
 
     return None
 
 
-def authenticate_user(users, email: str, password: str) -> UserBasePasswordSchema | bool:
+async def authenticate_user(email: str, password: str) -> UserBasePasswordSchema | bool:
     """
     Authenticate user
-    :param users:
     :param email:
     :param password:
     :return:
     """
-    user = get_user(users, email)
+    user = get_user(email)
     if not user:
         return False
-    if not verify_password(password, user.password):
+    if not await verify_password(password, user.password):
         return False
     return user
 
@@ -121,12 +172,56 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
+def create_token_pair(user_id: str, family: Optional[str] = None) -> tuple[str, str]:
+    """
+    Creates a short-lived access token and the refresh token used to renew it
+
+    Only the refresh token is stored, the access token is validated from its signature.
+    The access token carries the digest of its refresh token so logout can revoke both.
+    :param user_id:
+    :param family: The family of the rotated refresh token, a new one on login
+    :return: The access token and the refresh token
+    """
+    family = family or uuid.uuid4().hex
+    refresh_token_expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    refresh_token = create_access_token(
+        data={'sub': user_id, 'type': 'refresh', 'jti': uuid.uuid4().hex, 'fam': family},
+        expires_delta=refresh_token_expires,
+    )
+    AccessToken.insert(refresh_token, True, datetime.now(timezone.utc) + refresh_token_expires, family)
+
+    access_token = create_access_token(
+        data={'sub': user_id, 'type': 'access', 'sid': token_digest(refresh_token)},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+
+    return access_token, refresh_token
+
+
+def revoke_token_family(family: str) -> None:
+    """
+    Revoke the refresh tokens of a family and the access tokens issued with them
+    :param family:
+    """
+    for token_hash in AccessToken.revoke_family(family):
+        revoked_access_tokens.set(token_hash, True)
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> UserSchema:
     """
     Get current user
+
+    Verified principals are kept in the principal cache until the token expires, so
+    repeated requests with the same token skip the token and user lookups.
     :param token:
     :return:
     """
+    digest = token_digest(token)
+    principal = principal_cache.get(digest)
+    if principal is not None:
+        current_user_id.set(principal.id)
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail='Could not validate credentials',
@@ -135,20 +230,32 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Use
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get('sub')
-        if user_id is None:
+        if user_id is None or payload.get('type', 'access') != 'access':
             raise credentials_exception
 
-        stored_token = AccessToken.find(token)
-        # if stored_token is None or not stored_token.valid:
-        #     raise credentials_exception
+        if STATELESS_AUTH:
+            # The access token is revoked either by itself on logout or through its refresh token
+            if revoked_access_tokens.get(digest) or revoked_access_tokens.get(payload.get('sid')):
+                raise credentials_exception
+        elif digest in revocation_filter:
+            # Only a filter hit needs the database to confirm the revocation
+            with primary_reads():
+                stored_token = AccessToken.find(token)
+            if stored_token is not None and not stored_token.valid:
+                raise credentials_exception
 
         token_data = TokenData(user_id=user_id)
     except JWTError as e:
         raise e
-    user = User.find(token_data.user_id)
+    with primary_reads():
+        user = User.find(token_data.user_id)
     if user is None:
         raise credentials_exception
-    return user
+
+    principal = UserSchema.model_validate(user, from_attributes=True)
+    principal_cache.set(digest, principal, ttl=payload['exp'] - datetime.now(timezone.utc).timestamp())
+    current_user_id.set(principal.id)
+    return principal
 
 
 async def get_current_active_user(
@@ -183,8 +290,7 @@ async def login_for_access_token(
     :param form_data:
     :return:
     """
-    users = User.list()
-    user_logged = authenticate_user(users, form_data.username, form_data.password)
+    user_logged = await authenticate_user(form_data.username, form_data.password)
     if not user_logged:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -199,12 +305,59 @@ async def login_for_access_token(
             detail='Inactive user',
             headers={'WWW-Authenticate': 'Bearer'},
         )
-    access_token_expires = timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
-    access_token = create_access_token(data={'sub': str(user_logged.id)}, expires_delta=access_token_expires)
-    AccessToken.insert(access_token, True, datetime.now(timezone.utc) + access_token_expires)
+    refresh_token = None
+    if STATELESS_AUTH:
+        access_token, refresh_token = create_token_pair(str(user_logged.id))
+    else:
+        access_token_expires = timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
+        access_token = create_access_token(data={'sub': str(user_logged.id)}, expires_delta=access_token_expires)
+        AccessToken.insert(access_token, True, datetime.now(timezone.utc) + access_token_expires)
     user = User.find(user_logged.id)
     user_stored = UserStoredData(**(user.to_dict()))
-    return LoginResponse(access_token=access_token, token_type='bearer', user=user_stored)  # noqa S106
+    return LoginResponse(
+        access_token=access_token, token_type='bearer', user=user_stored, refresh_token=refresh_token  # noqa S106
+    )
+
+
+@router.post('/refresh')
+async def refresh_access_token(data: RefreshTokenSchema) -> RefreshResponse:
+    """
+    Rotate a refresh token: the given one is invalidated and a new token pair is issued
+
+    The token is invalidated by a single conditional update, so of two requests
+    racing with the same token only one gets a new pair.
+    :param data:
+    :return:
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail='Could not validate credentials',
+        headers={'WWW-Authenticate': 'Bearer'},
+    )
+    try:
+        payload = jwt.decode(data.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception from None
+
+    user_id: str = payload.get('sub')
+    if user_id is None or payload.get('type') != 'refresh':
+        raise credentials_exception
+
+    if not AccessToken.consume(data.refresh_token):
+        # A refresh token used twice has leaked, so every token of its family is revoked
+        stored_token = AccessToken.find(data.refresh_token)
+        if stored_token is not None and stored_token.family is not None:
+            revoke_token_family(stored_token.family)
+            # The principals cached for the access tokens of the family would skip the revocation check
+            invalidate_user(int(user_id))
+        raise credentials_exception
+
+    user = User.find(int(user_id))
+    if user is None or user.disabled:
+        raise credentials_exception
+
+    access_token, refresh_token = create_token_pair(user_id, payload.get('fam'))
+    return RefreshResponse(access_token=access_token, token_type='bearer', refresh_token=refresh_token)  # noqa S106
 
 
 @router.get('/logout')
@@ -213,7 +366,19 @@ async def logout(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
     Logout endpoint
     :return:
     """
-    AccessToken.invalid(token)
+    if STATELESS_AUTH:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return {'message': 'Logged out'}
+
+        digest = token_digest(token)
+        revoked_access_tokens.set(digest, True, ttl=payload['exp'] - datetime.now(timezone.utc).timestamp())
+        principal_cache.invalidate(digest)
+        if payload.get('sid'):
+            AccessToken.invalid_hash(payload['sid'])
+    else:
+        AccessToken.invalid(token)
     return {'message': 'Logged out'}
 
 
@@ -226,8 +391,7 @@ async def login_for_access_token_swagger(
     :param form_data:
     :return:
     """
-    users = User.list()
-    user = authenticate_user(users, form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -246,7 +410,7 @@ async def signup(user: UserSignUpSchema) -> User:
     :param user:
     :return user:
     """
-    existing_email = User.find_by([User.email == user.email])
+    existing_email = User.find_by_email(user.email)
     existing_username = User.find_by([User.username == user.username])
     if existing_email:
         raise HTTPException(status_code=400, detail={'message': 'Username already exists', 'error_code': 'API.ERROR.ALREADYEXISTSEMAIL'})
@@ -258,25 +422,24 @@ async def signup(user: UserSignUpSchema) -> User:
     user.date_of_birth = user.date_of_birth.astimezone()
     user.date_of_birth = user.date_of_birth.replace(tzinfo=tz)
     new_user.add_from_dict(user.dict())
-    new_user.password = get_password_hash(user.password)
+    new_user.password = await get_password_hash(user.password)
     new_user.user_role = UserRole.USER if not user.emerging_author else UserRole.AUTHOR
-    User.insert(new_user, None)
 
-    if new_user.user_role == UserRole.AUTHOR:
-        from src.models.author import Author
+    try:
+        with User.transaction():
+            User.insert(new_user, None)
 
-        author = Author()
-        author.name = new_user.name
-        author.first_last_name = new_user.first_last_name
-        author.date_of_birth = new_user.date_of_birth
-        try:
-            new_author = Author.insert(author, None)
+            if new_user.user_role == UserRole.AUTHOR:
+                from src.models.author import Author
 
-            new_user.author_id = new_author.id
-            User.update(new_user, {'author_id': new_author.id}, None)
-        except Exception as e:
-            new_user.delete()
-            raise HTTPException(status_code=500, detail=f'An error occurred while creating the author: {str(e)}') from None
+                author = Author()
+                author.name = new_user.name
+                author.first_last_name = new_user.first_last_name
+                author.date_of_birth = new_user.date_of_birth
+                new_user.author = author
+                Author.insert(author, None)
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f'An error occurred while creating the user: {str(e)}') from None
 
     return new_user
 
@@ -288,7 +451,7 @@ async def check_email(email: str) -> bool:
     :param email:
     :return:
     """
-    existing_email = User.find_by([User.email == email])
+    existing_email = User.find_by_email(email)
     return existing_email is None
 
 
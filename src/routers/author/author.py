@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request, Response
 from sqlalchemy import false
 
 from src.models.author import AuthorBaseSchema, Author
@@ -9,7 +9,7 @@ from src.models.book.book_schema import BookBaseSchema
 from src.models.user import UserRole
 from src.models.user import UserSchema
 from src.routers.auth.auth import get_current_active_user
-from src.routers.rosetta_router import create_router
+from src.routers.rosetta_router import create_router, Pagination, get_pagination, paginate
 
 
 api_name = 'author'
@@ -18,16 +18,32 @@ router = create_router(api_name)
 
 
 @router.get('/', response_model=list[AuthorBaseSchema])
-async def get_all_authors(current_user: Annotated[UserSchema, Depends(get_current_active_user)]) -> list[Author]:
+async def get_all_authors(
+    request: Request,
+    response: Response,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+) -> list[Author]:
     """
-    Get all authors
+    Get a page of authors sorted by name
+    :param request: The request being served
+    :param response: The response, where the pagination headers are set
+    :param pagination: The page size and cursor
     :param current_user: The user making the request
-    :return: A list of all authors
+    :return: A page of authors
     """
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return Author.list([Author.disabled == false()], ('name', True))
+    return paginate(
+        Author,
+        request,
+        response,
+        pagination,
+        filters=[Author.disabled == false()],
+        order_by=[('name', True)],
+        cache=True,
+    )
 
 
 @router.get('/{author_id}/books', response_model=list[BookBaseSchema])
@@ -1,7 +1,6 @@
-from datetime import datetime, timedelta
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import Depends, HTTPException, UploadFile, File
+from fastapi import Depends, HTTPException, UploadFile, File, Request, Response, Query
 from google.cloud import storage
 from sqlalchemy import false
 
@@ -11,8 +10,12 @@ from src.models.book.book_schema import BookBaseSchema, BookStatus, BookSchema,
 from src.models.genre import Genre
 from src.models.publisher import Publisher
 from src.models.user import UserSchema, UserRole
+from src.models.daily_rollup import TrendPointSchema
 from src.routers.auth.auth import get_current_active_user
-from src.routers.rosetta_router import create_router
+from src.routers.rosetta_router import create_router, Pagination, get_pagination, paginate_rows, find_many_or_404, \
+    StreamFormat, stream_rows
+from src.utils.schemas.bulk_schema import BulkIdsSchema, BulkResultSchema
+from src.utils.kpi.windowed_kpi import windowed_kpi, daily_trend, BOOKS_KPI
 from src.utils.schemas.kpi_schema import create_kpi_schema
 
 api_name = 'book'
@@ -21,16 +24,57 @@ router = create_router(api_name)
 
 
 @router.get('/', response_model=list[BookSchema])
-async def get_all_books(current_user: Annotated[UserSchema, Depends(get_current_active_user)]) -> list[Book]:
+async def get_all_books(
+    request: Request,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    stream: Optional[StreamFormat] = None,
+) -> Response:
+    """
+    Get a page of books, the pending ones first
+    :param request: The request being served
+    :param pagination: The page size and cursor
+    :param current_user: The user making the request
+    :param stream: Stream every book instead, as a JSON array ('json') or as NDJSON ('ndjson')
+    :return: A page of books
+    """
+    if current_user.user_role != UserRole.ADMIN and current_user.user_role != UserRole.USER:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    if stream:
+        return stream_rows(Book, BookSchema, stream, order_by=[(Book.pending_first_order(), True)])
+
+    return paginate_rows(Book, request, pagination, BookSchema, order_by=[(Book.pending_first_order(), True)])
+
+
+@router.get('/search', response_model=list[BookSchema])
+async def search_books(
+    request: Request,
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+) -> Response:
     """
-    Get all books
+    Search the books by their title, authors, genres and overview, the most relevant first
+    :param request: The request being served
+    :param q: The search, with quoted phrases, OR and - supported as in web search engines
+    :param pagination: The page size and cursor
     :param current_user: The user making the request
-    :return: A list of all books
+    :return: A page of the books found
     """
     if current_user.user_role != UserRole.ADMIN and current_user.user_role != UserRole.USER:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return Book.list_first_pending()
+    query = Book.search_query(q)
+
+    return paginate_rows(
+        Book,
+        request,
+        pagination,
+        BookSchema,
+        filters=[Book.search_filter(query), Book.disabled == false()],
+        order_by=[(Book.search_rank(query), False)],
+    )
 
 
 @router.get('/{book_id}/authors', response_model=list[AuthorBaseSchema])
@@ -53,26 +97,39 @@ async def get_authors_of_book(
 
 @router.get('/books-last-seven-days/', response_model=create_kpi_schema(BookBaseSchema))
 async def get_last_seven_days_books(
-    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
-) -> dict[str, int | list[Book]]:
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    days: Annotated[int, Query(ge=1, le=366)] = 7,
+) -> dict[str, int | float | list[Book] | None]:
     """
-    Get the list of the books created in the last seven days
+    Get the number of books created in the last days, compared with the days before, and a preview of the newest
+
+    The counts are read from the daily rollups, so they can be up to
+    ROLLUP_REFRESH_INTERVAL_SECONDS old; the preview is read live.
     :param current_user: The user making the request
-    :return: The list of books created in the last seven days
+    :param days: The length of the windows compared
+    :return: The counts of both windows and the newest books created
     """
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    today = datetime.now()
-    seven_days_ago = today - timedelta(days=7)
-    fourteen_days_ago = today - timedelta(days=14)
+    return windowed_kpi(BOOKS_KPI, days)
 
-    books_this_week = Book.list([Book.created_at <= today, Book.created_at >= seven_days_ago, Book.disabled == false()])
-    total_past_week = Book.list(
-        [Book.created_at <= seven_days_ago, Book.created_at >= fourteen_days_ago, Book.disabled == false()]
-    )
 
-    return {'total_past_week': len(total_past_week), 'this_week': books_this_week}
+@router.get('/books-trend/', response_model=list[TrendPointSchema])
+async def get_books_trend(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    days: Annotated[int, Query(ge=1, le=366)] = 90,
+) -> list[dict[str, any]]:
+    """
+    Get the number of books created each day, from the daily rollups
+    :param current_user: The user making the request
+    :param days: The number of days, today included
+    :return: The daily points of the trend, oldest first
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return daily_trend(BOOKS_KPI, days)
 
 
 @router.get('/pending-books/', response_model=list[BookSchema])
@@ -85,7 +142,27 @@ async def get_pending_books(current_user: Annotated[UserSchema, Depends(get_curr
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return Book.list([Book.status == BookStatus.PENDING])
+    return Book.list([Book.status == BookStatus.PENDING], schema=BookSchema, project=True)
+
+
+@router.put('/bulk/approve', response_model=BulkResultSchema)
+async def approve_books(
+    books: BulkIdsSchema, current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+) -> dict[str, int]:
+    """
+    Approve several pending books at once
+    :param books: The ids of the books to approve
+    :param current_user: The user making the request
+    :return: The number of approved books
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    updated = Book.update_where(
+        [Book.id.in_(books.ids), Book.status == BookStatus.PENDING], {'status': BookStatus.ACTIVE}, current_user.id
+    )
+
+    return {'updated': updated}
 
 
 @router.post('/', response_model=BookSchema)
@@ -104,16 +181,8 @@ async def create_book(
     new_book = Book()
     new_book.add_from_dict(book.dict())
 
-    for author_id in book.author_ids:
-        author = Author.find(author_id)
-        new_book.authors.append(author)
-
-    main_genre = Genre.find(book.main_genre_id)
-    new_book.genres.append(main_genre)
-
-    if book.secondary_genre_id:
-        secondary_genre = Genre.find(book.secondary_genre_id)
-        new_book.genres.append(secondary_genre)
+    new_book.authors.extend(find_many_or_404(Author, book.author_ids))
+    new_book.genres.extend(find_many_or_404(Genre, genre_ids(book)))
 
     Book.insert(new_book, current_user.id)
 
@@ -176,7 +245,7 @@ async def get_book(book_id: str, current_user: Annotated[UserSchema, Depends(get
     if current_user.user_role != UserRole.ADMIN and current_user.user_role != UserRole.USER:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return Book.find(book_id)
+    return Book.find(book_id, schema=BookSchema)
 
 
 @router.put('/{book_id}', response_model=BookSchema)
@@ -198,21 +267,10 @@ async def update_book(
     updated_book = book.dict()
 
     # Update the authors
-    authors = []
-    for author_id in book.author_ids:
-        author = Author.find(author_id)
-        authors.append(author)
-    updated_book['authors'] = authors
+    updated_book['authors'] = find_many_or_404(Author, book.author_ids)
 
     # Update the genres
-    genres = []
-    main_genre = Genre.find(book.main_genre_id)
-    genres.append(main_genre)
-    if book.secondary_genre_id:
-        secondary_genre = Genre.find(book.secondary_genre_id)
-        genres.append(secondary_genre)
-
-    updated_book['genres'] = genres
+    updated_book['genres'] = find_many_or_404(Genre, genre_ids(book))
 
     # Update the publisher
     if book.publisher_id:
@@ -224,6 +282,15 @@ async def update_book(
     return book_to_update
 
 
+def genre_ids(book: CreateBookSchema | UpdateBookSchema) -> list[int]:
+    """
+    Get the ids of the main and secondary genres of a book
+    :param book: The book being created or updated
+    :return: The ids of its genres
+    """
+    return [book.main_genre_id] + ([book.secondary_genre_id] if book.secondary_genre_id else [])
+
+
 @router.get('/random/', response_model=BookSchema)
 async def get_random_book() -> Book:
     """
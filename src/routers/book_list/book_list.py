@@ -28,13 +28,13 @@ async def create_book_list(
 async def get_user_book_lists(current_user: Annotated[UserSchema, Depends(get_current_active_user)]) -> list[BookList]:
     """Return all book lists of a user."""
 
-    return BookList.list([BookList.user_id == current_user.id])
+    return BookList.list([BookList.user_id == current_user.id], schema=BookListSchema)
 
 
 @router.get('/{list_id}', response_model=BookListSchema)
 async def get_book_list(list_id: int) -> BookList:
     """Get a book list by id."""
-    book_list = BookList.find(list_id)
+    book_list = BookList.find(list_id, schema=BookListSchema)
     if not book_list:
         raise HTTPException(status_code=404, detail='Book list not found')
     return book_list
@@ -0,0 +1,30 @@
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Query
+
+from src.models.user import UserSchema, UserRole
+from src.routers.auth.auth import get_current_active_user
+from src.routers.rosetta_router import create_router
+from src.utils.kpi.dashboard import get_dashboard
+from src.utils.schemas.dashboard_schema import DashboardSchema
+
+api_name = 'dashboard'
+
+router = create_router(api_name)
+
+
+@router.get('/', response_model=DashboardSchema)
+async def get_admin_dashboard(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    days: Annotated[int, Query(ge=1, le=366)] = 7,
+) -> DashboardSchema:
+    """
+    Get every KPI of the admin dashboard in a single request
+    :param current_user: The user making the request
+    :param days: The length of the windows compared
+    :return: The KPIs of the books, users, emerging authors and reviews
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return await get_dashboard(days)
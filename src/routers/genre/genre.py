@@ -6,7 +6,7 @@ from sqlalchemy import false
 from src.models.genre import GenreBaseSchema, Genre
 from src.models.user import UserSchema, UserRole
 from src.routers.auth.auth import get_current_active_user
-from src.routers.rosetta_router import create_router
+from src.routers.rosetta_router import create_router, get_async_db
 
 
 api_name = 'genre'
@@ -14,7 +14,7 @@ api_name = 'genre'
 router = create_router(api_name)
 
 
-@router.get('/', response_model=list[GenreBaseSchema])
+@router.get('/', response_model=list[GenreBaseSchema], dependencies=[Depends(get_async_db)])
 async def get_all_genres(current_user: Annotated[UserSchema, Depends(get_current_active_user)]) -> list[Genre]:
     """
     Get all genres
@@ -24,4 +24,4 @@ async def get_all_genres(current_user: Annotated[UserSchema, Depends(get_current
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return Genre.list([Genre.disabled == false()], ('name', True))
+    return await Genre.list_async([Genre.disabled == false()], ('name', True), cache=True)
@@ -0,0 +1,120 @@
+from typing import Annotated
+
+from fastapi import Depends, HTTPException
+
+from src.models.user import UserSchema, UserRole
+from src.routers.auth.auth import get_current_active_user, hashing_pool
+from src.routers.rosetta_router import create_router
+from src.utils.auth.principal_cache import principal_cache
+from src.utils.auth.revocation_filter import revocation_filter
+from src.utils.cache.query_cache import query_cache
+from src.utils.middleware.session_middleware import memory_stats
+from src.utils.middleware.sql_timing_middleware import route_sql_summary
+from src.utils.search.suggestions import suggestion_cache
+
+api_name = 'metrics'
+
+router = create_router(api_name)
+
+
+@router.get('/hashing-pool')
+async def get_hashing_pool_metrics(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+) -> dict[str, int]:
+    """
+    Get the queue depth and counters of the password hashing pool
+    :param current_user: The user making the request
+    :return: The metrics of the hashing pool
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return hashing_pool.stats()
+
+
+@router.get('/principal-cache')
+async def get_principal_cache_metrics(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+) -> dict[str, int | float]:
+    """
+    Get the hit/miss counters of the authenticated principal cache
+    :param current_user: The user making the request
+    :return: The metrics of the principal cache
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return principal_cache.stats()
+
+
+@router.get('/query-cache')
+async def get_query_cache_metrics(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+) -> dict[str, int | dict]:
+    """
+    Get the size of the query result cache and the hit ratio of each cached model
+    :param current_user: The user making the request
+    :return: The metrics of the query cache
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return query_cache.stats()
+
+
+@router.get('/suggestion-cache')
+async def get_suggestion_cache_metrics(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+) -> dict[str, int | float]:
+    """
+    Get the hit/miss counters of the search suggestion cache
+    :param current_user: The user making the request
+    :return: The metrics of the suggestion cache
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return suggestion_cache.stats()
+
+
+@router.get('/revocation-filter')
+async def get_revocation_filter_metrics(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+) -> dict[str, int | float]:
+    """
+    Get the sizing and the estimated false positive rate of the token revocation filter
+    :param current_user: The user making the request
+    :return: The metrics of the revocation filter
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return revocation_filter.stats()
+
+
+@router.get('/memory')
+async def get_memory_metrics(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+) -> dict[str, int | float]:
+    """
+    Get the identity map size of the requests and the RSS of the worker
+    :param current_user: The user making the request
+    :return: The memory metrics of the worker
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return memory_stats.stats()
+
+
+@router.get('/sql')
+async def get_sql_metrics(current_user: Annotated[UserSchema, Depends(get_current_active_user)]) -> dict[str, dict]:
+    """
+    Get the query counts, database times and slowest statement of the last requests of each route
+    :param current_user: The user making the request
+    :return: The SQL metrics of each route
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return route_sql_summary.summary()
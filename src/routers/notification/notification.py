@@ -1,11 +1,11 @@
 from typing import Annotated
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request, Response
 
 from src.models.notification import Notification, NotificationSchema
 from src.models.user import UserSchema
 from src.routers.auth.auth import get_current_active_user
-from src.routers.rosetta_router import create_router
+from src.routers.rosetta_router import create_router, Pagination, get_pagination, paginate
 
 api_name = 'notification'
 
@@ -13,16 +13,30 @@ router = create_router(api_name)
 
 @router.get('/{user_id}', response_model=list[NotificationSchema])
 async def get_notifications_of_user(
-    user_id: int, current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+    user_id: int,
+    request: Request,
+    response: Response,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
 ) -> list[Notification]:
     """
-    Get a review by its id
+    Get a page of the notifications of a user
     :param user_id: The id of the user
+    :param request: The request being served
+    :param response: The response, where the pagination headers are set
+    :param pagination: The page size and cursor
     :param current_user: The user making the request
-    :return: The review with the given id
+    :return: A page of the notifications of the user
     """
     if current_user.id != user_id:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return Notification.list([Notification.user_id == user_id])
+    return paginate(
+        Notification,
+        request,
+        response,
+        pagination,
+        filters=[Notification.user_id == user_id],
+        schema=NotificationSchema,
+    )
 
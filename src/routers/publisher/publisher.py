@@ -23,4 +23,4 @@ async def get_all_publishers(current_user: Annotated[UserSchema, Depends(get_cur
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return Publisher.list([Publisher.disabled == false()], ('name', True))
+    return Publisher.list([Publisher.disabled == false()], ('name', True), cache=True)
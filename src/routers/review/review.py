@@ -1,14 +1,16 @@
-from datetime import datetime, timedelta
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request, Response, Query
 from sqlalchemy import false
 from werkzeug.exceptions import abort
 
 from src.models.review import ReviewSchema, Review, ReviewBaseSchema, UpdateReviewSchema
 from src.models.user import UserSchema, UserRole, User
+from src.models.daily_rollup import TrendPointSchema
 from src.routers.auth.auth import get_current_active_user
-from src.routers.rosetta_router import create_router
+from src.routers.rosetta_router import create_router, Pagination, get_pagination, paginate, paginate_rows, \
+    StreamFormat, stream_rows
+from src.utils.kpi.windowed_kpi import windowed_kpi, daily_trend, REVIEWS_KPI
 from src.utils.schemas.kpi_schema import create_kpi_schema
 
 api_name = 'review'
@@ -29,46 +31,68 @@ async def get_review_by_id(
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return Review.find(review_id)
+    return Review.find(review_id, schema=ReviewSchema)
 
 
 @router.get('/reviews-last-seven-days/', response_model=create_kpi_schema(ReviewBaseSchema))
 async def get_last_seven_days_reviews(
-    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
-) -> dict[str, int | list[Review]]:
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    days: Annotated[int, Query(ge=1, le=366)] = 7,
+) -> dict[str, int | float | list[Review] | None]:
     """
-    Get the list of the reviews created in the last seven days
+    Get the number of reviews created in the last days, compared with the days before, and a preview of the newest
+
+    The counts are read from the daily rollups, so they can be up to
+    ROLLUP_REFRESH_INTERVAL_SECONDS old; the preview is read live.
     :param current_user: The user making the request
-    :return: The list of reviews created in the last seven days
+    :param days: The length of the windows compared
+    :return: The counts of both windows and the newest reviews created
     """
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    today = datetime.now()
-    seven_days_ago = today - timedelta(days=7)
-    fourteen_days_ago = today - timedelta(days=14)
+    return windowed_kpi(REVIEWS_KPI, days)
 
-    reviews_this_week = Review.list(
-        [Review.created_at <= today, Review.created_at >= seven_days_ago, Review.disabled == false()]
-    )
-    total_past_week = Review.list(
-        [Review.created_at <= seven_days_ago, Review.created_at >= fourteen_days_ago, Review.disabled == false()]
-    )
 
-    return {'total_past_week': len(total_past_week), 'this_week': reviews_this_week}
+@router.get('/reviews-trend/', response_model=list[TrendPointSchema])
+async def get_reviews_trend(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    days: Annotated[int, Query(ge=1, le=366)] = 90,
+) -> list[dict[str, any]]:
+    """
+    Get the number of reviews, with their average rating, created each day, from the daily rollups
+    :param current_user: The user making the request
+    :param days: The number of days, today included
+    :return: The daily points of the trend, oldest first
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return daily_trend(REVIEWS_KPI, days)
 
 
 @router.get('/', response_model=list[ReviewSchema])
-async def get_all_reviews(current_user: Annotated[UserSchema, Depends(get_current_active_user)]) -> list[Review]:
+async def get_all_reviews(
+    request: Request,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    stream: Optional[StreamFormat] = None,
+) -> Response:
     """
-    Get all reviews
+    Get a page of reviews
+    :param request: The request being served
+    :param pagination: The page size and cursor
     :param current_user: The user making the request
-    :return: A list of all reviews
+    :param stream: Stream every review instead, as a JSON array ('json') or as NDJSON ('ndjson')
+    :return: A page of reviews
     """
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return Review.list()
+    if stream:
+        return stream_rows(Review, ReviewSchema, stream)
+
+    return paginate_rows(Review, request, pagination, ReviewSchema)
 
 
 @router.put('/{review_id}/', response_model=ReviewSchema)
@@ -99,27 +123,51 @@ async def update_review(
 @router.get('/book/{book_id}/', response_model=list[ReviewSchema])
 async def get_reviews_of_book(
     book_id: str,
-    limit: int = None,
+    request: Request,
+    response: Response,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
 ) -> list[Review]:
     """
-    Get all reviews of a book
-    :param limit: The limit of reviews to return
+    Get a page of the reviews of a book
     :param book_id: The id of the book
-    :return: A list of all the reviews of the book
+    :param request: The request being served
+    :param response: The response, where the pagination headers are set
+    :param pagination: The page size and cursor
+    :return: A page of the reviews of the book
     """
-    return Review.list([Review.book_id == book_id, Review.disabled == false()], limit=limit)
+    return paginate(
+        Review,
+        request,
+        response,
+        pagination,
+        filters=[Review.book_id == book_id, Review.disabled == false()],
+        schema=ReviewSchema,
+    )
 
 
 @router.get('/user/{user_id}/', response_model=list[ReviewSchema])
 async def get_reviews_of_book(
     user_id: str,
+    request: Request,
+    response: Response,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
 ) -> list[Review]:
     """
-    Get all reviews of a book
-    :param user_id: The id of the book
-    :return: A list of all the reviews of the book
+    Get a page of the reviews of a user
+    :param user_id: The id of the user
+    :param request: The request being served
+    :param response: The response, where the pagination headers are set
+    :param pagination: The page size and cursor
+    :return: A page of the reviews of the user
     """
-    return Review.list([Review.user_id == user_id, Review.disabled == false()])
+    return paginate(
+        Review,
+        request,
+        response,
+        pagination,
+        filters=[Review.user_id == user_id, Review.disabled == false()],
+        schema=ReviewSchema,
+    )
 
 
 @router.get('/friends-reviews/', response_model=list[ReviewSchema])
@@ -131,9 +179,4 @@ async def get_friends_reviews(
     :param current_user: The user making the request
     :return: A list of all the reviews of the friends of the current user
     """
-    friends = User.get_friends(current_user.id)
-    reviews = []
-    for friend in friends:
-        reviews += friend.reviews
-
-    return reviews
+    return Review.list([Review.user_id.in_(User.friend_ids(current_user.id))], schema=ReviewSchema)
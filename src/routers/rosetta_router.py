@@ -1,6 +1,12 @@
-from fastapi import APIRouter
+from functools import lru_cache
+from typing import Annotated, Iterator, Literal, Optional, Type
 
-from db import SessionLocal
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+from db import SessionLocal, AsyncSessionLocal
+from src.models.rosetta_item import InvalidCursorError, Page, RosettaBase
 
 """
 ### rosetta_router.py ###
@@ -8,6 +14,25 @@ from db import SessionLocal
 This file contains helper functions for creating routers and database sessions.
 """
 
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+
+# Media type of each streaming format
+STREAM_MEDIA_TYPES = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+
+StreamFormat = Literal['json', 'ndjson']
+
+
+class Pagination(BaseModel):
+    """
+    Pagination query parameters of the list endpoints
+    """
+
+    limit: int
+    cursor: Optional[str]
+
 
 def create_router(name: str) -> APIRouter:
     """
@@ -23,11 +48,185 @@ def create_router(name: str) -> APIRouter:
 
 def get_db() -> any:
     """
-    Get a database session
+    Get the database session of the current request
+
+    The session is shared by everything running for the request and is removed
+    by the SessionScopeMiddleware once the response has been sent.
+    :return:
+    """
+    yield SessionLocal()
+
+
+async def get_async_db() -> any:
+    """
+    Get the async database session of the current request and release it afterwards
     :return:
     """
-    db = SessionLocal()
     try:
-        yield db
+        yield AsyncSessionLocal()
     finally:
-        db.close()
+        await AsyncSessionLocal.remove()
+
+
+def get_pagination(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = PAGE_SIZE, cursor: Optional[str] = None
+) -> Pagination:
+    """
+    Get the pagination parameters of a list request
+    :param limit: The maximum number of items to return
+    :param cursor: The cursor of the page, taken from the Link header of a previous page
+    :return: The pagination parameters
+    """
+    return Pagination(limit=limit, cursor=cursor)
+
+
+def paginate(
+    model: Type[RosettaBase], request: Request, response: Response, pagination: Pagination, **kwargs: any
+) -> list:
+    """
+    Get a page of items and describe the pages around it in the Link header
+    :param model: The model to list
+    :param request: The request being served
+    :param response: The response where the pagination headers are set
+    :param pagination: The pagination parameters of the request
+    :param kwargs: The filters and ordering passed to RosettaBase.paginate
+    :return: The items of the page
+    """
+    page = get_page(model, pagination, **kwargs)
+    set_pagination_headers(request, response, page, pagination.limit)
+
+    return page.items
+
+
+def paginate_rows(
+    model: Type[RosettaBase], request: Request, pagination: Pagination, schema: Type[BaseModel], **kwargs: any
+) -> Response:
+    """
+    Get a page of items as plain rows and serialize it straight to a JSON response
+
+    The rows skip both the ORM instances and the response_model processing of
+    FastAPI, which makes large read-only pages much cheaper.
+    :param model: The model to list
+    :param request: The request being served
+    :param pagination: The pagination parameters of the request
+    :param schema: The schema of the items
+    :param kwargs: The filters and ordering passed to RosettaBase.paginate
+    :return: The JSON response, with the pagination headers
+    """
+    page = get_page(model, pagination, schema=schema, as_rows=True, **kwargs)
+    response = json_rows_response(schema, page.items)
+    set_pagination_headers(request, response, page, pagination.limit)
+
+    return response
+
+
+def stream_rows(
+    model: Type[RosettaBase], schema: Type[BaseModel], stream_format: StreamFormat, **kwargs: any
+) -> StreamingResponse:
+    """
+    Stream every item as a JSON array or as newline delimited JSON
+
+    The rows are read through a server-side cursor and written batch by batch,
+    so neither the database result nor the response is ever held in memory.
+    :param model: The model to list
+    :param schema: The schema of the items
+    :param stream_format: 'json' for a JSON array, 'ndjson' for one JSON document per line
+    :param kwargs: The filters and ordering passed to RosettaBase.stream_rows
+    :return: The streaming response
+    """
+    adapter = item_adapter(schema)
+    batches = model.stream_rows(schema, batch_size=STREAM_BATCH_SIZE, **kwargs)
+
+    def ndjson() -> Iterator[bytes]:
+        for batch in batches:
+            yield b''.join(adapter.dump_json(adapter.validate_python(row)) + b'\n' for row in batch)
+
+    def json_array() -> Iterator[bytes]:
+        separator = b'['
+        for batch in batches:
+            for row in batch:
+                yield separator + adapter.dump_json(adapter.validate_python(row))
+                separator = b','
+        yield b']' if separator == b',' else b'[]'
+
+    content = ndjson() if stream_format == 'ndjson' else json_array()
+
+    return StreamingResponse(content, media_type=STREAM_MEDIA_TYPES[stream_format])
+
+
+def get_page(model: Type[RosettaBase], pagination: Pagination, **kwargs: any) -> Page:
+    """
+    Get a page of items, rejecting invalid cursors
+    :param model: The model to list
+    :param pagination: The pagination parameters of the request
+    :param kwargs: The arguments passed to RosettaBase.paginate
+    :return: The page
+    """
+    try:
+        return model.paginate(pagination.limit, pagination.cursor, **kwargs)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail='Invalid cursor') from None
+
+
+@lru_cache(maxsize=None)
+def item_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """
+    Get the validator and serializer of a single item, built once per schema
+    :param schema: The schema of the item
+    :return: The type adapter of the item
+    """
+    return TypeAdapter(schema)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """
+    Get the validator and serializer of a list of items, built once per schema
+    :param schema: The schema of the items
+    :return: The type adapter of the list
+    """
+    return TypeAdapter(list[schema])
+
+
+def json_rows_response(schema: Type[BaseModel], rows: list[dict]) -> Response:
+    """
+    Serialize rows with a schema into a JSON response
+    :param schema: The schema of the rows
+    :param rows: The rows
+    :return: The JSON response
+    """
+    adapter = list_adapter(schema)
+
+    return Response(adapter.dump_json(adapter.validate_python(rows)), media_type='application/json')
+
+
+def find_many_or_404(model: Type[RosettaBase], item_ids: list) -> list:
+    """
+    Find several items by their ids, failing if any of them does not exist
+    :param model: The model of the items
+    :param item_ids: The ids of the items
+    :return: The items, in the order of the ids
+    """
+    items, missing_ids = model.find_many(item_ids)
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f'{model.__name__} not found: {missing_ids}')
+
+    return items
+
+
+def set_pagination_headers(request: Request, response: Response, page: Page, limit: int) -> None:
+    """
+    Add the Link, X-Next-Cursor and X-Prev-Cursor headers of a page
+    :param request: The request being served
+    :param response: The response where the headers are set
+    :param page: The page returned
+    :param limit: The page size
+    """
+    links = []
+    for rel, cursor in (('next', page.next_cursor), ('prev', page.prev_cursor)):
+        if cursor:
+            links.append(f'<{request.url.include_query_params(cursor=cursor, limit=limit)}>; rel="{rel}"')
+            response.headers[f'X-{rel.capitalize()}-Cursor'] = cursor
+
+    if links:
+        response.headers['Link'] = ', '.join(links)
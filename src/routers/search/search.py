@@ -0,0 +1,32 @@
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Query
+
+from src.models.user import UserSchema, UserRole
+from src.routers.auth.auth import get_current_active_user
+from src.routers.rosetta_router import create_router
+from src.utils.schemas.suggestion_schema import SuggestionSchema
+from src.utils.search.suggestions import suggest
+
+api_name = 'search'
+
+router = create_router(api_name)
+
+
+@router.get('/suggest', response_model=list[SuggestionSchema])
+async def get_suggestions(
+    q: Annotated[str, Query(min_length=1, max_length=100)],
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    limit: Annotated[int, Query(ge=1, le=20)] = 8,
+) -> list[dict[str, any]]:
+    """
+    Suggest book titles and author names for what the user is typing, tolerating typos
+    :param q: The text typed so far
+    :param current_user: The user making the request
+    :param limit: The maximum number of suggestions
+    :return: The suggestions, the best first
+    """
+    if current_user.user_role != UserRole.ADMIN and current_user.user_role != UserRole.USER:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    return suggest(q, limit)
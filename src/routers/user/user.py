@@ -1,13 +1,16 @@
-from datetime import datetime, timedelta
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import HTTPException, Depends
-from sqlalchemy import false
+from fastapi import HTTPException, Depends, Request, Response, Query
 
 from src.routers.auth.auth import get_current_active_user, get_password_hash, verify_password
-from src.routers.rosetta_router import create_router
+from src.routers.rosetta_router import create_router, Pagination, get_pagination, paginate_rows, StreamFormat, \
+    stream_rows
 from src.models.user import UserSchema, UserRole, UserBaseSchema, User, AdminSchema, PasswordSchema, CompleteUserSchema, \
     UserProfilePicture
+from src.models.daily_rollup import TrendPointSchema
+from src.utils.auth.principal_cache import invalidate_user
+from src.utils.schemas.bulk_schema import BulkIdsSchema, BulkResultSchema
+from src.utils.kpi.windowed_kpi import windowed_kpi, daily_trend, USERS_KPI, EMERGING_AUTHORS_KPI
 from src.utils.schemas.kpi_schema import create_kpi_schema
 
 api_name = 'user'
@@ -16,16 +19,27 @@ router = create_router(api_name)
 
 
 @router.get('/', response_model=list[UserSchema])
-async def get_all_users(current_user: Annotated[UserSchema, Depends(get_current_active_user)]) -> list[User]:
+async def get_all_users(
+    request: Request,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    stream: Optional[StreamFormat] = None,
+) -> Response:
     """
-    Get all users
+    Get a page of users, the pending ones first
+    :param request: The request being served
+    :param pagination: The page size and cursor
     :param current_user: The user making the request
-    :return: A list of all users
+    :param stream: Stream every user instead, as a JSON array ('json') or as NDJSON ('ndjson')
+    :return: A page of users
     """
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return User.list_first_pending()
+    if stream:
+        return stream_rows(User, UserSchema, stream, order_by=[(User.pending_first_order(), True)])
+
+    return paginate_rows(User, request, pagination, UserSchema, order_by=[(User.pending_first_order(), True)])
 
 
 @router.get('/{user_id}', response_model=UserSchema)
@@ -53,81 +67,81 @@ async def get_hash(password: str) -> str:
     :param password: The password to hash
     :return: The hashed password
     """
-    return get_password_hash(password)
+    return await get_password_hash(password)
 
 
 @router.get('/users-last-seven-days/', response_model=create_kpi_schema(UserBaseSchema))
 async def get_last_seven_days_users(
-    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
-) -> dict[str, int | list[User]]:
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    days: Annotated[int, Query(ge=1, le=366)] = 7,
+) -> dict[str, int | float | list[User] | None]:
     """
-    Get the list of the users created in the last seven days
+    Get the number of users created in the last days, compared with the days before, and a preview of the newest
+
+    The counts are read from the daily rollups, so they can be up to
+    ROLLUP_REFRESH_INTERVAL_SECONDS old; the preview is read live.
     :param current_user: The user making the request
-    :return: The list of users created in the last seven days
+    :param days: The length of the windows compared
+    :return: The counts of both windows and the newest users created
     """
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    today = datetime.now()
-    seven_days_ago = today - timedelta(days=7)
-    fourteen_days_ago = today - timedelta(days=14)
+    return windowed_kpi(USERS_KPI, days)
 
-    users_this_week = User.list(
-        [
-            User.created_at <= today,
-            User.created_at >= seven_days_ago,
-            User.user_role == UserRole.USER.value,
-            User.disabled == false(),
-        ]
-    )
 
-    total_past_week = User.list(
-        [
-            User.created_at <= seven_days_ago,
-            User.created_at >= fourteen_days_ago,
-            User.user_role == UserRole.USER.value,
-            User.disabled == false(),
-        ]
-    )
+@router.get('/users-trend/', response_model=list[TrendPointSchema])
+async def get_users_trend(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    days: Annotated[int, Query(ge=1, le=366)] = 90,
+) -> list[dict[str, any]]:
+    """
+    Get the number of users created each day, from the daily rollups
+    :param current_user: The user making the request
+    :param days: The number of days, today included
+    :return: The daily points of the trend, oldest first
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return {'total_past_week': len(total_past_week), 'this_week': users_this_week}
+    return daily_trend(USERS_KPI, days)
 
 
 @router.get('/emerging-last-seven-days/', response_model=create_kpi_schema(UserBaseSchema))
 async def get_last_seven_days_emerging(
-    current_user: Annotated[UserSchema, Depends(get_current_active_user)]
-) -> dict[str, int | list[User]]:
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    days: Annotated[int, Query(ge=1, le=366)] = 7,
+) -> dict[str, int | float | list[User] | None]:
     """
-    Get the list of the emerging authors created in the last seven days
+    Get the number of emerging authors created in the last days, compared with the days before, and the newest
+
+    The counts are read from the daily rollups, so they can be up to
+    ROLLUP_REFRESH_INTERVAL_SECONDS old; the preview is read live.
     :param current_user: The user making the request
-    :return: The list of emerging authors created in the last seven days
+    :param days: The length of the windows compared
+    :return: The counts of both windows and the newest emerging authors created
     """
     if current_user.user_role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    today = datetime.now()
-    seven_days_ago = today - timedelta(days=7)
-    fourteen_days_ago = today - timedelta(days=14)
+    return windowed_kpi(EMERGING_AUTHORS_KPI, days)
 
-    emerging_authors_this_week = User.list(
-        [
-            User.created_at <= today,
-            User.created_at >= seven_days_ago,
-            User.user_role == UserRole.AUTHOR.value,
-            User.disabled == false(),
-        ]
-    )
 
-    total_past_week = User.list(
-        [
-            User.created_at <= seven_days_ago,
-            User.created_at >= fourteen_days_ago,
-            User.user_role == UserRole.AUTHOR.value,
-            User.disabled == false(),
-        ]
-    )
+@router.get('/emerging-trend/', response_model=list[TrendPointSchema])
+async def get_emerging_trend(
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    days: Annotated[int, Query(ge=1, le=366)] = 90,
+) -> list[dict[str, any]]:
+    """
+    Get the number of emerging authors created each day, from the daily rollups
+    :param current_user: The user making the request
+    :param days: The number of days, today included
+    :return: The daily points of the trend, oldest first
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
 
-    return {'total_past_week': len(total_past_week), 'this_week': emerging_authors_this_week}
+    return daily_trend(EMERGING_AUTHORS_KPI, days)
 
 
 @router.patch('/admin/{admin_id}', response_model=UserSchema)
@@ -152,6 +166,7 @@ async def update_admin(
     updated_data = user.dict()
     if user_to_update:
         user_to_update.update(updated_data, current_user.id)
+        invalidate_user(user_to_update.id)
         return user_to_update
     else:
         raise HTTPException(status_code=404, detail='User not found')
@@ -176,8 +191,9 @@ async def update_admin_password(
         raise HTTPException(status_code=401, detail='Cannot update this user')
 
     user_to_update = User.find(admin_id)
-    if user_to_update and verify_password(data.current_password, user_to_update.password):
-        user_to_update.update({'password': get_password_hash(data.password)}, current_user.id)
+    if user_to_update and await verify_password(data.current_password, user_to_update.password):
+        user_to_update.update({'password': await get_password_hash(data.password)}, current_user.id)
+        invalidate_user(admin_id)
     else:
         raise HTTPException(status_code=404, detail='API.ERROR.WRONGPASSWORD')
 
@@ -221,11 +237,52 @@ async def update_admin(
     updated_data.pop('full_name')
     if user_to_update:
         user_to_update.update(updated_data, current_user.id)
+        invalidate_user(user_to_update.id)
         return user_to_update
     else:
         raise HTTPException(status_code=404, detail='User not found')
 
 
+@router.put('/bulk/activate', response_model=BulkResultSchema)
+async def activate_users(
+    users: BulkIdsSchema, current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+) -> dict[str, int]:
+    """
+    Activate several users at once
+    :param users: The ids of the users to activate
+    :param current_user: The user making the request
+    :return: The number of activated users
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    updated = User.enable_many(users.ids, current_user.id)
+    for user_id in users.ids:
+        invalidate_user(user_id)
+
+    return {'updated': updated}
+
+
+@router.put('/bulk/deactivate', response_model=BulkResultSchema)
+async def deactivate_users(
+    users: BulkIdsSchema, current_user: Annotated[UserSchema, Depends(get_current_active_user)]
+) -> dict[str, int]:
+    """
+    Deactivate several users at once
+    :param users: The ids of the users to deactivate
+    :param current_user: The user making the request
+    :return: The number of deactivated users
+    """
+    if current_user.user_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail='Not enough permissions')
+
+    updated = User.disable_many(users.ids, current_user.id)
+    for user_id in users.ids:
+        invalidate_user(user_id)
+
+    return {'updated': updated}
+
+
 @router.put('/{user_id}/activate')
 async def activate_user(
     user_id: int,
@@ -243,6 +300,7 @@ async def activate_user(
     user = User.find(user_id)
     if user:
         user.update({'disabled': False}, current_user.id)
+        invalidate_user(user_id)
     else:
         raise HTTPException(status_code=404, detail='User not found')
 
@@ -263,6 +321,7 @@ async def deactivate_user(
     user = User.find(user_id)
     if user:
         user.update({'disabled': True}, current_user.id)
+        invalidate_user(user_id)
     else:
         raise HTTPException(status_code=404, detail='User not found')
 
@@ -283,5 +342,6 @@ async def delete_user(
     user = User.find(user_id)
     if user:
         user.delete()
+        invalidate_user(user_id)
     else:
         raise HTTPException(status_code=404, detail='User not found')
@@ -0,0 +1,36 @@
+import hashlib
+
+import toml
+
+from src.utils.cache.ttl_cache import TTLCache
+
+"""
+### principal_cache.py ###
+
+Cache of the users already authenticated by get_current_user, keyed by the digest of their token.
+"""
+
+with open('./configs/.secrets.local.toml', 'r') as f:
+    config = toml.load(f)
+
+PRINCIPAL_CACHE_SIZE = config['auth'].get('PRINCIPAL_CACHE_SIZE', 10000)
+PRINCIPAL_CACHE_TTL_SECONDS = config['auth'].get('PRINCIPAL_CACHE_TTL_SECONDS', 60)
+
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def token_digest(token: str) -> str:
+    """
+    Get the fixed-size digest of a token
+    :param token: The raw token
+    :return: The hex sha256 digest of the token
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Forget every principal of a user, e.g. after it has been updated or deactivated
+    :param user_id: The id of the user
+    """
+    principal_cache.invalidate_where(lambda _, principal: principal.id == user_id)
@@ -0,0 +1,17 @@
+import toml
+
+from src.utils.cache.bloom_filter import BloomFilter
+
+"""
+### revocation_filter.py ###
+
+Bloom filter of the digests of the revoked tokens, so the common not-revoked case needs no database query.
+"""
+
+with open('./configs/.secrets.local.toml', 'r') as f:
+    config = toml.load(f)
+
+REVOCATION_FILTER_CAPACITY = config['auth'].get('REVOCATION_FILTER_CAPACITY', 100000)
+REVOCATION_FILTER_ERROR_RATE = config['auth'].get('REVOCATION_FILTER_ERROR_RATE', 0.01)
+
+revocation_filter = BloomFilter(REVOCATION_FILTER_CAPACITY, REVOCATION_FILTER_ERROR_RATE)
@@ -0,0 +1,105 @@
+import hashlib
+import math
+import threading
+from typing import Callable, Iterable
+
+"""
+### bloom_filter.py ###
+
+Probabilistic set membership with false positives only.
+"""
+
+
+class BloomFilter:
+    """
+    Bloom filter sized from the expected number of items and the accepted false positive rate
+
+    A negative answer is always right, a positive one may be wrong with roughly
+    the configured probability, so callers must confirm positives elsewhere.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        self._rebuilds: list[list[str]] = []
+        self.count = 0
+
+    def add(self, key: str) -> None:
+        """
+        Add a key to the filter
+        :param key: The key to add
+        """
+        with self._lock:
+            for position in self._positions(key):
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+            for added in self._rebuilds:
+                added.append(key)
+
+    def reset(self, load: Callable[[], Iterable[str]]) -> None:
+        """
+        Replace the content of the filter with the loaded keys
+
+        The keys added while the new content is loaded are recorded and added to it before the swap, so a key added
+        after the load read its source is not lost.
+        :param load: Function reading the keys the filter should contain, called once the recording started
+        """
+        added = []
+        with self._lock:
+            self._rebuilds.append(added)
+
+        try:
+            bits = bytearray(len(self._bits))
+            count = 0
+            for key in load():
+                for position in self._positions(key):
+                    bits[position >> 3] |= 1 << (position & 7)
+                count += 1
+
+            with self._lock:
+                for key in added:
+                    for position in self._positions(key):
+                        bits[position >> 3] |= 1 << (position & 7)
+                self._bits = bits
+                self.count = count + len(added)
+        finally:
+            with self._lock:
+                self._rebuilds = [rebuild for rebuild in self._rebuilds if rebuild is not added]
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Check if a key may be in the filter
+        :param key: The key to check
+        :return: False if the key was never added, True if it probably was
+        """
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Get the sizing and the estimated false positive rate of the filter
+        :return: A dictionary with the metrics of the filter
+        """
+        return {
+            'capacity': self.capacity,
+            'count': self.count,
+            'bits': self.size,
+            'hash_count': self.hash_count,
+            'estimated_error_rate': (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count,
+        }
+
+    def _positions(self, key: str) -> Iterable[int]:
+        """
+        Get the bit positions of a key using double hashing
+        :param key: The key
+        :return: The bit positions of the key
+        """
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+
+        return ((first + i * second) % self.size for i in range(self.hash_count))
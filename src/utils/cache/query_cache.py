@@ -0,0 +1,192 @@
+import threading
+from collections import defaultdict
+from typing import Hashable
+
+import toml
+from sqlalchemy import event
+from sqlalchemy.exc import CompileError
+from sqlalchemy.orm import Session, object_session
+
+from db import BaseSQL
+from src.utils.cache.ttl_cache import TTLCache
+
+"""
+### query_cache.py ###
+
+Opt-in cache of the rows read by RosettaBase, dropped for a model as soon as any of its rows is written.
+"""
+
+with open('./configs/.secrets.local.toml', 'r') as f:
+    config = toml.load(f)
+
+QUERY_CACHE_SIZE = config['database'].get('QUERY_CACHE_SIZE', 1000)
+QUERY_CACHE_TTL_SECONDS = config['database'].get('QUERY_CACHE_TTL_SECONDS', 300)
+
+# Key of the session info holding the models written by the session since its last commit
+WRITTEN_MODELS = 'written_models'
+
+
+class QueryCache:
+    """
+    LRU cache of query results, grouped by model
+
+    Every model has a generation number which is increased each time it is
+    invalidated. A result is only stored if the generation did not change
+    while it was being read, so a read racing with a write can not put stale
+    rows back into the cache.
+
+    A result holding rows of other models, e.g. eagerly loaded relationships,
+    is dropped as well when any of them is invalidated.
+
+    The time to live bounds how long another process may serve rows written
+    elsewhere, since invalidation only reaches the current process.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache = TTLCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        self._generations: dict[str, int] = defaultdict(int)
+        self._hits: dict[str, int] = defaultdict(int)
+        self._misses: dict[str, int] = defaultdict(int)
+
+    def get(self, model: str, key: Hashable) -> tuple[any, int]:
+        """
+        Get a cached result
+        :param model: The name of the model queried
+        :param key: The key of the query
+        :return: The cached result or None, and the generation to store a new result with
+        """
+        with self._lock:
+            generation = self._generations[model]
+
+        entry = self._cache.get((model, key))
+        value = None if entry is None else entry[0]
+
+        with self._lock:
+            if value is None:
+                self._misses[model] += 1
+            else:
+                self._hits[model] += 1
+
+        return value, generation
+
+    def set(
+        self, model: str, key: Hashable, value: any, generation: int, related: dict[str, int] | None = None
+    ) -> None:
+        """
+        Store a result, unless the model or a related one has been invalidated since it was read
+        :param model: The name of the model queried
+        :param key: The key of the query
+        :param value: The result
+        :param generation: The generation returned by get before the query ran
+        :param related: The generations of the other models held by the result, read before the query ran
+        """
+        related = related or {}
+        with self._lock:
+            if self._generations[model] != generation:
+                return
+            if any(self._generations[name] != related_generation for name, related_generation in related.items()):
+                return
+            self._cache.set((model, key), (value, frozenset(related)))
+
+    def generation(self, model: str) -> int:
+        """
+        Get the generation of a model, which changes every time the model is invalidated
+        :param model: The name of the model
+        :return: The generation
+        """
+        with self._lock:
+            return self._generations[model]
+
+    def generations(self) -> dict[str, int]:
+        """
+        Get the generations of every model at once
+        :return: The generation by model name, the models never invalidated being missing
+        """
+        with self._lock:
+            return dict(self._generations)
+
+    def invalidate(self, model: str) -> None:
+        """
+        Drop every cached result of a model
+        :param model: The name of the model
+        """
+        with self._lock:
+            self._generations[model] += 1
+            self._cache.invalidate_where(lambda key, entry: key[0] == model or model in entry[1])
+
+    def stats(self) -> dict[str, any]:
+        """
+        Get the counters of the cache
+        :return: A dictionary with the size and evictions of the cache and the hit ratio of each model
+        """
+        stats = self._cache.stats()
+        with self._lock:
+            models = {
+                model: {
+                    'hits': self._hits[model],
+                    'misses': self._misses[model],
+                    'hit_ratio': self._hits[model] / (self._hits[model] + self._misses[model]),
+                }
+                for model in sorted(set(self._hits) | set(self._misses))
+            }
+
+        return {'size': stats['size'], 'maxsize': stats['maxsize'], 'evictions': stats['evictions'], 'models': models}
+
+
+query_cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
+
+
+def statement_key(statement: any) -> str | None:
+    """
+    Get the cache key of a statement: its SQL with the parameters rendered inline
+    :param statement: The select statement
+    :return: The key, or None if the statement can not be rendered and must not be cached
+    """
+    try:
+        return str(statement.compile(compile_kwargs={'literal_binds': True}))
+    except (CompileError, NotImplementedError):
+        return None
+
+
+def record_write(session: Session, model: str) -> None:
+    """
+    Invalidate a model now, and once more when the session writing it commits,
+    so rows read by other sessions in between are not kept
+    :param session: The session writing the model
+    :param model: The name of the model
+    """
+    query_cache.invalidate(model)
+    session.info.setdefault(WRITTEN_MODELS, set()).add(model)
+
+
+def _on_write(mapper: any, _connection: any, target: any) -> None:
+    """
+    Mapper event hook recording the write of an item
+    """
+    session = object_session(target)
+    if session is None:
+        query_cache.invalidate(mapper.class_.__name__)
+    else:
+        record_write(session, mapper.class_.__name__)
+
+
+def _on_commit(session: Session) -> None:
+    """
+    Session event hook invalidating the models written by the committed transaction
+    """
+    for model in session.info.pop(WRITTEN_MODELS, ()):
+        query_cache.invalidate(model)
+
+
+def _on_rollback(session: Session) -> None:
+    """
+    Session event hook forgetting the writes of a rolled back transaction
+    """
+    session.info.pop(WRITTEN_MODELS, None)
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(BaseSQL, _event, _on_write, propagate=True)
+event.listen(Session, 'after_commit', _on_commit)
+event.listen(Session, 'after_rollback', _on_rollback)
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+"""
+### ttl_cache.py ###
+
+Small in-process cache with LRU eviction and per-entry expiration.
+"""
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a time to live
+
+    The cache keeps hit/miss/eviction counters so its effectiveness can be
+    checked from the metrics endpoints.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: any = None) -> any:
+        """
+        Get a value from the cache
+        :param key: The key of the entry
+        :param default: The value returned when the key is missing or expired
+        :return: The cached value or the default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: any, ttl: float | None = None) -> None:
+        """
+        Store a value in the cache
+        :param key: The key of the entry
+        :param value: The value to store
+        :param ttl: Time to live of this entry, capped to the cache ttl
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Remove an entry from the cache
+        :param key: The key of the entry
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, any], bool]) -> None:
+        """
+        Remove every entry matching a predicate
+        :param predicate: Function receiving the key and the value of each entry
+        """
+        with self._lock:
+            for key in [key for key, (_, value) in self._data.items() if predicate(key, value)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Get the counters of the cache
+        :return: A dictionary with the size, hits, misses, evictions and hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
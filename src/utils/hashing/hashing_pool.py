@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from passlib.context import CryptContext
+
+"""
+### hashing_pool.py ###
+
+Bounded executor that runs the CPU-bound password hashing outside the event loop.
+"""
+
+
+class HashingPoolFullError(Exception):
+    """
+    Raised when the hashing pool already has the maximum number of pending jobs
+    """
+
+
+class HashingPool:
+    """
+    Thread pool dedicated to password hashing and verification
+
+    bcrypt releases the GIL while it works, so a small thread pool is enough to keep
+    the event loop free. The number of pending jobs (running + queued) is bounded:
+    once the limit is reached new jobs are rejected instead of piling up.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int, max_pending: int) -> None:
+        self._context = context
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hashing')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password in the pool
+        :param password: The plain password
+        :return: The hashed password
+        """
+        return await self._run(self._context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a password against its hash in the pool
+        :param plain_password: The plain password
+        :param hashed_password: The stored hash
+        :return: True if the password matches
+        """
+        return await self._run(self._context.verify, plain_password, hashed_password)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the current metrics of the pool
+        :return: A dictionary with the queue depth and the counters
+        """
+        with self._lock:
+            pending = self._pending
+            return {
+                'workers': self._max_workers,
+                'max_pending': self._max_pending,
+                'running': min(pending, self._max_workers),
+                'queued': max(pending - self._max_workers, 0),
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+    async def _run(self, func: Callable, *args: any) -> any:
+        """
+        Run a function in the pool applying backpressure
+        :param func: The function to run
+        :param args: The arguments of the function
+        :return: The result of the function
+        """
+        with self._lock:
+            if self._pending >= self._max_pending:
+                self._rejected += 1
+                raise HashingPoolFullError
+            self._pending += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Awaitable
+
+import toml
+
+from db import AsyncSessionLocal
+from src.models.daily_rollup import DailyRollup
+from src.utils.cache.ttl_cache import TTLCache
+from src.utils.kpi.windowed_kpi import (
+    KPI_PREVIEW_SIZE,
+    Kpi,
+    BOOKS_KPI,
+    USERS_KPI,
+    EMERGING_AUTHORS_KPI,
+    REVIEWS_KPI,
+    window_bounds,
+    preview_filters,
+    kpi_payload,
+)
+from src.utils.schemas.dashboard_schema import DashboardSchema
+
+"""
+### dashboard.py ###
+
+Every KPI of the admin dashboard computed at once, the queries running concurrently, cached for all the admins.
+"""
+
+with open('./configs/.secrets.local.toml', 'r') as f:
+    config = toml.load(f)
+
+DASHBOARD_CACHE_TTL_SECONDS = config.get('dashboard', {}).get('DASHBOARD_CACHE_TTL_SECONDS', 30)
+
+# KPI of each field of the DashboardSchema
+DASHBOARD_KPIS = {
+    'books': BOOKS_KPI,
+    'users': USERS_KPI,
+    'emerging_authors': EMERGING_AUTHORS_KPI,
+    'reviews': REVIEWS_KPI,
+}
+
+# Dashboards by number of days, shared by every admin
+dashboard_cache = TTLCache(16, DASHBOARD_CACHE_TTL_SECONDS)
+_dashboard_lock = asyncio.Lock()
+
+
+async def _in_own_session(awaitable: Awaitable) -> any:
+    """
+    Run a query in the async session of the current task and release it afterwards
+    :param awaitable: The query
+    :return: The result of the query
+    """
+    try:
+        return await awaitable
+    finally:
+        await AsyncSessionLocal.remove()
+
+
+async def _preview(kpi: Kpi, bounds: list, preview_size: int) -> list:
+    """
+    Get the newest items of the current window of a KPI
+    """
+    return await kpi.model.list_async(
+        preview_filters(kpi, bounds),
+        order_by=('created_at', False),
+        limit=preview_size,
+        schema=kpi.schema,
+        project=True,
+    )
+
+
+async def compute_dashboard(days: int = 7, preview_size: int = KPI_PREVIEW_SIZE) -> DashboardSchema:
+    """
+    Compute every KPI of the dashboard
+
+    The totals of every KPI come from a single statement over the rollups,
+    which runs concurrently with the previews, each one in its own task and
+    therefore on its own connection.
+    :param days: The number of days of each window, today included in the current one
+    :param preview_size: The maximum number of items of the current window returned by each KPI
+    :return: The dashboard
+    """
+    bounds = window_bounds(days, 2)
+    series = [(kpi.metric, kpi.dimensions) for kpi in DASHBOARD_KPIS.values()]
+
+    totals, *previews = await asyncio.gather(
+        _in_own_session(DailyRollup.window_totals_async(series, bounds)),
+        *(_in_own_session(_preview(kpi, bounds, preview_size)) for kpi in DASHBOARD_KPIS.values()),
+    )
+
+    payload = {
+        name: kpi_payload(days, kpi_totals, preview)
+        for name, kpi_totals, preview in zip(DASHBOARD_KPIS, totals, previews, strict=True)
+    }
+
+    return DashboardSchema.model_validate(payload, from_attributes=True)
+
+
+async def get_dashboard(days: int = 7) -> DashboardSchema:
+    """
+    Get the dashboard from the cache, computing it once for all the concurrent requests when it has expired
+    :param days: The number of days of each window, today included in the current one
+    :return: The dashboard
+    """
+    dashboard = dashboard_cache.get(days)
+    if dashboard is not None:
+        return dashboard
+
+    async with _dashboard_lock:
+        dashboard = dashboard_cache.get(days)
+        if dashboard is None:
+            dashboard = await compute_dashboard(days)
+            dashboard_cache.set(days, dashboard)
+
+    return dashboard
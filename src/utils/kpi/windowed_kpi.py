@@ -0,0 +1,131 @@
+from datetime import date, datetime, timedelta
+from typing import List, NamedTuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import false
+
+from src.models.book import Book, BookBaseSchema
+from src.models.daily_rollup import DailyRollup, RollupMetric
+from src.models.review import Review, ReviewBaseSchema
+from src.models.user import User, UserBaseSchema, UserRole
+
+"""
+### windowed_kpi.py ###
+
+KPIs comparing consecutive windows of days, read from the daily rollups, plus a bounded preview of the newest items.
+"""
+
+# Number of items of the current window returned along with the counts
+KPI_PREVIEW_SIZE = 20
+
+
+class Kpi(NamedTuple):
+    """
+    Items counted by a KPI
+    """
+
+    # The model of the items, which must have a created_at column
+    model: type
+    # The conditions the items previewed must meet, matching the rollup metric and dimensions
+    filters: List
+    # The schema the preview is serialized with
+    schema: Type[BaseModel]
+    # The rollup metric counting the items
+    metric: RollupMetric
+    # The dimensions of the metric counted, or None for all of them
+    dimensions: List[str] | None = None
+
+
+BOOKS_KPI = Kpi(Book, [Book.disabled == false()], BookBaseSchema, RollupMetric.BOOKS)
+USERS_KPI = Kpi(
+    User,
+    [User.user_role == UserRole.USER.value, User.disabled == false()],
+    UserBaseSchema,
+    RollupMetric.USERS,
+    [UserRole.USER.value],
+)
+EMERGING_AUTHORS_KPI = Kpi(
+    User,
+    [User.user_role == UserRole.AUTHOR.value, User.disabled == false()],
+    UserBaseSchema,
+    RollupMetric.USERS,
+    [UserRole.AUTHOR.value],
+)
+REVIEWS_KPI = Kpi(Review, [Review.disabled == false()], ReviewBaseSchema, RollupMetric.REVIEWS)
+
+
+def window_bounds(days: int, periods: int, today: date = None) -> list[date]:
+    """
+    Get the bounds of consecutive windows of days, the newest ending today
+    :param days: The number of days of each window
+    :param periods: The number of windows
+    :param today: The last day of the newest window, defaults to the current day
+    :return: The periods + 1 bounds, newest first, each window ending the day before its bound
+    """
+    end = (today or date.today()) + timedelta(days=1)
+    return [end - timedelta(days=days) * i for i in range(periods + 1)]
+
+
+def preview_filters(kpi: Kpi, bounds: list[date]) -> List:
+    """
+    Get the conditions of the items previewed: the ones of the KPI created in the current window
+    :param kpi: The KPI
+    :param bounds: The bounds of the windows, newest first
+    :return: The conditions
+    """
+    return [kpi.model.created_at >= datetime.combine(bounds[1], datetime.min.time()), *kpi.filters]
+
+
+def kpi_payload(days: int, totals: list[int], preview: list) -> dict[str, any]:
+    """
+    Build the KPI returned to the client
+    :param days: The number of days of each window
+    :param totals: The totals of the current and the previous windows
+    :param preview: The newest items of the current window
+    :return: A dictionary matching the schema created by create_kpi_schema
+    """
+    current, previous = totals
+
+    return {
+        'days': days,
+        'total_this_week': current,
+        'total_past_week': previous,
+        'change': current - previous,
+        'change_ratio': (current - previous) / previous if previous else None,
+        'this_week': preview,
+    }
+
+
+def windowed_kpi(kpi: Kpi, days: int = 7, preview_size: int = KPI_PREVIEW_SIZE) -> dict[str, any]:
+    """
+    Compare the items created in the last days with the ones created in the days before
+
+    The totals come from the daily rollups, refreshed every ROLLUP_REFRESH_INTERVAL_SECONDS,
+    so the items written since the last refresh are not counted yet.
+    :param kpi: The KPI
+    :param days: The number of days of each window, today included in the current one
+    :param preview_size: The maximum number of items of the current window returned
+    :return: A dictionary matching the schema created by create_kpi_schema
+    """
+    bounds = window_bounds(days, 2)
+    [totals] = DailyRollup.window_totals([(kpi.metric, kpi.dimensions)], bounds)
+    preview = kpi.model.list(
+        preview_filters(kpi, bounds),
+        order_by=('created_at', False),
+        limit=preview_size,
+        schema=kpi.schema,
+        project=True,
+    )
+
+    return kpi_payload(days, totals, preview)
+
+
+def daily_trend(kpi: Kpi, days: int = 90) -> list[dict[str, any]]:
+    """
+    Get the daily totals of the last days
+    :param kpi: The KPI
+    :param days: The number of days, today included
+    :return: The day, count and average value of each day, oldest first
+    """
+    end, start = window_bounds(days, 1)
+    return DailyRollup.trend(kpi.metric, kpi.dimensions, start, end)
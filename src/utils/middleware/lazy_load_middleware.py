@@ -0,0 +1,159 @@
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+import toml
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, RelationshipProperty, Session, raiseload
+from starlette.types import ASGIApp, Scope, Receive, Send
+
+"""
+### lazy_load_middleware.py ###
+
+Development and test mode counting the lazy loads of each request, to catch N+1 queries before they ship.
+"""
+
+with open('./configs/.secrets.local.toml', 'r') as f:
+    config = toml.load(f)
+
+# "off", "log" to log the requests exceeding the threshold, or "raise" to fail them
+LAZY_LOAD_DETECTION = config.get('debug', {}).get('LAZY_LOAD_DETECTION', 'off')
+LAZY_LOAD_THRESHOLD = config.get('debug', {}).get('LAZY_LOAD_THRESHOLD', 10)
+# Make every relationship not loaded by the query raise instead of emitting SQL
+LAZY_LOAD_RAISE_ON_SQL = config.get('debug', {}).get('LAZY_LOAD_RAISE_ON_SQL', False)
+
+logger = logging.getLogger(__name__)
+
+
+class LazyLoadError(Exception):
+    """
+    Raised when a request lazy loads more relationships than the threshold allows
+    """
+
+
+class LazyLoadCounter:
+    """
+    Lazy loads emitted while the counter is active, by relationship path
+    """
+
+    def __init__(self, threshold: int, raise_on_excess: bool) -> None:
+        self.threshold = threshold
+        self.raise_on_excess = raise_on_excess
+        self.loads: Counter[str] = Counter()
+
+    @property
+    def total(self) -> int:
+        """
+        Get the number of lazy loads emitted
+        :return: The number of lazy loads
+        """
+        return sum(self.loads.values())
+
+    def record(self, path: str) -> None:
+        """
+        Record a lazy load, raising if the threshold is exceeded in raise mode
+        :param path: The path of the relationship loaded, e.g. Review.book.authors
+        """
+        self.loads[path] += 1
+        if self.raise_on_excess and self.total > self.threshold:
+            raise LazyLoadError(f'{self.total} lazy loads exceed the threshold of {self.threshold}: {self.describe()}')
+
+    def describe(self) -> str:
+        """
+        Describe the lazy loads, the most frequent first
+        :return: The relationship paths with their number of loads
+        """
+        return ', '.join(f'{path} x{count}' for path, count in self.loads.most_common())
+
+
+# Set to the counter of the request or test being checked
+lazy_load_counter: ContextVar[LazyLoadCounter | None] = ContextVar('lazy_load_counter', default=None)
+
+
+@contextmanager
+def count_lazy_loads(threshold: int = LAZY_LOAD_THRESHOLD, raise_on_excess: bool = True) -> Iterator[LazyLoadCounter]:
+    """
+    Count the lazy loads emitted inside the block, e.g. in a test:
+
+        with count_lazy_loads(threshold=0):
+            client.get('/review/friends-reviews')
+
+    :param threshold: The number of lazy loads allowed
+    :param raise_on_excess: Whether to raise a LazyLoadError once the threshold is exceeded
+    :return: The counter
+    """
+    counter = LazyLoadCounter(threshold, raise_on_excess)
+    token = lazy_load_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        lazy_load_counter.reset(token)
+
+
+def relationship_path(state: ORMExecuteState) -> str:
+    """
+    Get the path of the relationship a lazy load is loading, from the class of the parent row
+    :param state: The state of the lazy load
+    :return: The path, e.g. Review.book.authors
+    """
+    path = state.loader_strategy_path
+    elements = path.natural_path if path is not None else ()
+    keys = [element.key for element in elements if isinstance(element, RelationshipProperty)]
+    if not keys:
+        return state.lazy_loaded_from.class_.__name__
+
+    return '.'.join([elements[0].class_.__name__, *keys])
+
+
+def _on_orm_execute(state: ORMExecuteState) -> None:
+    """
+    Session event hook counting the lazy loads and, in raise on SQL mode, forbidding them
+    """
+    if not state.is_select:
+        return
+
+    if state.lazy_loaded_from is not None:
+        counter = lazy_load_counter.get()
+        if counter is not None:
+            counter.record(relationship_path(state))
+    elif LAZY_LOAD_RAISE_ON_SQL and not state.is_column_load and not state.is_relationship_load:
+        state.statement = state.statement.options(raiseload('*', sql_only=True))
+
+
+event.listen(Session, 'do_orm_execute', _on_orm_execute)
+
+
+class LazyLoadMiddleware:
+    """
+    ASGI middleware counting the lazy loads of each request
+
+    In "log" mode the requests exceeding the threshold are logged with the
+    relationship paths they lazy loaded; in "raise" mode they fail as soon
+    as the threshold is exceeded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Serve the request while counting its lazy loads
+        """
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with count_lazy_loads(LAZY_LOAD_THRESHOLD, LAZY_LOAD_DETECTION == 'raise') as counter:
+            await self.app(scope, receive, send)
+
+        if counter.total > counter.threshold:
+            logger.warning(
+                '%s %s emitted %s lazy loads (threshold %s): %s',
+                scope['method'],
+                scope['path'],
+                counter.total,
+                counter.threshold,
+                counter.describe(),
+            )
@@ -0,0 +1,115 @@
+import logging
+import os
+import resource
+import threading
+
+from starlette.types import ASGIApp, Scope, Receive, Send
+
+from db import SessionLocal, request_scope, read_only_request
+
+"""
+### session_middleware.py ###
+
+Gives each request its own SQLAlchemy session and removes it once the response has been sent.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Methods whose reads may be served by a read replica
+READ_ONLY_METHODS = ('GET', 'HEAD')
+
+
+def current_rss() -> int:
+    """
+    Get the resident set size of the worker
+    :return: The RSS in bytes
+    """
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak in kilobytes, the closest value available outside Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryStats:
+    """
+    Identity map size of the finished requests and RSS of the worker
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.total_identity_map_size = 0
+        self.last_identity_map_size = 0
+        self.max_identity_map_size = 0
+        self.last_rss = 0
+        self.peak_rss = 0
+
+    def record(self, identity_map_size: int, rss: int) -> None:
+        """
+        Record the figures of a finished request
+        :param identity_map_size: The number of objects in the session of the request
+        :param rss: The RSS of the worker after the request
+        """
+        with self._lock:
+            self.requests += 1
+            self.total_identity_map_size += identity_map_size
+            self.last_identity_map_size = identity_map_size
+            self.max_identity_map_size = max(self.max_identity_map_size, identity_map_size)
+            self.last_rss = rss
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Get the recorded figures
+        :return: A dictionary with the identity map sizes and the RSS of the worker
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'last_identity_map_size': self.last_identity_map_size,
+                'max_identity_map_size': self.max_identity_map_size,
+                'avg_identity_map_size': self.total_identity_map_size / self.requests if self.requests else 0.0,
+                'rss_bytes': current_rss(),
+                'last_request_rss_bytes': self.last_rss,
+                'peak_rss_bytes': self.peak_rss,
+            }
+
+
+memory_stats = MemoryStats()
+
+
+class SessionScopeMiddleware:
+    """
+    ASGI middleware scoping the SQLAlchemy session to the request
+
+    It is a plain ASGI middleware, not a BaseHTTPMiddleware, so the session lives
+    until the last chunk of a streamed response has been sent. It also flags the
+    read-only requests, whose reads the session may send to a replica.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Serve the request with its own session and record its memory figures
+        """
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        token = request_scope.set(object())
+        read_only_token = read_only_request.set(scope['method'] in READ_ONLY_METHODS)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            identity_map_size = len(SessionLocal().identity_map) if SessionLocal.registry.has() else 0
+            SessionLocal.remove()
+            read_only_request.reset(read_only_token)
+            request_scope.reset(token)
+
+            rss = current_rss()
+            memory_stats.record(identity_map_size, rss)
+            logger.debug('%s %s identity_map=%s rss=%s', scope['method'], scope['path'], identity_map_size, rss)
@@ -0,0 +1,191 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Scope, Receive, Send
+
+from db import engine, replica_engines, async_engine
+
+"""
+### sql_timing_middleware.py ###
+
+Counts and times the SQL statements run for each request, reports them in a Server-Timing header
+and keeps a rolling summary per route.
+"""
+
+# Number of requests of each route the summary is computed on
+SQL_SUMMARY_WINDOW = 200
+# Length at which the slowest statements are truncated in the summary
+SLOW_STATEMENT_LENGTH = 500
+# Length at which the slowest statement is truncated in the Server-Timing header
+SERVER_TIMING_STATEMENT_LENGTH = 100
+
+# Key of the connection info holding the start times of the statements being run
+STATEMENT_START = 'statement_start'
+
+
+class RequestSqlStats:
+    """
+    SQL statements run by a single request
+    """
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, duration: float) -> None:
+        """
+        Record a statement run by the request
+        :param statement: The SQL of the statement
+        :param duration: How long it took, in seconds
+        """
+        self.queries += 1
+        self.duration += duration
+        if duration > self.slowest_duration:
+            self.slowest_duration = duration
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """
+        Get the Server-Timing header value describing the statements
+
+        It holds the number of statements, their total duration and the
+        duration and beginning of the slowest one, e.g.
+        db-count;desc="3 queries", db-total;dur=4.20, db-slowest;dur=2.10;desc="SELECT book.id ..."
+        :return: The header value
+        """
+        entries = [f'db-count;desc="{self.queries} queries"', f'db-total;dur={self.duration * 1000:.2f}']
+        if self.slowest_statement is not None:
+            entries.append(
+                f'db-slowest;dur={self.slowest_duration * 1000:.2f};desc="{header_text(self.slowest_statement)}"'
+            )
+
+        return ', '.join(entries)
+
+
+def header_text(statement: str) -> str:
+    """
+    Shorten a statement to a quoted string of a header
+    :param statement: The SQL of the statement
+    :return: The beginning of the statement on a single line, without quotes, backslashes or non ASCII characters
+    """
+    text = ' '.join(statement.split())[:SERVER_TIMING_STATEMENT_LENGTH]
+
+    return text.replace('"', "'").replace('\\', '/').encode('ascii', 'replace').decode()
+
+
+# Set by the SqlTimingMiddleware to the statistics of the request being served
+request_sql_stats: ContextVar[RequestSqlStats | None] = ContextVar('request_sql_stats', default=None)
+
+
+class RouteSqlSummary:
+    """
+    Rolling summary of the SQL statements run by the last requests of each route
+    """
+
+    def __init__(self, window: int) -> None:
+        self._lock = threading.Lock()
+        self._requests: dict[str, deque[tuple[int, float]]] = defaultdict(lambda: deque(maxlen=window))
+        self._slowest: dict[str, tuple[float, str]] = {}
+
+    def record(self, route: str, stats: RequestSqlStats) -> None:
+        """
+        Record the statements of a finished request
+        :param route: The method and path template of the route
+        :param stats: The statements run by the request
+        """
+        with self._lock:
+            self._requests[route].append((stats.queries, stats.duration))
+            if stats.slowest_statement and stats.slowest_duration > self._slowest.get(route, (0.0, None))[0]:
+                self._slowest[route] = (stats.slowest_duration, stats.slowest_statement[:SLOW_STATEMENT_LENGTH])
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Get the summary of every route
+        :return: A dictionary with the query counts and database times of each route
+        """
+        with self._lock:
+            summary = {}
+            for route, requests in sorted(self._requests.items()):
+                queries = [count for count, _ in requests]
+                durations = sorted(duration for _, duration in requests)
+                slowest_duration, slowest_statement = self._slowest.get(route, (0.0, None))
+                summary[route] = {
+                    'requests': len(requests),
+                    'avg_queries': sum(queries) / len(requests),
+                    'max_queries': max(queries),
+                    'avg_db_ms': sum(durations) / len(requests) * 1000,
+                    'p95_db_ms': durations[math.ceil(0.95 * len(durations)) - 1] * 1000,
+                    'slowest_statement_ms': slowest_duration * 1000,
+                    'slowest_statement': slowest_statement,
+                }
+
+            return summary
+
+
+route_sql_summary = RouteSqlSummary(SQL_SUMMARY_WINDOW)
+
+
+def _before_cursor_execute(conn: any, _cursor: any, _statement: str, *_args: any) -> None:
+    """
+    Engine event hook storing the start time of a statement
+    """
+    conn.info.setdefault(STATEMENT_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: any, _cursor: any, statement: str, *_args: any) -> None:
+    """
+    Engine event hook recording a statement in the statistics of the current request
+    """
+    duration = time.perf_counter() - conn.info[STATEMENT_START].pop()
+    stats = request_sql_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+for _engine in (engine, *replica_engines, async_engine.sync_engine):
+    event.listen(_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(_engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+class SqlTimingMiddleware:
+    """
+    ASGI middleware measuring the SQL statements of each request
+
+    The Server-Timing header covers the statements run until the response
+    starts; the route summary also covers those run while it is streamed.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Serve the request while collecting the statistics of its statements
+        """
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSqlStats()
+        token = request_sql_stats.set(stats)
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).append('Server-Timing', stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            request_sql_stats.reset(token)
+
+            route = scope.get('route')
+            if route is not None:
+                route_sql_summary.record(f'{scope["method"]} {route.path}', stats)
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+
+class BulkIdsSchema(BaseModel):
+    """
+    Ids of the items affected by a bulk operation
+    """
+
+    ids: list[int] = Field(min_length=1)
+
+
+class BulkResultSchema(BaseModel):
+    """
+    Result of a bulk operation
+    """
+
+    updated: int
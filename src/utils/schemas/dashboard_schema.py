@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+from src.models.book import BookBaseSchema
+from src.models.review import ReviewBaseSchema
+from src.models.user import UserBaseSchema
+from src.utils.schemas.kpi_schema import create_kpi_schema
+
+BookKpiSchema = create_kpi_schema(BookBaseSchema)
+UserKpiSchema = create_kpi_schema(UserBaseSchema)
+ReviewKpiSchema = create_kpi_schema(ReviewBaseSchema)
+
+
+class DashboardSchema(BaseModel):
+    """
+    Every KPI of the admin dashboard
+    """
+
+    books: BookKpiSchema
+    users: UserKpiSchema
+    emerging_authors: UserKpiSchema
+    reviews: ReviewKpiSchema
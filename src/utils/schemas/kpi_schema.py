@@ -1,10 +1,24 @@
-from black import List
+from functools import lru_cache
+from typing import Optional, Type
+
 from pydantic import BaseModel, create_model
-from typing import Type
 
 
+@lru_cache(maxsize=None)
 def create_kpi_schema(base_schema: Type[BaseModel]) -> Type[BaseModel]:
     """
     Create a schema for the KPIs using a dynamic schema
+
+    The "week" fields hold the current and the previous window, whose length is given by days.
+    this_week only previews the newest items of the current window, total_this_week counts them all.
+    The schema is created once per base schema, so its name is unique in the OpenAPI document.
     """
-    return create_model('KpiSchema', total_past_week=(int, ...), this_week=(List[base_schema], ...))
+    return create_model(
+        base_schema.__name__.replace('BaseSchema', 'KpiSchema'),
+        days=(int, ...),
+        total_this_week=(int, ...),
+        total_past_week=(int, ...),
+        change=(int, ...),
+        change_ratio=(Optional[float], ...),
+        this_week=(list[base_schema], ...),
+    )
@@ -0,0 +1,22 @@
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class SuggestionKind(Enum):
+    """
+    Kind of item suggested
+    """
+
+    BOOK = 'BOOK'
+    AUTHOR = 'AUTHOR'
+
+
+class SuggestionSchema(BaseModel):
+    """
+    Book title or author name suggested for what the user is typing
+    """
+
+    kind: SuggestionKind
+    id: int
+    text: str
@@ -0,0 +1,118 @@
+import toml
+from sqlalchemy import ColumnElement, Select, false, func, literal, select, union_all
+
+from src.models.author import Author
+from src.models.book import Book
+from src.utils.cache.query_cache import query_cache
+from src.utils.cache.ttl_cache import TTLCache
+from src.utils.schemas.suggestion_schema import SuggestionKind
+
+"""
+### suggestions.py ###
+
+Typo tolerant autocomplete of the book titles and the author names, served from memory for the most typed prefixes.
+"""
+
+with open('./configs/.secrets.local.toml', 'r') as f:
+    config = toml.load(f)
+
+SUGGESTION_CACHE_SIZE = config.get('search', {}).get('SUGGESTION_CACHE_SIZE', 10000)
+SUGGESTION_CACHE_TTL_SECONDS = config.get('search', {}).get('SUGGESTION_CACHE_TTL_SECONDS', 300)
+
+# Models suggested, the cached suggestions being dropped as soon as one of them is written
+SUGGESTED_MODELS = (Book, Author)
+
+# Suggestions by prefix and limit, with the generations of the suggested models they were read at
+suggestion_cache = TTLCache(SUGGESTION_CACHE_SIZE, SUGGESTION_CACHE_TTL_SECONDS)
+
+
+def normalize_prefix(text: str) -> str:
+    """
+    Normalize what the user typed, so the variants of a prefix share their cache entry
+    :param text: The text typed
+    :return: The text in lower case, with its whitespace collapsed
+    """
+    return ' '.join(text.split()).lower()
+
+
+def _candidates(kind: SuggestionKind, model: type, column: ColumnElement, prefix: str, limit: int) -> Select:
+    """
+    Build the statement finding the best suggestions of a column
+
+    The trigram operator %> matches the texts containing a word similar to
+    the prefix, through the GIN index of the column, so misspelled prefixes
+    are still matched. The texts starting with the prefix are ranked first.
+    """
+    pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    starts_with = column.ilike(pattern, escape='\\')
+    score = func.word_similarity(prefix, column)
+
+    return (
+        select(
+            literal(kind.value).label('kind'),
+            model.id.label('id'),
+            column.label('text'),
+            starts_with.label('starts_with'),
+            score.label('score'),
+        )
+        .where(column.bool_op('%>')(prefix), model.disabled == false())
+        .order_by(starts_with.desc(), score.desc())
+        .limit(limit)
+    )
+
+
+def suggestion_statement(prefix: str, limit: int) -> Select:
+    """
+    Build the single statement finding the book titles and author names most similar to a prefix
+    :param prefix: The normalized prefix
+    :param limit: The maximum number of suggestions
+    :return: The select statement of the kind, id and text of the suggestions, the best first
+    """
+    candidates = union_all(
+        _candidates(SuggestionKind.BOOK, Book, Book.title, prefix, limit),
+        _candidates(SuggestionKind.AUTHOR, Author, Author.full_name, prefix, limit),
+    ).subquery()
+
+    return (
+        select(candidates.c.kind, candidates.c.id, candidates.c.text)
+        .order_by(candidates.c.starts_with.desc(), candidates.c.score.desc(), candidates.c.kind, candidates.c.id)
+        .limit(limit)
+    )
+
+
+def find_suggestions(prefix: str, limit: int) -> list[dict[str, any]]:
+    """
+    Find the book titles and author names most similar to a prefix
+    :param prefix: The normalized prefix
+    :param limit: The maximum number of suggestions
+    :return: The kind, id and text of the suggestions, the best first
+    """
+    return [
+        {'kind': SuggestionKind(kind), 'id': item_id, 'text': text.strip()}
+        for kind, item_id, text in Book.session.execute(suggestion_statement(prefix, limit))
+    ]
+
+
+def suggest(text: str, limit: int) -> list[dict[str, any]]:
+    """
+    Get the suggestions of a prefix, from the cache unless a book or an author was written since they were read
+
+    The cache relies on the generations of the query cache, which change
+    whenever a suggested model is written, either through the ORM or through
+    a bulk update, and once more when the writing transaction commits.
+    :param text: The text typed by the user
+    :param limit: The maximum number of suggestions
+    :return: The kind, id and text of the suggestions, the best first
+    """
+    prefix = normalize_prefix(text)
+    generations = tuple(query_cache.generation(model.__name__) for model in SUGGESTED_MODELS)
+
+    cached = suggestion_cache.get((prefix, limit))
+    if cached is not None and cached[0] == generations:
+        return cached[1]
+
+    suggestions = find_suggestions(prefix, limit)
+    # Stored with the generations read before the query, so a write racing with it makes the entry stale at once
+    suggestion_cache.set((prefix, limit), (generations, suggestions))
+
+    return suggestions
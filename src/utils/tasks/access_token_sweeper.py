@@ -0,0 +1,67 @@
+import asyncio
+import logging
+
+import toml
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.models.access_token import AccessToken
+
+"""
+### access_token_sweeper.py ###
+
+Background task that removes the expired rows of the access_token table.
+"""
+
+with open('./configs/.secrets.local.toml', 'r') as f:
+    config = toml.load(f)
+
+ACCESS_TOKEN_SWEEP_INTERVAL_SECONDS = config['auth'].get('ACCESS_TOKEN_SWEEP_INTERVAL_SECONDS', 3600)
+ACCESS_TOKEN_SWEEP_BATCH_SIZE = config['auth'].get('ACCESS_TOKEN_SWEEP_BATCH_SIZE', 1000)
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_expired_access_tokens(batch_size: int = ACCESS_TOKEN_SWEEP_BATCH_SIZE) -> int:
+    """
+    Delete every expired access token in batches so no single statement holds locks for long
+    :param batch_size: The number of tokens deleted per statement
+    :return: The number of deleted tokens
+    """
+    total = 0
+    try:
+        while True:
+            deleted = AccessToken.delete_expired(batch_size)
+            total += deleted
+            if deleted < batch_size:
+                break
+
+        # Rebuild the filter so the tokens that have just expired stop taking space in it
+        AccessToken.load_revocation_filter()
+        return total
+    finally:
+        AccessToken.session.remove()
+
+
+async def run_access_token_sweeper(interval: float = ACCESS_TOKEN_SWEEP_INTERVAL_SECONDS) -> None:
+    """
+    Sweep the expired access tokens periodically outside the event loop
+    :param interval: Seconds between two sweeps
+    """
+    while True:
+        try:
+            deleted = await asyncio.to_thread(sweep_expired_access_tokens)
+            logger.info('Deleted %s expired access tokens', deleted)
+        except SQLAlchemyError:
+            logger.exception('Could not sweep the expired access tokens')
+
+        await asyncio.sleep(interval)
+
+
+def load_revocation_filter() -> None:
+    """
+    Load the revocation filter from the database, used when the application starts
+    """
+    try:
+        AccessToken.load_revocation_filter()
+    finally:
+        AccessToken.session.remove()
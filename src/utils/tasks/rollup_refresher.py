@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Callable
+
+import toml
+from sqlalchemy import Date, event, false, func, literal, null, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.models.daily_rollup import DailyRollup, RollupMetric, RollupStaleDay, RollupState
+
+# The user model is imported first, as in alembic/env.py, since importing the book model first is circular
+from src.models.user import User
+from src.models.book import Book
+from src.models.review import Review
+
+"""
+### rollup_refresher.py ###
+
+Background task keeping the daily rollups up to date, and command to backfill them:
+
+    python -m src.utils.tasks.rollup_refresher --start 2024-01-01
+"""
+
+with open('./configs/.secrets.local.toml', 'r') as f:
+    config = toml.load(f)
+
+ROLLUP_REFRESH_INTERVAL_SECONDS = config['database'].get('ROLLUP_REFRESH_INTERVAL_SECONDS', 300)
+
+# Rows modified this long before the last refresh are checked again, in case their transaction committed late
+ROLLUP_REFRESH_MARGIN = timedelta(minutes=10)
+
+# Model, dimension column and summed column of each metric
+ROLLUP_METRICS = {
+    RollupMetric.USERS: (User, User.user_role, None),
+    RollupMetric.BOOKS: (Book, Book.status, None),
+    RollupMetric.REVIEWS: (Review, None, Review.rating),
+}
+
+# Key of the Postgres advisory lock held while the rollups are written, so a single worker refreshes them at a time
+ROLLUP_LOCK_KEY = 482_117_305
+
+logger = logging.getLogger(__name__)
+
+
+def rollup_rows(metric: RollupMetric, start: date, end: date) -> list[dict[str, any]]:
+    """
+    Compute the rollups of a metric from the items created in a range of days
+    :param metric: The metric
+    :param start: The first day
+    :param end: The day after the last one
+    :return: The rollups of the days with items, with their day, dimension, item_count and value_sum
+    """
+    model, dimension, value = ROLLUP_METRICS[metric]
+    day = func.date(model.created_at, type_=Date)
+    value_sum = func.coalesce(func.sum(value), 0) if value is not None else null()
+
+    qry = (
+        select(day, dimension if dimension is not None else literal(''), func.count(), value_sum)
+        .where(
+            model.created_at >= datetime.combine(start, datetime.min.time()),
+            model.created_at < datetime.combine(end, datetime.min.time()),
+            model.disabled == false(),
+        )
+        .group_by(day, *([dimension] if dimension is not None else []))
+    )
+
+    rows = []
+    for row_day, row_dimension, count, total in model.session.execute(qry):
+        # The dimensions are enums, stored by their value
+        dimension_value = getattr(row_dimension, 'value', row_dimension)
+        rows.append({'day': row_day, 'dimension': dimension_value, 'item_count': count, 'value_sum': total})
+
+    return rows
+
+
+def dirty_days(since: datetime | None) -> set[tuple[RollupMetric, date]]:
+    """
+    Get the days whose rollups may be stale: the creation days of the items written since a time
+    :param since: The time, or None for the days of every item
+    :return: The metrics and days to recompute
+    """
+    days = set()
+    for metric, (model, _, _) in ROLLUP_METRICS.items():
+        qry = select(func.date(model.created_at, type_=Date)).distinct().where(model.created_at.is_not(None))
+        if since is not None:
+            qry = qry.where(model.modified_at >= since)
+        days.update((metric, day) for day in model.session.scalars(qry))
+
+    return days
+
+
+def day_ranges(days: list[date]) -> list[tuple[date, date]]:
+    """
+    Group days into ranges of consecutive days
+    :param days: The days
+    :return: The first day and the day after the last one of each range
+    """
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1] = (ranges[-1][0], day + timedelta(days=1))
+        else:
+            ranges.append((day, day + timedelta(days=1)))
+
+    return ranges
+
+
+def lock_rollups(wait: bool) -> bool:
+    """
+    Take the advisory lock of the rollups until the end of the current transaction
+
+    Only Postgres has advisory locks; the other databases are only used by a
+    single process, so the lock is always granted.
+    :param wait: Whether to wait for the lock instead of giving up if another transaction holds it
+    :return: Whether the lock was taken
+    """
+    if DailyRollup.session.get_bind().dialect.name != 'postgresql':
+        return True
+
+    if wait:
+        DailyRollup.session.execute(select(func.pg_advisory_xact_lock(ROLLUP_LOCK_KEY)))
+        return True
+
+    return DailyRollup.session.scalar(select(func.pg_try_advisory_xact_lock(ROLLUP_LOCK_KEY)))
+
+
+def recompute_rollups(days: set[tuple[RollupMetric, date]]) -> None:
+    """
+    Recompute the rollups of some days, without committing
+    :param days: The metrics and days to recompute
+    """
+    for metric in ROLLUP_METRICS:
+        for start, end in day_ranges([day for day_metric, day in days if day_metric == metric]):
+            DailyRollup.replace(metric, start, end, rollup_rows(metric, start, end))
+
+
+def refresh_rollups() -> int | None:
+    """
+    Recompute the rollups of the days with items written or deleted since the last refresh
+
+    The refresh runs in a single transaction holding the advisory lock of the
+    rollups: the other workers skip their refresh meanwhile, and the rollups,
+    the stale days consumed and the new watermark are committed together.
+    :return: The number of days recomputed, or None if another worker is refreshing the rollups
+    """
+    try:
+        if not lock_rollups(wait=False):
+            return None
+
+        watermark = RollupState.watermark()
+        stale_ids, stale_days = RollupStaleDay.pending()
+        days = dirty_days(watermark - ROLLUP_REFRESH_MARGIN if watermark else None) | stale_days
+        recompute_rollups(days)
+        RollupStaleDay.clear(stale_ids)
+        RollupState.advance()
+        DailyRollup.session.commit()
+
+        return len(days)
+    finally:
+        DailyRollup.session.remove()
+
+
+def backfill_rollups(start: date = None, end: date = None) -> int:
+    """
+    Recompute the rollups of a range of days, used once the table is created or to repair it
+    :param start: The first day, defaults to the day of the oldest item
+    :param end: The day after the last one, defaults to tomorrow
+    :return: The number of rollups written
+    """
+    end = end or date.today() + timedelta(days=1)
+    written = 0
+    try:
+        lock_rollups(wait=True)
+        for metric, (model, _, _) in ROLLUP_METRICS.items():
+            first = start or model.session.scalar(select(func.min(func.date(model.created_at, type_=Date))))
+            if first is None:
+                continue
+            rows = rollup_rows(metric, first, end)
+            DailyRollup.replace(metric, first, end, rows)
+            written += len(rows)
+
+        DailyRollup.session.commit()
+        return written
+    finally:
+        DailyRollup.session.remove()
+
+
+async def run_rollup_refresher(interval: float = ROLLUP_REFRESH_INTERVAL_SECONDS) -> None:
+    """
+    Refresh the rollups periodically outside the event loop
+    :param interval: Seconds between two refreshes
+    """
+    while True:
+        try:
+            days = await asyncio.to_thread(refresh_rollups)
+            if days is None:
+                logger.info('Another worker is refreshing the rollups')
+            else:
+                logger.info('Refreshed the rollups of %s days', days)
+        except SQLAlchemyError:
+            logger.exception('Could not refresh the rollups')
+
+        await asyncio.sleep(interval)
+
+
+def _on_delete(metric: RollupMetric) -> Callable:
+    """
+    Get a mapper event hook recording the creation day of the deleted items as stale
+    """
+
+    def on_delete(mapper: any, connection: any, target: any) -> None:
+        RollupStaleDay.record(connection, mapper, metric, target)
+
+    return on_delete
+
+
+# Before the delete, while the creation day of the item can still be read
+for _metric, (_model, _, _) in ROLLUP_METRICS.items():
+    event.listen(_model, 'before_delete', _on_delete(_metric))
+
+
+if __name__ == '__main__':
+    # The models related to the ones rolled up have to be mapped too, as they are when the application runs
+    from src.models.book_list import BookList  # noqa: F401
+    from src.models.notification import Notification  # noqa: F401
+
+    parser = argparse.ArgumentParser(description='Backfill the daily rollups')
+    parser.add_argument('--start', type=date.fromisoformat, help='First day, defaults to the day of the oldest item')
+    parser.add_argument('--end', type=date.fromisoformat, help='Day after the last one, defaults to tomorrow')
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info('Wrote %s rollups', backfill_rollups(arguments.start, arguments.end))
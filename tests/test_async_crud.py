@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import event, false, insert
+
+from conftest import POSTGRES, report
+from db import AsyncSessionLocal, async_engine, engine
+from src.models.genre import Genre
+
+"""
+### test_async_crud.py ###
+
+Benchmark of concurrent lists: the async CRUD API waits for the database without blocking the event loop, so the
+requests served by a worker overlap their round trips instead of queuing behind each other.
+
+The round trips are simulated by a pause on each statement, run in the thread executing it: the event loop for the
+synchronous driver, the thread of aiosqlite for the async one.
+"""
+
+ROUND_TRIP = 0.02
+CONCURRENT_REQUESTS = 20
+GENRES = 50
+
+
+@pytest.fixture()
+def round_trips() -> None:
+    """
+    Slow every statement down by ROUND_TRIP, on the connections opened during the test
+    """
+
+    def pause(_statement: str) -> None:
+        time.sleep(ROUND_TRIP)
+
+    def on_connect(dbapi_connection: any, _record: any) -> None:
+        dbapi_connection.set_trace_callback(pause)
+
+    def on_async_connect(dbapi_connection: any, _record: any) -> None:
+        dbapi_connection.await_(dbapi_connection._connection.set_trace_callback(pause))
+
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+    event.listen(engine, 'connect', on_connect)
+    event.listen(async_engine.sync_engine, 'connect', on_async_connect)
+    yield
+    event.remove(engine, 'connect', on_connect)
+    event.remove(async_engine.sync_engine, 'connect', on_async_connect)
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+
+
+async def list_blocking() -> list[Genre]:
+    """
+    List the genres as the handlers did before, with the synchronous API
+    """
+    try:
+        return Genre.list([Genre.disabled == false()], ('name', True))
+    finally:
+        Genre.session.remove()
+
+
+async def list_non_blocking() -> list[Genre]:
+    """
+    List the genres with the async API, in the session of the current task
+    """
+    try:
+        return await Genre.list_async([Genre.disabled == false()], ('name', True))
+    finally:
+        await AsyncSessionLocal.remove()
+
+
+def throughput(list_genres: callable) -> float:
+    """
+    Serve concurrent lists in one event loop
+    :return: The number of lists served per second
+    """
+
+    async def serve() -> float:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(list_genres() for _ in range(CONCURRENT_REQUESTS)))
+        assert all(len(genres) == GENRES for genres in results)
+        return CONCURRENT_REQUESTS / (time.perf_counter() - start)
+
+    return asyncio.run(serve())
+
+
+@pytest.mark.skipif(POSTGRES, reason='the round trips are simulated on SQLite only')
+def test_async_lists_overlap_their_round_trips(round_trips):
+    Genre.session.execute(insert(Genre), [{'name': f'Genre {index}'} for index in range(GENRES)])
+    Genre.session.commit()
+
+    # Warm up the pools, so the connections are not opened during the measures
+    throughput(list_blocking)
+    throughput(list_non_blocking)
+    blocking = throughput(list_blocking)
+    non_blocking = throughput(list_non_blocking)
+
+    report(f'{CONCURRENT_REQUESTS} concurrent genre lists, sync API: {blocking:.0f} lists/s')
+    report(f'{CONCURRENT_REQUESTS} concurrent genre lists, async API: {non_blocking:.0f} lists/s')
+    assert non_blocking > blocking * 2
+
+
+def test_async_genre_route(client, admin, auth_headers):
+    Genre.session.execute(insert(Genre), [{'name': 'Poetry'}, {'name': 'Essay'}])
+    Genre.session.commit()
+
+    response = client.get('/genre/', headers=auth_headers(admin))
+
+    assert response.status_code == 200
+    assert [genre['name'] for genre in response.json()] == ['Essay', 'Poetry']
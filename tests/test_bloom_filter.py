@@ -0,0 +1,70 @@
+import threading
+
+from src.utils.cache.bloom_filter import BloomFilter
+
+"""
+### test_bloom_filter.py ###
+
+The keys added while the filter is rebuilt, e.g. a logout committed after the rebuild read the revoked tokens, are
+kept by the new content of the filter.
+"""
+
+CAPACITY = 1000
+ERROR_RATE = 0.001
+
+
+def test_reset_replaces_the_keys():
+    bloom_filter = BloomFilter(CAPACITY, ERROR_RATE)
+    bloom_filter.add('expired')
+
+    bloom_filter.reset(lambda: ['revoked'])
+
+    assert 'revoked' in bloom_filter
+    assert 'expired' not in bloom_filter
+    assert bloom_filter.count == 1
+
+
+def test_keys_added_during_the_reset_are_kept():
+    bloom_filter = BloomFilter(CAPACITY, ERROR_RATE)
+
+    def load() -> list[str]:
+        # The source was read, then a key is added before the new bits are swapped in
+        keys = ['revoked']
+        bloom_filter.add('logged out')
+        return keys
+
+    bloom_filter.reset(load)
+
+    assert 'revoked' in bloom_filter
+    assert 'logged out' in bloom_filter
+    assert bloom_filter.count == 2
+
+    bloom_filter.reset(list)
+
+    assert 'logged out' not in bloom_filter
+
+
+def test_keys_added_from_another_thread_during_the_reset_are_kept():
+    bloom_filter = BloomFilter(CAPACITY, ERROR_RATE)
+    loading = threading.Event()
+    added = threading.Event()
+    keys = [f'token {index}' for index in range(100)]
+
+    def add_keys() -> None:
+        loading.wait()
+        for key in keys:
+            bloom_filter.add(key)
+        added.set()
+
+    def load() -> list[str]:
+        loading.set()
+        added.wait()
+        return ['revoked']
+
+    thread = threading.Thread(target=add_keys)
+    thread.start()
+    bloom_filter.reset(load)
+    thread.join()
+
+    assert 'revoked' in bloom_filter
+    assert all(key in bloom_filter for key in keys)
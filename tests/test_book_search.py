@@ -0,0 +1,77 @@
+import statistics
+
+from sqlalchemy import false, or_, select, text
+
+from conftest import percentile, postgres_only, report, scaled, timed
+from src.models.book import Book
+
+"""
+### test_book_search.py ###
+
+Benchmark of the full-text search of the books, served by the GIN index of their search vector, against the ILIKE
+scan of the titles and overviews it replaces. Postgres only, e.g. with BENCHMARK_SCALE=50 for a million books.
+"""
+
+BOOKS = 20000
+SEARCHES = 20
+
+
+def prepare_catalog(make_catalog: callable) -> list[int]:
+    """
+    Insert a catalog where a rare word is in the title of one book and in the overview of another
+    """
+    book_ids = make_catalog(scaled(BOOKS))
+    Book.update_where([Book.id.in_(book_ids)], {'publication_year': 2000, 'pages': 100}, None)
+    Book.update_where([Book.id == book_ids[-1]], {'overview': 'A sailor lost in the zephyr'}, None)
+    Book.update_where([Book.id == book_ids[-2]], {'title': 'Zephyr'}, None)
+    Book.session.execute(text('ANALYZE book'))
+    Book.session.commit()
+
+    return book_ids
+
+
+@postgres_only
+def test_search_ranks_the_titles_first(client, admin, auth_headers, make_catalog):
+    book_ids = prepare_catalog(make_catalog)
+
+    response = client.get('/book/search', params={'q': 'zephyr'}, headers=auth_headers(admin))
+
+    assert response.status_code == 200
+    assert [book['id'] for book in response.json()] == [book_ids[-2], book_ids[-1]]
+
+
+@postgres_only
+def test_search_uses_the_gin_index(make_catalog):
+    prepare_catalog(make_catalog)
+
+    qry = select(Book.id).where(Book.search_filter(Book.search_query('zephyr')))
+    sql = str(qry.compile(Book.session.bind, compile_kwargs={'literal_binds': True}))
+    plan = ' '.join(str(row) for row in Book.session.execute(text('EXPLAIN ' + sql)))
+
+    assert 'ix_book_search_vector' in plan
+
+
+@postgres_only
+def test_search_latency(client, admin, auth_headers, make_catalog):
+    prepare_catalog(make_catalog)
+    headers = auth_headers(admin)
+    query = Book.search_query('zephyr')
+    search = (
+        select(Book.id)
+        .where(Book.search_filter(query), Book.disabled == false())
+        .order_by(Book.search_rank(query).desc())
+        .limit(100)
+    )
+    pattern = '%zephyr%'
+    scan = select(Book.id).where(or_(Book.title.ilike(pattern), Book.overview.ilike(pattern)), Book.disabled == false())
+
+    searches = timed(lambda: Book.session.execute(search).all(), SEARCHES)
+    scans = timed(lambda: Book.session.execute(scan).all(), SEARCHES)
+    requests = timed(lambda: client.get('/book/search', params={'q': 'zephyr'}, headers=headers), SEARCHES)
+
+    report(
+        f'book search, {scaled(BOOKS)} books: query p50 {statistics.median(searches) * 1000:.1f} ms, '
+        f'request p50 {statistics.median(requests) * 1000:.1f} ms, p95 {percentile(requests, 0.95) * 1000:.1f} ms'
+    )
+    report(f'ILIKE scan, {scaled(BOOKS)} books: query p50 {statistics.median(scans) * 1000:.1f} ms')
+    assert statistics.median(searches) < statistics.median(scans)
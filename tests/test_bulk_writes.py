@@ -0,0 +1,94 @@
+import math
+import time
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import func, select
+
+from conftest import count_queries, report, scaled
+from src.models.genre import Genre
+from src.models.user import User
+
+"""
+### test_bulk_writes.py ###
+
+Benchmark of the bulk writes: insert_many and update_many send their rows in batched statements and commit once,
+where writing the items one by one costs a statement and a commit each. The bulk writes fill the same audit columns.
+"""
+
+ROWS = 1000
+BATCH_SIZE = 1000
+
+
+def rows_per_second(write: Callable[[], any], rows: int) -> float:
+    """
+    Time a write of several rows
+    :return: The number of rows written per second
+    """
+    start = time.perf_counter()
+    write()
+    duration = time.perf_counter() - start
+    Genre.session.remove()
+
+    return rows / duration
+
+
+def test_insert_many_batches_the_rows(admin):
+    admin_id = admin.id
+    rows = scaled(ROWS)
+    values = [{'name': f'Genre {index}', 'description': 'Bulk'} for index in range(rows)]
+
+    def insert_one_by_one() -> None:
+        for index in range(rows):
+            Genre(name=f'Genre {index}', description='One by one').insert(admin_id)
+
+    one_by_one = rows_per_second(insert_one_by_one, rows)
+    with count_queries() as stats:
+        bulk = rows_per_second(lambda: Genre.insert_many(values, admin_id), rows)
+
+    report(f'insert of {rows} genres, one by one: {one_by_one:.0f} rows/s')
+    report(f'insert of {rows} genres, insert_many: {bulk:.0f} rows/s')
+    # insertmanyvalues sends the rows in batches of a thousand
+    assert stats.queries <= math.ceil(rows / BATCH_SIZE)
+    assert Genre.session.scalar(select(func.count()).where(Genre.description == 'Bulk')) == rows
+    assert bulk > one_by_one * 5
+
+
+def test_update_many_batches_the_rows(admin):
+    admin_id = admin.id
+    rows = scaled(ROWS)
+    genres = Genre.insert_many([{'name': f'Genre {index}'} for index in range(rows)], admin_id)
+    genre_ids = [genre.id for genre in genres]
+    Genre.session.remove()
+
+    def update_one_by_one() -> None:
+        for genre in Genre.find_many(genre_ids)[0]:
+            genre.update({'description': 'One by one'}, admin_id)
+
+    one_by_one = rows_per_second(update_one_by_one, rows)
+    bulk = rows_per_second(
+        lambda: Genre.update_many([{'id': genre_id, 'description': 'Bulk'} for genre_id in genre_ids], admin_id), rows
+    )
+
+    report(f'update of {rows} genres, one by one: {one_by_one:.0f} rows/s')
+    report(f'update of {rows} genres, update_many: {bulk:.0f} rows/s')
+    assert Genre.session.scalar(select(func.count()).where(Genre.description == 'Bulk')) == rows
+    assert bulk > one_by_one * 5
+
+
+def test_bulk_user_toggles_fill_the_audit_columns(client, admin, auth_headers, make_users):
+    admin_id = admin.id
+    headers = auth_headers(admin)
+    user_ids = make_users(3)
+    User.update_where([User.id.in_(user_ids)], {'modified_at': datetime(2000, 1, 1)}, None)
+
+    for action, disabled in (('deactivate', True), ('activate', False)):
+        response = client.put(f'/user/bulk/{action}', json={'ids': user_ids}, headers=headers)
+        assert response.json() == {'updated': len(user_ids)}
+
+        User.session.remove()
+        for user in User.find_many(user_ids)[0]:
+            assert user.disabled is disabled
+            assert user.disabled_by == (admin_id if disabled else None)
+            assert user.modified_by == admin_id
+            assert user.modified_at.year > 2000
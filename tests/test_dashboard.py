@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import insert
+
+from src.models.book import Book
+from src.models.review import Review
+from src.models.user import UserRole, User
+from src.utils.kpi import dashboard
+from src.utils.kpi.dashboard import dashboard_cache
+from src.utils.tasks.rollup_refresher import refresh_rollups
+
+"""
+### test_dashboard.py ###
+
+The dashboard gathers the four KPIs of the admins in a single request, computed once for all of them until its cache
+expires.
+"""
+
+# Endpoint of each KPI of the dashboard
+KPI_ENDPOINTS = {
+    'books': '/book/books-last-seven-days/',
+    'users': '/user/users-last-seven-days/',
+    'emerging_authors': '/user/emerging-last-seven-days/',
+    'reviews': '/review/reviews-last-seven-days/',
+}
+
+
+@pytest.fixture()
+def activity(make_users, make_catalog) -> None:
+    """
+    Insert users, authors, books and reviews created today, then refresh the rollups the counts are read from
+    """
+    user_ids = make_users(3)
+    make_users(2, UserRole.AUTHOR, 'author')
+    book_ids = make_catalog(4)
+    Book.update_where([Book.id.in_(book_ids)], {'publication_year': 2000, 'pages': 100}, None)
+    Review.session.execute(
+        insert(Review),
+        [
+            {'title': f'Review {index}', 'content': 'Content', 'rating': 4, 'book_id': book_id, 'user_id': user_id}
+            for index, (book_id, user_id) in enumerate(zip(book_ids, user_ids))
+        ],
+    )
+    Review.session.commit()
+    refresh_rollups()
+    dashboard_cache.clear()
+
+
+def test_dashboard_matches_the_kpi_endpoints(activity, client, admin, auth_headers):
+    headers = auth_headers(admin)
+
+    response = client.get('/dashboard/', headers=headers)
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert [payload[name]['total_this_week'] for name in KPI_ENDPOINTS] == [4, 3, 2, 3]
+    for name, endpoint in KPI_ENDPOINTS.items():
+        assert payload[name] == client.get(endpoint, headers=headers).json()
+
+
+def test_dashboard_is_computed_once_for_every_admin(activity, client, make_users, auth_headers, monkeypatch):
+    computations = []
+    compute_dashboard = dashboard.compute_dashboard
+
+    async def counted_compute_dashboard(*args) -> dashboard.DashboardSchema:
+        computations.append(args)
+        return await compute_dashboard(*args)
+
+    monkeypatch.setattr(dashboard, 'compute_dashboard', counted_compute_dashboard)
+    first, second = [auth_headers(user) for user in User.find_many(make_users(2, UserRole.ADMIN, 'admin'))[0]]
+
+    first_response = client.get('/dashboard/', headers=first)
+    second_response = client.get('/dashboard/', headers=second)
+
+    assert second_response.json() == first_response.json()
+    assert len(computations) == 1
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import httpx
+
+import main
+from conftest import PASSWORD, percentile, report, timed
+from src.routers.auth import auth
+from src.utils.hashing.hashing_pool import HashingPool, HashingPoolFullError
+
+"""
+### test_hashing_pool.py ###
+
+Load test of the logins: bcrypt runs in the hashing pool, so a burst of logins no longer stalls the other requests
+served by the same event loop.
+"""
+
+LOGINS = 8
+PROBE_INTERVAL = 0.005
+
+
+async def health_latencies_during_logins(emails: list[str]) -> list[float]:
+    """
+    Send a burst of logins while probing the health endpoint
+    :return: The latencies of the health checks sent during the burst, in seconds
+    """
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        burst_done = asyncio.Event()
+        latencies = []
+
+        async def probe() -> None:
+            while not burst_done.is_set():
+                # A health check arrives every PROBE_INTERVAL, its latency includes the time it waits for the loop
+                start = time.perf_counter()
+                await asyncio.sleep(PROBE_INTERVAL)
+                await client.get('/health/')
+                latencies.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+        async def login(email: str) -> None:
+            response = await client.post('/auth/login', data={'username': email, 'password': PASSWORD})
+            assert response.status_code == 200
+
+        prober = asyncio.create_task(probe())
+        await asyncio.gather(*(login(email) for email in emails))
+        burst_done.set()
+        await prober
+
+    return latencies
+
+
+def test_login_burst_does_not_stall_other_requests(make_users, password_hash, monkeypatch):
+    make_users(LOGINS)
+    emails = [f'user{index}@legein.test' for index in range(LOGINS)]
+    verify_duration = min(timed(lambda: auth.pwd_context.verify(PASSWORD, password_hash), 3))
+
+    pooled = asyncio.run(health_latencies_during_logins(emails))
+
+    async def verify_in_event_loop(plain_password: str, hashed_password: str) -> bool:
+        return auth.pwd_context.verify(plain_password, hashed_password)
+
+    # The previous implementation, verifying the passwords in the event loop
+    monkeypatch.setattr(auth, 'verify_password', verify_in_event_loop)
+    blocking = asyncio.run(health_latencies_during_logins(emails))
+
+    report(f'bcrypt verification: {verify_duration * 1000:.0f} ms')
+    report(f'health p99 during {LOGINS} logins, in the event loop: {percentile(blocking, 0.99) * 1000:.1f} ms')
+    report(f'health p99 during {LOGINS} logins, in the hashing pool: {percentile(pooled, 0.99) * 1000:.1f} ms')
+    assert max(blocking) >= verify_duration
+    assert percentile(pooled, 0.99) < verify_duration / 2
+
+
+def test_full_pool_rejects_new_jobs(password_hash):
+    pool = HashingPool(auth.pwd_context, max_workers=1, max_pending=1)
+
+    async def verify_twice() -> list:
+        return await asyncio.gather(
+            pool.verify(PASSWORD, password_hash), pool.verify(PASSWORD, password_hash), return_exceptions=True
+        )
+
+    first, second = asyncio.run(verify_twice())
+
+    assert first is True
+    assert isinstance(second, HashingPoolFullError)
+    assert pool.stats()['rejected'] == 1
+
+
+def test_busy_pool_answers_503(client, make_users, monkeypatch):
+    make_users(1)
+
+    async def pool_full(*_args: any) -> bool:
+        raise HashingPoolFullError
+
+    monkeypatch.setattr(auth.hashing_pool, 'verify', pool_full)
+    response = client.post('/auth/login', data={'username': 'user0@legein.test', 'password': PASSWORD})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
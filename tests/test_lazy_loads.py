@@ -0,0 +1,81 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+import main
+from src.models.book import Book
+from src.models.friendship import friendship
+from src.models.review import Review
+from src.models.user import User
+from src.utils.middleware import lazy_load_middleware
+from src.utils.middleware.lazy_load_middleware import LazyLoadError, LazyLoadMiddleware, count_lazy_loads
+
+"""
+### test_lazy_loads.py ###
+
+The lazy load detection counts the relationships loaded one by one, by path, fails the requests exceeding the
+threshold in raise mode, and finds none in the reviews of the friends, loaded with the options of their schema.
+"""
+
+REVIEWS = 5
+
+
+@pytest.fixture()
+def reviews(make_users, make_catalog) -> list[int]:
+    """
+    Insert reviews of distinct books by distinct users, all friends of the first user
+    :return: The ids of the users, the first one being the friend of all the others
+    """
+    user_ids = make_users(REVIEWS + 1)
+    book_ids = make_catalog(REVIEWS)
+    Book.update_where([Book.id.in_(book_ids)], {'publication_year': 2000, 'pages': 100}, None)
+    rows = [
+        {'title': f'Review {index}', 'content': 'Content', 'rating': 5, 'book_id': book_id, 'user_id': user_id}
+        for index, (book_id, user_id) in enumerate(zip(book_ids, user_ids[1:]))
+    ]
+    Review.session.execute(insert(Review), rows)
+    friends = [{'user_id': user_ids[0], 'friend_id': user_id} for user_id in user_ids[1:]]
+    Review.session.execute(insert(friendship), friends)
+    Review.session.commit()
+    Review.session.remove()
+
+    return user_ids
+
+
+@pytest.fixture()
+def raise_mode(monkeypatch) -> None:
+    """
+    Run the middleware in raise mode, allowing no lazy load
+    """
+    monkeypatch.setattr(lazy_load_middleware, 'LAZY_LOAD_DETECTION', 'raise')
+    monkeypatch.setattr(lazy_load_middleware, 'LAZY_LOAD_THRESHOLD', 0)
+
+
+def test_plain_list_lazy_loads_each_relationship(reviews):
+    with count_lazy_loads(raise_on_excess=False) as counter:
+        for review in Review.list():
+            _ = review.book, review.user
+
+    assert counter.loads == {'Review.book': REVIEWS, 'Review.user': REVIEWS}
+    assert counter.total == REVIEWS * 2
+
+
+def test_raise_mode_fails_the_route_above_the_threshold(reviews, raise_mode):
+    app = FastAPI()
+
+    @app.get('/review-books/')
+    async def get_review_books() -> list[str]:
+        return [review.book.title for review in Review.list()]
+
+    client = TestClient(LazyLoadMiddleware(app))
+    with pytest.raises(LazyLoadError, match='Review.book x1'):
+        client.get('/review-books/')
+
+
+def test_friends_reviews_need_no_lazy_load(reviews, raise_mode, auth_headers):
+    client = TestClient(LazyLoadMiddleware(main.app))
+    response = client.get('/review/friends-reviews/', headers=auth_headers(User.find(reviews[0])))
+
+    assert response.status_code == 200
+    assert len(response.json()) == REVIEWS
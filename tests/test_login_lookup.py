@@ -0,0 +1,75 @@
+import statistics
+
+from sqlalchemy import func, select, text
+
+from conftest import POSTGRES, PASSWORD, count_queries, report, scaled, timed
+from src.models.user import User
+from src.routers.auth.auth import get_user
+
+"""
+### test_login_lookup.py ###
+
+The login looks its user up by normalized email through the lower(email) index, so its cost does not grow with the
+number of users.
+"""
+
+SMALL_TABLE = 1000
+LARGE_TABLE = 20000
+LOOKUPS = 200
+
+
+def test_login_finds_the_user_ignoring_case(client, make_users):
+    make_users(3)
+
+    response = client.post('/auth/login', data={'username': '  USER1@Legein.test ', 'password': PASSWORD})
+
+    assert response.status_code == 200
+    assert response.json()['user']['email'] == 'user1@legein.test'
+
+
+def test_login_lookup_is_a_single_indexed_query(make_users):
+    make_users(scaled(SMALL_TABLE))
+
+    with count_queries() as stats:
+        user = get_user('user7@legein.test')
+
+    assert user.email == 'user7@legein.test'
+    assert stats.queries == 1
+
+    qry = select(User.id).where(func.lower(User.email) == 'user7@legein.test')
+    sql = str(qry.compile(User.session.bind, compile_kwargs={'literal_binds': True}))
+    explain = 'EXPLAIN ' if POSTGRES else 'EXPLAIN QUERY PLAN '
+    plan = ' '.join(str(row) for row in User.session.execute(text(explain + sql)))
+    assert 'ix_user_email_lower' in plan
+
+
+def lookup_duration(emails: list[str]) -> float:
+    """
+    Get the median duration of the lookup of some emails
+    :return: The duration of a single lookup, in seconds
+    """
+
+    def lookup() -> None:
+        for email in emails:
+            get_user(email)
+        User.session.remove()
+
+    return statistics.median(timed(lookup, 5)) / len(emails)
+
+
+def test_login_lookup_latency_stays_flat(make_users):
+    """
+    Benchmark of the lookup on a small and on a large table, the old full scan grew linearly between them
+    """
+    small_table, large_table = scaled(SMALL_TABLE), scaled(LARGE_TABLE)
+    make_users(small_table, prefix='first')
+    emails = [f'first{index}@legein.test' for index in range(0, small_table, max(1, small_table // LOOKUPS))]
+
+    small = lookup_duration(emails)
+    make_users(large_table - small_table, prefix='more')
+    large = lookup_duration(emails)
+
+    report(f'login lookup, {small_table} users: {small * 1e6:.0f} us per lookup')
+    report(f'login lookup, {large_table} users: {large * 1e6:.0f} us per lookup')
+    # A full scan would be large_table / small_table times slower, the indexed lookup stays in the same range
+    assert large < small * 3 + 0.0005
@@ -0,0 +1,54 @@
+from conftest import count_queries
+from src.models.author import Author
+from src.models.book import Book
+from src.models.book.book_schema import BookSchema
+
+"""
+### test_query_cache.py ###
+
+A query cache hit rebuilds the items with their eagerly loaded relationships, so serving them runs no query at all,
+and the entry is dropped when one of the related models is written.
+"""
+
+BOOKS = 20
+
+
+def serialize(books: list[Book]) -> list[dict]:
+    """
+    Serialize the books as the response would
+    """
+    return [BookSchema.model_validate(book, from_attributes=True).model_dump() for book in books]
+
+
+def list_books() -> list[Book]:
+    """
+    List the books through the query cache, in a new session
+    """
+    Book.session.remove()
+    return Book.list(order_by=('id', True), schema=BookSchema, cache=True)
+
+
+def test_cache_hit_restores_the_relationships(make_catalog):
+    book_ids = make_catalog(BOOKS)
+    Book.update_where([Book.id.in_(book_ids)], {'publication_year': 2000, 'pages': 100}, None)
+    expected = serialize(list_books())
+
+    with count_queries() as stats:
+        served = serialize(list_books())
+
+    assert stats.queries == 0
+    assert served == expected
+    assert all(book['authors'] and book['genres'] and book['publisher'] for book in served)
+
+
+def test_writing_a_related_model_drops_the_entry(make_catalog):
+    book_ids = make_catalog(BOOKS)
+    list_books()
+
+    Author.update_where([Author.first_last_name == 'Writer0'], {'name': 'Renamed'}, None)
+    with count_queries() as stats:
+        books = list_books()
+
+    assert stats.queries > 0
+    assert books[0].id == book_ids[0]
+    assert books[0].authors[0].name == 'Renamed'
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import HTTPException
+
+from conftest import count_queries
+from src.models.book import Book
+from src.models.book.book_schema import BookSchema
+from src.routers.rosetta_router import find_many_or_404
+
+"""
+### test_query_counts.py ###
+
+Statements counted through the hooks of the SQL timing middleware: the batched lookups and the eager loading derived
+from the response schemas run a fixed number of queries whatever the number of items.
+"""
+
+LOOKUPS = 50
+
+
+def read_relationships(books: list[Book]) -> None:
+    """
+    Touch the relationships serialized by BookSchema, as the response would
+    """
+    for book in books:
+        _ = book.publisher, list(book.authors), list(book.genres)
+
+
+def test_find_many_runs_one_in_query(make_catalog):
+    book_ids = make_catalog(LOOKUPS)
+
+    with count_queries() as stats:
+        books, missing_ids = Book.find_many(list(reversed(book_ids)))
+
+    assert stats.queries == 1
+    assert ' IN ' in stats.slowest_statement.upper()
+    assert [book.id for book in books] == list(reversed(book_ids))
+    assert missing_ids == []
+
+
+def test_find_many_skips_the_items_already_loaded(make_catalog):
+    book_ids = make_catalog(LOOKUPS)
+    Book.find_many(book_ids[:10])
+
+    with count_queries() as stats:
+        books, _ = Book.find_many(book_ids)
+
+    assert stats.queries == 1
+    assert len(books) == LOOKUPS
+
+    with count_queries() as stats:
+        Book.find_many(book_ids)
+
+    assert stats.queries == 0
+
+
+def test_find_many_or_404_reports_every_missing_id(make_catalog):
+    book_ids = make_catalog(LOOKUPS)
+    missing_ids = [max(book_ids) + 1, max(book_ids) + 2]
+
+    with count_queries() as stats, pytest.raises(HTTPException) as error:
+        find_many_or_404(Book, book_ids + missing_ids)
+
+    assert stats.queries == 1
+    assert error.value.status_code == 404
+    assert str(missing_ids) in error.value.detail
+
+
+@pytest.mark.parametrize('count', [5, LOOKUPS])
+def test_schema_loads_the_relationships_in_fixed_queries(make_catalog, count):
+    make_catalog(count)
+
+    with count_queries() as stats:
+        read_relationships(Book.list(order_by=('title', True), schema=BookSchema))
+
+    # The books joined with their publisher, then one query for the authors and one for the genres
+    assert stats.queries == 3
+
+
+def test_lazy_loading_grows_with_the_items(make_catalog):
+    make_catalog(LOOKUPS)
+
+    with count_queries() as stats:
+        read_relationships(Book.list())
+
+    assert stats.queries > LOOKUPS
@@ -0,0 +1,77 @@
+from datetime import date, datetime
+
+from sqlalchemy import func, select, text, update
+
+from conftest import postgres_only
+from db import engine
+from src.models.daily_rollup import DailyRollup, RollupMetric, RollupStaleDay, RollupState
+from src.models.user import User
+from src.utils.tasks.rollup_refresher import ROLLUP_LOCK_KEY, refresh_rollups
+
+"""
+### test_rollup_refresher.py ###
+
+The refresher keeps its watermark in the rollup state, moved by every refresh, recomputes the days of the deleted
+items recorded in the database, and only runs in one worker at a time.
+"""
+
+CREATION_DAY = date(2020, 1, 1)
+
+
+def users_created(day: date) -> int:
+    """
+    Get the number of users created on a day, from the rollups
+    """
+    [point] = DailyRollup.trend(RollupMetric.USERS, None, day, date.fromordinal(day.toordinal() + 1))
+    DailyRollup.session.remove()
+
+    return point['count']
+
+
+def make_old_users(make_users: callable, count: int) -> list[int]:
+    """
+    Insert users created and last modified long before any refresh
+    """
+    user_ids = make_users(count)
+    old = datetime.combine(CREATION_DAY, datetime.min.time())
+    User.session.execute(update(User).where(User.id.in_(user_ids)).values(created_at=old, modified_at=old))
+    User.session.commit()
+    User.session.remove()
+
+    return user_ids
+
+
+def test_every_refresh_moves_the_watermark():
+    RollupState.session.add(RollupState(id=1, refreshed_at=datetime(2000, 1, 1)))
+    RollupState.session.commit()
+
+    assert refresh_rollups() == 0
+    assert RollupState.watermark() > datetime(2000, 1, 1)
+
+
+def test_deleted_items_are_recomputed_from_the_database(make_users):
+    user_ids = make_old_users(make_users, 2)
+    refresh_rollups()
+    assert users_created(CREATION_DAY) == 2
+
+    User.find(user_ids[0]).delete()
+    User.session.remove()
+
+    # Recorded by the deleting transaction, so a refresh in another process would see it as well
+    assert RollupStaleDay.pending()[1] == {(RollupMetric.USERS, CREATION_DAY)}
+    assert refresh_rollups() == 1
+    assert users_created(CREATION_DAY) == 1
+    assert RollupStaleDay.session.scalar(select(func.count()).select_from(RollupStaleDay)) == 0
+
+
+@postgres_only
+def test_refresh_is_skipped_while_another_worker_holds_the_lock(make_users):
+    make_old_users(make_users, 1)
+
+    with engine.connect() as connection:
+        connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': ROLLUP_LOCK_KEY})
+        assert refresh_rollups() is None
+        connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': ROLLUP_LOCK_KEY})
+
+    assert refresh_rollups() == 1
+    assert users_created(CREATION_DAY) == 1
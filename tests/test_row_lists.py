@@ -0,0 +1,71 @@
+import statistics
+import time
+import tracemalloc
+from typing import Callable
+
+from conftest import report, scaled
+from src.models.book import Book
+from src.models.book.book_schema import BookSchema
+from src.routers.rosetta_router import json_rows_response, list_adapter
+
+"""
+### test_row_lists.py ###
+
+Benchmark of a large page of books serialized to JSON, from ORM instances and from the plain rows of as_rows, which
+skip building the instances and only read the columns the schema needs.
+"""
+
+BOOKS = 2000
+REPEAT = 3
+
+
+def orm_page() -> bytes:
+    """
+    Serialize a page of books loaded as ORM instances
+    """
+    adapter = list_adapter(BookSchema)
+    books = Book.paginate(scaled(BOOKS), schema=BookSchema).items
+
+    return adapter.dump_json(adapter.validate_python(books, from_attributes=True))
+
+
+def rows_page() -> bytes:
+    """
+    Serialize a page of books loaded as plain rows
+    """
+    return json_rows_response(BookSchema, Book.paginate(scaled(BOOKS), schema=BookSchema, as_rows=True).items).body
+
+
+def measure(serialize: Callable[[], bytes]) -> tuple[float, int, bytes]:
+    """
+    Serialize a page in new sessions, then once more tracing the memory allocated
+    :return: The median number of rows per second, the peak memory in bytes and the JSON of the page
+    """
+    durations = []
+    for _ in range(REPEAT):
+        Book.session.remove()
+        start = time.perf_counter()
+        serialize()
+        durations.append(time.perf_counter() - start)
+
+    Book.session.remove()
+    tracemalloc.start()
+    body = serialize()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return scaled(BOOKS) / statistics.median(durations), peak, body
+
+
+def test_rows_serialize_faster_with_less_memory(make_catalog):
+    book_ids = make_catalog(scaled(BOOKS))
+    Book.update_where([Book.id.in_(book_ids)], {'publication_year': 2000, 'pages': 100}, None)
+
+    orm_speed, orm_peak, orm_body = measure(orm_page)
+    rows_speed, rows_peak, rows_body = measure(rows_page)
+
+    report(f'page of {scaled(BOOKS)} books, ORM: {orm_speed:.0f} rows/s, {orm_peak / 2**20:.1f} MiB peak')
+    report(f'page of {scaled(BOOKS)} books, rows: {rows_speed:.0f} rows/s, {rows_peak / 2**20:.1f} MiB peak')
+    assert rows_body == orm_body
+    assert rows_speed > orm_speed * 1.3
+    assert rows_peak < orm_peak
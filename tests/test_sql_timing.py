@@ -0,0 +1,74 @@
+import re
+
+import pytest
+
+from src.models.user import User
+from src.routers.metrics import metrics
+from src.utils.middleware import sql_timing_middleware
+from src.utils.middleware.sql_timing_middleware import SQL_SUMMARY_WINDOW, RouteSqlSummary
+
+"""
+### test_sql_timing.py ###
+
+Every response reports its SQL statements in a Server-Timing header, and the admins read their summary by route.
+"""
+
+FRIENDS_REVIEWS_ROUTE = 'GET /review/friends-reviews/'
+
+
+def server_timing(header: str) -> dict[str, dict[str, str]]:
+    """
+    Parse a Server-Timing header
+    :param header: The header value
+    :return: The parameters of each metric, by metric name
+    """
+    metrics_found = {}
+    for name, params in re.findall(r'([\w-]+)((?:;\w+=(?:"[^"]*"|[^,;]*))*)', header):
+        metrics_found[name] = {key: value.strip('"') for key, value in re.findall(r';(\w+)=("[^"]*"|[^,;]*)', params)}
+
+    return metrics_found
+
+
+@pytest.fixture(autouse=True)
+def route_sql_summary(monkeypatch) -> RouteSqlSummary:
+    """
+    Summary recording only the requests of the test
+    """
+    summary = RouteSqlSummary(SQL_SUMMARY_WINDOW)
+    monkeypatch.setattr(sql_timing_middleware, 'route_sql_summary', summary)
+    monkeypatch.setattr(metrics, 'route_sql_summary', summary)
+
+    return summary
+
+
+def test_responses_report_their_statements(client, admin, auth_headers):
+    response = client.get('/review/friends-reviews/', headers=auth_headers(admin))
+
+    timing = server_timing(response.headers['Server-Timing'])
+    queries = int(timing['db-count']['desc'].split()[0])
+    assert queries >= 1
+    assert float(timing['db-total']['dur']) >= float(timing['db-slowest']['dur']) > 0
+    assert timing['db-slowest']['desc'].startswith('SELECT')
+
+
+def test_sql_metrics_are_summarized_by_route(client, admin, auth_headers):
+    headers = auth_headers(admin)
+    for _ in range(3):
+        client.get('/review/friends-reviews/', headers=headers)
+    client.get('/book/', headers=headers)
+
+    response = client.get('/metrics/sql', headers=headers)
+
+    assert response.status_code == 200
+    summary = response.json()
+    assert {FRIENDS_REVIEWS_ROUTE, 'GET /book/'} <= summary.keys()
+    assert summary[FRIENDS_REVIEWS_ROUTE]['requests'] == 3
+    assert summary[FRIENDS_REVIEWS_ROUTE]['max_queries'] >= summary[FRIENDS_REVIEWS_ROUTE]['avg_queries'] >= 1
+    assert summary[FRIENDS_REVIEWS_ROUTE]['slowest_statement'].startswith('SELECT')
+    assert summary['GET /book/']['requests'] == 1
+
+
+def test_sql_metrics_are_admin_only(client, auth_headers, make_users):
+    [user] = User.find_many(make_users(1))[0]
+
+    assert client.get('/metrics/sql', headers=auth_headers(user)).status_code == 403
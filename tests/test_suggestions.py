@@ -0,0 +1,113 @@
+import statistics
+
+from sqlalchemy import text
+
+from conftest import count_queries, percentile, postgres_only, report, scaled, timed
+from src.models.author import Author
+from src.models.book import Book
+from src.utils.search.suggestions import find_suggestions, suggest, suggestion_cache, suggestion_statement
+
+"""
+### test_suggestions.py ###
+
+Benchmark of the typo tolerant suggestions, matched with the trigram operator %> through the GIN indexes of the book
+titles and the author names, and served from memory until a book or an author is written. Postgres only.
+"""
+
+BOOKS = 20000
+SEARCHES = 50
+LIMIT = 8
+# Typed on the way to "Shakespeare", the last ones misspelled
+PREFIXES = ['shakes', 'shakesp', 'shakespe', 'shakespea', 'shakespear', 'shakspeare', 'shakespaere']
+
+
+def prepare_catalog(make_catalog: callable) -> list[int]:
+    """
+    Insert a catalog where one book title and one author name contain a rare word
+    :return: The ids of the books, the last one titled with the rare word
+    """
+    suggestion_cache.clear()
+    book_ids = make_catalog(scaled(BOOKS))
+    Book.update_where([Book.id.in_(book_ids)], {'publication_year': 2000, 'pages': 100}, None)
+    Book.update_where([Book.id == book_ids[-1]], {'title': 'Shakespeare in Love'}, None)
+    Author.update_where([Author.name == 'Author0'], {'first_last_name': 'Shakespeare'}, None)
+    Book.session.execute(text('ANALYZE book'))
+    Book.session.execute(text('ANALYZE author'))
+    Book.session.commit()
+
+    return book_ids
+
+
+@postgres_only
+def test_misspelled_prefix_is_suggested(client, admin, auth_headers, make_catalog):
+    book_ids = prepare_catalog(make_catalog)
+
+    response = client.get('/search/suggest', params={'q': 'Shakspeare '}, headers=auth_headers(admin))
+
+    assert response.status_code == 200
+    assert {(suggestion['kind'], suggestion['text']) for suggestion in response.json()} == {
+        ('BOOK', 'Shakespeare in Love'),
+        ('AUTHOR', 'Author0 Shakespeare'),
+    }
+    assert book_ids[-1] in [suggestion['id'] for suggestion in response.json()]
+
+
+@postgres_only
+def test_suggestions_use_the_trigram_indexes(make_catalog):
+    prepare_catalog(make_catalog)
+
+    # Run through the driver with its parameters, since the percent signs of %> are escaped for it
+    qry = suggestion_statement('shakspeare', LIMIT).compile(Book.session.bind)
+    rows = Book.session.connection().exec_driver_sql('EXPLAIN ' + str(qry), qry.params)
+    plan = ' '.join(str(row) for row in rows)
+
+    assert 'ix_book_title_trgm' in plan
+    assert 'ix_author_full_name_trgm' in plan
+
+
+@postgres_only
+def test_writes_drop_the_cached_suggestions(admin, make_catalog):
+    admin_id = admin.id
+    book_ids = prepare_catalog(make_catalog)
+    suggest('shakspeare', LIMIT)
+
+    with count_queries() as stats:
+        suggest('Shakspeare', LIMIT)
+
+    assert stats.queries == 0
+
+    # A bulk update of a book
+    Book.update_where([Book.id == book_ids[0]], {'title': 'Shakespeare Sonnets'}, None)
+    Book.session.remove()
+    assert 'Shakespeare Sonnets' in [suggestion['text'] for suggestion in suggest('shakspeare', LIMIT)]
+
+    # An update of an author through the ORM
+    [author] = Author.list([Author.name == 'Author0'])
+    author.update({'first_last_name': 'Marlowe'}, admin_id)
+    Author.session.remove()
+    assert 'Author0 Shakespeare' not in [suggestion['text'] for suggestion in suggest('shakspeare', LIMIT)]
+
+
+@postgres_only
+def test_suggestion_latency(client, admin, auth_headers, make_catalog):
+    prepare_catalog(make_catalog)
+    headers = auth_headers(admin)
+    prefixes = iter(PREFIXES * SEARCHES)
+
+    def request_uncached() -> None:
+        suggestion_cache.clear()
+        client.get('/search/suggest', params={'q': next(prefixes)}, headers=headers)
+
+    queries = timed(lambda: find_suggestions(next(prefixes), LIMIT), SEARCHES)
+    requests = timed(request_uncached, SEARCHES)
+    cached = timed(lambda: client.get('/search/suggest', params={'q': 'shakspeare'}, headers=headers), SEARCHES)
+
+    report(
+        f'suggestions, {scaled(BOOKS)} books and authors: query p50 {statistics.median(queries) * 1000:.1f} ms, '
+        f'p95 {percentile(queries, 0.95) * 1000:.1f} ms'
+    )
+    report(
+        f'suggestions, {scaled(BOOKS)} books and authors: request p95 {percentile(requests, 0.95) * 1000:.1f} ms, '
+        f'cached {percentile(cached, 0.95) * 1000:.1f} ms'
+    )
+    assert percentile(queries, 0.95) < 0.010
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from db import SessionLocal
+from src.models.access_token import AccessToken
+from src.routers.auth import auth
+
+"""
+### test_token_rotation.py ###
+
+A refresh token is consumed by a single conditional update, so it can be rotated only once, and replaying a used
+refresh token revokes every token of its family.
+"""
+
+CONCURRENT_REFRESHES = 8
+
+
+def test_concurrent_consumptions_succeed_once(make_users):
+    user_id = make_users(1)[0]
+    _, refresh_token = auth.create_token_pair(str(user_id))
+    barrier = threading.Barrier(CONCURRENT_REFRESHES)
+
+    def consume() -> bool:
+        barrier.wait()
+        try:
+            return AccessToken.consume(refresh_token)
+        finally:
+            SessionLocal.remove()
+
+    with ThreadPoolExecutor(CONCURRENT_REFRESHES) as executor:
+        results = list(executor.map(lambda _: consume(), range(CONCURRENT_REFRESHES)))
+
+    assert results.count(True) == 1
+
+
+def test_refresh_token_rotates_once(client, make_users):
+    user_id = make_users(1)[0]
+    _, refresh_token = auth.create_token_pair(str(user_id))
+
+    first = client.post('/auth/refresh', json={'refresh_token': refresh_token})
+    second = client.post('/auth/refresh', json={'refresh_token': refresh_token})
+
+    assert first.status_code == 200
+    assert second.status_code == 401
+
+
+def test_replayed_refresh_token_revokes_its_family(client, make_users, monkeypatch):
+    monkeypatch.setattr(auth, 'STATELESS_AUTH', True)
+    user_id = make_users(1)[0]
+    _, stolen_token = auth.create_token_pair(str(user_id))
+    _, other_session_token = auth.create_token_pair(str(user_id))
+
+    rotated = client.post('/auth/refresh', json={'refresh_token': stolen_token}).json()
+    headers = {'Authorization': f'Bearer {rotated["access_token"]}'}
+    assert client.get('/auth/current-user', headers=headers).status_code == 200
+
+    replay = client.post('/auth/refresh', json={'refresh_token': stolen_token})
+
+    assert replay.status_code == 401
+    assert client.post('/auth/refresh', json={'refresh_token': rotated['refresh_token']}).status_code == 401
+    assert client.get('/auth/current-user', headers=headers).status_code == 401
+    # The other logins of the user have their own family
+    assert client.post('/auth/refresh', json={'refresh_token': other_session_token}).status_code == 200